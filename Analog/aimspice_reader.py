@@ -0,0 +1,135 @@
+import numpy as np
+
+
+# Header line written by AIM-Spice for a DC sweep of id(m1a)
+AIMSPICE_HEADER = 'sweep (current)\tsweep (current)\tid(m1a) (current)'
+
+# Columns kept by default: first sweep column and id(m1a) (column 1 is the duplicate sweep)
+DEFAULT_COLUMNS = (0, 2)
+
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[[ord(' '), ord('\t'), ord('\n'), ord('\r')]] = True
+
+
+def parse_header(header_line, file_path='<data>'):
+    """
+    Parse and validate the header line of an AIM-Spice result file.
+    The header must start with a duplicated sweep column, e.g.
+    "sweep (current)	sweep (current)	id(m1a) (current)".
+
+    Args:
+        header_line: First line of the file (str or bytes)
+        file_path: File name used in error messages
+
+    Returns:
+        List of column names
+    """
+    if isinstance(header_line, bytes):
+        header_line = header_line.decode('utf-8', errors='replace')
+    names = [name.strip() for name in header_line.rstrip('\r\n').split('\t')]
+
+    if len(names) < 3 or not names[0].startswith('sweep') or names[0] != names[1]:
+        raise ValueError(f"Unexpected AIM-Spice header in {file_path}: {header_line.strip()!r}")
+    return names
+
+
+def count_rows(body):
+    """Count the lines of a body that hold any values (blank lines are skipped like the parser does)."""
+    data = np.frombuffer(body, dtype=np.uint8)
+    line_numbers = np.cumsum(data == ord('\n'))[~WHITESPACE[data]]
+    return int(np.count_nonzero(np.diff(line_numbers))) + 1 if len(line_numbers) else 0
+
+
+def decode_body(body, n_columns, columns=DEFAULT_COLUMNS, file_path='<data>'):
+    """
+    Decode the numeric body of a result file with NumPy's text parser.
+    Depending on the NumPy version the parser raises or just stops at the
+    first token that is not a number, so the number of values is also
+    checked against the number of rows.
+
+    Args:
+        body: Bytes of the numeric body (whole rows)
+        n_columns: Number of columns per row
+        columns: Indices of the columns to keep
+        file_path: File name used in error messages
+
+    Returns:
+        float64 array of shape (n_rows, len(columns))
+    """
+    n_rows = count_rows(body)
+    try:
+        values = np.fromstring(body.decode('ascii', errors='replace'), dtype=np.float64, sep=' ')
+    except ValueError as e:
+        raise ValueError(f"{file_path}: {e}") from None
+    if values.size != n_rows * n_columns:
+        raise ValueError(f"{file_path}: expected {n_rows} rows of {n_columns} values, "
+                         f"parsed {values.size} values (bad or missing value)")
+    return np.ascontiguousarray(values.reshape(-1, n_columns)[:, list(columns)])
+
+
+def read_aimspice(file_path, columns=DEFAULT_COLUMNS):
+    """
+    Read an AIM-Spice result file into a float64 array.
+
+    Args:
+        file_path: Path to the result file
+        columns: Indices of the columns to keep (default: sweep and id(m1a))
+
+    Returns:
+        Array of shape (n_rows, len(columns))
+    """
+    with open(file_path, 'rb') as f:
+        names = parse_header(f.readline(), file_path)
+        body = f.read()
+
+    if max(columns) >= len(names):
+        raise ValueError(f"{file_path} has only {len(names)} columns")
+    return decode_body(body, len(names), columns, file_path)
+
+
+def iter_aimspice_chunks(file_path, columns=DEFAULT_COLUMNS, chunk_bytes=64 * 1024 * 1024):
+    """
+    Read an AIM-Spice result file in chunks of whole rows, in bounded memory.
+
+    Args:
+        file_path: Path to the result file
+        columns: Indices of the columns to keep (default: sweep and id(m1a))
+        chunk_bytes: Approximate number of bytes decoded per chunk
+
+    Yields:
+        Arrays of shape (n_rows_in_chunk, len(columns))
+    """
+    with open(file_path, 'rb') as f:
+        names = parse_header(f.readline(), file_path)
+        if max(columns) >= len(names):
+            raise ValueError(f"{file_path} has only {len(names)} columns")
+
+        remainder = b''
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+
+            # Only decode whole rows, keep the partial last row for the next chunk
+            block = remainder + block
+            end = block.rfind(b'\n') + 1
+            block, remainder = block[:end], block[end:]
+            if block.strip():
+                yield decode_body(block, len(names), columns, file_path)
+
+        if remainder.strip():
+            yield decode_body(remainder + b'\n', len(names), columns, file_path)
+
+
+def write_aimspice(file_path, sweep, current, header=AIMSPICE_HEADER):
+    """
+    Write a sweep in the AIM-Spice result layout (duplicated sweep column, "%e" values).
+
+    Args:
+        file_path: Path of the file to write
+        sweep: Array of sweep values
+        current: Array of id(m1a) values, same length as sweep
+    """
+    sweep = np.asarray(sweep, dtype=np.float64)
+    np.savetxt(file_path, np.column_stack((sweep, sweep, current)), fmt='%e', delimiter='\t',
+               header=header, comments='')
@@ -0,0 +1,284 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import numpy as np
+
+from aimspice_reader import write_aimspice
+from plotting import (IIN_START, IIN_STEP, setup_plot_style, find_result_files, parse_filename,
+                      read_and_split_data, read_iin_data, generate_metrics_table, plot_voltage_sweep,
+                      plot_current_error, plot_combined_error_trendlines, merge_plots_to_pdf)
+from tracing import reset_peak_rss, get_peak_rss
+
+
+# Bump when stages or the JSON layout change, so old results are not compared by mistake
+BENCHMARK_VERSION = 1
+
+PROCESSES = ['ss', 'tt', 'ff']
+VOLTAGE_OFFSETS = ['01', '0', '10']
+TEMPERATURES = ['0', '27', '50']
+MAX_CORNERS = len(PROCESSES) * len(VOLTAGE_OFFSETS) * len(TEMPERATURES)
+
+# Input current sweep of the _Iin files (38 µA in steps of 0.01 µA, like the real files)
+IIN_SWEEP_START = 38e-6
+IIN_SWEEP_STEP = 0.01e-6
+
+
+def mirror_current(vout, iin, knee, slope):
+    """Smooth current mirror output: rises over the knee voltage, then a small output slope."""
+    return iin * (1 - np.exp(-vout / knee)) * (1 + slope * (vout - 0.5))
+
+
+def make_synthetic_results(results_dir, n_corners, n_points, n_experiments, n_iin_points, rng):
+    """
+    Write synthetic AIM-Spice result files for the first n_corners corners of the PVT grid.
+    Every corner gets a regular file (n_experiments sweeps of n_points) and an
+    _Iin file (n_iin_points input currents), with the same header and
+    duplicate sweep column as the real results.
+
+    Args:
+        results_dir: Directory to write the files to
+        n_corners: Number of corners (at most MAX_CORNERS)
+        n_points: Points per voltage sweep
+        n_experiments: Number of input currents per regular file
+        n_iin_points: Points per _Iin file (0 for no _Iin files)
+        rng: NumPy random generator, varies the curves per corner
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    corners = [(p, v, t) for p in PROCESSES for v in VOLTAGE_OFFSETS for t in TEMPERATURES][:n_corners]
+
+    vout = np.arange(n_points) / n_points  # 0 .. 0.99 for 100 points
+    iin = IIN_START + IIN_STEP * np.arange(n_experiments)
+    iin_sweep = IIN_SWEEP_START + IIN_SWEEP_STEP * np.arange(n_iin_points)
+
+    for process, voltage_offset, temperature in corners:
+        knee = rng.uniform(0.08, 0.13)
+        slope = rng.uniform(0.005, 0.02)
+        name = f"{process}_{voltage_offset}_{temperature}"
+
+        current = mirror_current(vout, iin[:, None], knee, slope)
+        write_aimspice(os.path.join(results_dir, name), np.tile(vout, n_experiments), current.ravel())
+
+        if n_iin_points:
+            current = mirror_current(1.0, iin_sweep, knee, slope) * (1 + rng.normal(0, 1e-4, n_iin_points))
+            write_aimspice(os.path.join(results_dir, name + '_Iin'), iin_sweep, current)
+
+
+@contextlib.contextmanager
+def measure(stages, name, calls, trace_memory=False):
+    """
+    Time a stage and record its wall time, CPU time and peak memory.
+    The peak RSS covers only this stage where the platform can reset it
+    (peak_rss_is_stage), otherwise it is the peak of the process so far.
+    Output printed by the stage is discarded.
+
+    Args:
+        stages: List to append the stage record to
+        name: Stage name
+        calls: Number of calls of the timed function in this stage
+        trace_memory: Also record the peak of traced (Python and NumPy)
+            allocations; this slows the stage down several times
+    """
+    stage_peak = reset_peak_rss()
+    if trace_memory:
+        tracemalloc.start()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+    record = {
+        'stage': name,
+        'calls': calls,
+        'seconds': time.perf_counter() - start_wall,
+        'cpu_seconds': time.process_time() - start_cpu,
+        'peak_rss_bytes': get_peak_rss(),
+        'peak_rss_is_stage': stage_peak,
+        'peak_traced_bytes': None,
+    }
+    if trace_memory:
+        record['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    record['seconds_per_call'] = record['seconds'] / calls if calls else None
+    stages.append(record)
+
+
+def run_benchmark(work_dir, n_corners=27, n_points=100, n_experiments=3, n_iin_points=1400, runs=1,
+                  plot_format='png', trace_memory=False, seed=0):
+    """
+    Generate synthetic results and time every stage of the plotting pipeline.
+    Each Monte Carlo run is a separate results directory with its own random
+    curves; a stage record covers all runs.
+
+    Args:
+        work_dir: Directory for the synthetic results and plots
+        n_corners: Corners per run (at most MAX_CORNERS, limited by the file name pattern)
+        n_points: Points per voltage sweep
+        n_experiments: Input currents per regular file
+        n_iin_points: Points per _Iin file (0 for no _Iin files)
+        runs: Number of Monte Carlo runs
+        plot_format: 'png' to save PNGs (and merge them), 'pdf' to stream vector pages
+        trace_memory: Also record the peak traced memory of every stage (slow)
+        seed: Seed of the random curves
+
+    Returns:
+        List of stage records and the seconds spent generating the data
+    """
+    rng = np.random.default_rng(seed)
+    run_dirs = [os.path.join(work_dir, f"run_{run:03d}") for run in range(runs)]
+
+    start = time.perf_counter()
+    for run_dir in run_dirs:
+        make_synthetic_results(os.path.join(run_dir, 'results'), n_corners, n_points, n_experiments,
+                               n_iin_points, rng)
+        os.makedirs(os.path.join(run_dir, 'plots'), exist_ok=True)
+    generate_seconds = time.perf_counter() - start
+
+    setup_plot_style()
+    stages = []
+
+    found = {}
+    with measure(stages, 'find_result_files', runs, trace_memory):
+        for run_dir in run_dirs:
+            found[run_dir] = find_result_files(os.path.join(run_dir, 'results'))
+    regular_files = [f for run_dir in run_dirs for f in found[run_dir][0]]
+    iin_files = [f for run_dir in run_dirs for f in found[run_dir][1]]
+
+    with measure(stages, 'read_and_split_data', len(regular_files), trace_memory):
+        split_data = [read_and_split_data(f, use_cache=False) for f in regular_files]
+
+    with measure(stages, 'read_and_split_data_cache_miss', len(regular_files), trace_memory):
+        for f in regular_files:
+            read_and_split_data(f)
+
+    with measure(stages, 'read_and_split_data_cache_hit', len(regular_files), trace_memory):
+        for f in regular_files:
+            read_and_split_data(f)
+
+    with measure(stages, 'read_iin_data', len(iin_files), trace_memory):
+        iin_data = [read_iin_data(f, use_cache=False) for f in iin_files]
+
+    with measure(stages, 'generate_metrics_table', runs, trace_memory):
+        for run_dir in run_dirs:
+            generate_metrics_table(os.path.join(run_dir, 'results'), os.path.join(run_dir, 'plots'))
+
+    def plot_path(file_path):
+        if plot_format != 'png':
+            return None
+        plots_dir = os.path.join(os.path.dirname(os.path.dirname(file_path)), 'plots')
+        return os.path.join(plots_dir, f"{os.path.basename(file_path)}_plot.png")
+
+    pdf = PdfPages(os.path.join(work_dir, 'plots.pdf')) if plot_format == 'pdf' else None
+    try:
+        for name, reuse in [('plot_voltage_sweep', False), ('plot_voltage_sweep_reuse', True)]:
+            with measure(stages, name, len(regular_files), trace_memory):
+                for f, data in zip(regular_files, split_data):
+                    process, voltage_offset, temperature, _ = parse_filename(f)
+                    plot_voltage_sweep(data, plot_path(f), process, voltage_offset, temperature,
+                                       verbose=False, pdf=pdf, reuse=reuse)
+
+        with measure(stages, 'plot_current_error', len(iin_files), trace_memory):
+            for f, data in zip(iin_files, iin_data):
+                process, voltage_offset, temperature, _ = parse_filename(f)
+                plot_current_error(data, plot_path(f), process, voltage_offset, temperature, pdf=pdf,
+                                   reuse=True)
+
+        with measure(stages, 'plot_combined_error_trendlines', runs, trace_memory):
+            for run_dir in run_dirs:
+                plot_combined_error_trendlines(found[run_dir][1], os.path.join(run_dir, 'plots'),
+                                               os.path.join(run_dir, 'results'), pdf=pdf,
+                                               save_png=plot_format == 'png')
+    finally:
+        if pdf is not None:
+            pdf.close()
+        plt.close('all')
+
+    if plot_format == 'png':
+        with measure(stages, 'merge_plots_to_pdf', runs, trace_memory):
+            for run_dir in run_dirs:
+                merge_plots_to_pdf(os.path.join(run_dir, 'plots'))
+
+    return stages, generate_seconds
+
+
+def main():
+    """Run the benchmark and write the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark the Analog plotting pipeline on synthetic results.")
+    parser.add_argument('--corners', type=int, default=MAX_CORNERS,
+                        help=f"Corners per run (at most {MAX_CORNERS})")
+    parser.add_argument('--points', type=int, default=100, help="Points per voltage sweep")
+    parser.add_argument('--experiments', type=int, default=3, help="Input currents per regular file")
+    parser.add_argument('--iin-points', type=int, default=1400, help="Points per _Iin file (0 for none)")
+    parser.add_argument('--runs', type=int, default=1, help="Monte Carlo runs (one results directory each)")
+    parser.add_argument('--format', choices=['png', 'pdf'], default='png', dest='plot_format',
+                        help="Save PNGs and merge them, or stream vector PDF pages")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also trace allocations per stage with tracemalloc (slows the stages down)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="Directory for the synthetic data (default: a temporary directory, "
+                                           "removed afterwards unless --keep is given; a given directory is never removed)")
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary synthetic data and plots")
+    parser.add_argument('-o', '--output', help="Write the JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not 1 <= args.corners <= MAX_CORNERS:
+        parser.error(f"--corners must be between 1 and {MAX_CORNERS}")
+
+    # Only remove a directory the benchmark created itself, never one passed with --work-dir
+    remove_work_dir = not args.work_dir and not args.keep
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='analog_benchmark_')
+    config = {
+        'corners': args.corners,
+        'points': args.points,
+        'experiments': args.experiments,
+        'iin_points': args.iin_points,
+        'runs': args.runs,
+        'format': args.plot_format,
+        'trace_memory': args.trace_memory,
+        'seed': args.seed,
+    }
+
+    try:
+        stages, generate_seconds = run_benchmark(
+            work_dir, args.corners, args.points, args.experiments, args.iin_points, args.runs,
+            args.plot_format, args.trace_memory, args.seed)
+    finally:
+        if remove_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'benchmark_version': BENCHMARK_VERSION,
+        'config': config,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'generate_seconds': generate_seconds,
+        'stages': stages,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+
+
+MANIFEST_NAME = 'build_manifest.json'
+
+
+def hash_files(file_paths, extra=''):
+    """
+    Hash the contents of several files, e.g. the source code of the pipeline.
+
+    Args:
+        file_paths: List of file paths
+        extra: Extra string to include in the hash (e.g. a style version)
+
+    Returns:
+        Hex digest string
+    """
+    h = hashlib.sha1(extra.encode())
+    for file_path in file_paths:
+        with open(file_path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load_manifest(plots_dir, version):
+    """
+    Load the build manifest from the plots directory.
+    A manifest written by a different code or style version is discarded.
+
+    Args:
+        plots_dir: Directory containing the outputs and the manifest
+        version: Current code and style version
+
+    Returns:
+        Manifest dict with keys: version, inputs, outputs, metrics_rows, trendlines
+    """
+    manifest_path = os.path.join(plots_dir, MANIFEST_NAME)
+    empty = {'version': version, 'inputs': {}, 'outputs': {}, 'metrics_rows': {}, 'trendlines': {}}
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+
+    if manifest.get('version') != version:
+        return empty
+    for key, value in empty.items():
+        manifest.setdefault(key, value)
+    return manifest
+
+
+def save_manifest(plots_dir, manifest):
+    """Write the build manifest atomically to the plots directory."""
+    manifest_path = os.path.join(plots_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def input_digest(manifest, file_path):
+    """
+    Get the content hash of an input file.
+    The hash is only recomputed when the size or mtime recorded in the
+    manifest no longer match the file.
+
+    Args:
+        manifest: Manifest dict (updated in place)
+        file_path: Path to the input file
+
+    Returns:
+        Hex digest string
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    entry = manifest['inputs'].get(abs_path)
+
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha1']
+
+    with open(abs_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    manifest['inputs'][abs_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': digest}
+    return digest
+
+
+def is_up_to_date(manifest, output_path, inputs):
+    """
+    Check whether an output exists and was built from the given inputs.
+    The output's mtime must also match the recorded one, so an output that was
+    rewritten or deleted outside a recorded build is rebuilt.
+
+    Args:
+        manifest: Manifest dict
+        output_path: Path to the output file
+        inputs: Dict mapping input path to content hash
+
+    Returns:
+        True if the output does not need to be rebuilt
+    """
+    entry = manifest['outputs'].get(os.path.abspath(output_path))
+    if entry is None or entry['inputs'] != inputs:
+        return False
+    try:
+        return os.stat(output_path).st_mtime_ns == entry['mtime_ns']
+    except OSError:
+        return False
+
+
+def record_output(manifest, output_path, inputs):
+    """Record that an output was built from the given inputs (dict of path to hash)."""
+    manifest['outputs'][os.path.abspath(output_path)] = {
+        'inputs': dict(inputs),
+        'mtime_ns': os.stat(output_path).st_mtime_ns
+    }
@@ -0,0 +1,167 @@
+import os
+import shutil
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:
+    pa = None
+
+
+# Partition columns of the exported tables and their types (hive layout, e.g.
+# curves/kind=sweep/process=tt/vdd=1/temperature=27/part-0.parquet)
+PARTITIONS = {
+    'curves': [('kind', 'string'), ('process', 'string'), ('vdd', 'float64'), ('temperature', 'float64')],
+    'metrics': [('process', 'string')],
+}
+
+# Numeric metric columns (pvt_metrics.compute_pvt_metrics) and their exported names
+METRIC_COLUMNS = {'Process': 'process', 'V_DD': 'vdd', 'Temp': 'temperature', 'I_in': 'iin',
+                  'V_out,min': 'vout_min', 'Power': 'power'}
+
+FILE_FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+
+
+def require_pyarrow():
+    """Raise an ImportError with install instructions if pyarrow is missing."""
+    if pa is None:
+        raise ImportError("The columnar export needs pyarrow, install it with: pip install pyarrow")
+
+
+def curve_table(process, vdd, temperature, kind, iin, vout, i_out):
+    """
+    Build the long table of one corner's curves (one row per point).
+
+    Args:
+        process: Process corner (ss, tt, ff)
+        vdd: Supply voltage in V
+        temperature: Temperature in °C
+        kind: 'sweep' for a voltage sweep file, 'iin' for an _Iin file
+        iin: Array of input currents in A (per experiment for sweeps, swept for _Iin)
+        vout: Array of output voltages in V (NaN where the file does not sweep it)
+        i_out: Array of output currents in A
+
+    Returns:
+        pyarrow Table with columns kind, process, vdd, temperature, iin, vout, i_out
+    """
+    require_pyarrow()
+    n = len(i_out)
+    return pa.table({
+        'kind': pa.array([kind] * n, pa.string()),
+        'process': pa.array([process] * n, pa.string()),
+        'vdd': pa.array(np.full(n, vdd, dtype=np.float64)),
+        'temperature': pa.array(np.full(n, temperature, dtype=np.float64)),
+        'iin': pa.array(np.asarray(iin, dtype=np.float64)),
+        'vout': pa.array(np.asarray(vout, dtype=np.float64)),
+        'i_out': pa.array(np.asarray(i_out, dtype=np.float64)),
+    })
+
+
+def metrics_table(df):
+    """
+    Convert a numeric metrics DataFrame (SI units) to a pyarrow Table with snake_case columns.
+    The I_out columns are named like i_out_at_0.9v.
+
+    Args:
+        df: Numeric DataFrame from pvt_metrics.compute_pvt_metrics
+
+    Returns:
+        pyarrow Table
+    """
+    require_pyarrow()
+    columns = {}
+    for name in df.columns:
+        if name in METRIC_COLUMNS:
+            key = METRIC_COLUMNS[name]
+        else:
+            key = name.lower().replace('i_out @ v_out=', 'i_out_at_')
+        columns[key] = df[name].str.lower() if name == 'Process' else df[name]
+    return pa.Table.from_pydict({key: pa.array(values) for key, values in columns.items()})
+
+
+def get_partitioning(name):
+    """Get the hive partitioning of an exported table ('curves' or 'metrics')."""
+    return ds.partitioning(pa.schema(PARTITIONS[name]), flavor='hive')
+
+
+def write_partitioned(table, root, name, file_format='parquet'):
+    """
+    Write a table as a hive-partitioned dataset, replacing an existing one at root.
+
+    Args:
+        table: pyarrow Table
+        root: Directory of the dataset
+        name: 'curves' or 'metrics' (selects the partition columns)
+        file_format: 'parquet' (compressed) or 'arrow' (uncompressed IPC, zero-copy memory-mapping)
+    """
+    require_pyarrow()
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+
+    ds.write_dataset(table, root, format=FILE_FORMATS[file_format], partitioning=get_partitioning(name),
+                     basename_template='part-{i}.' + file_format)
+
+
+def export_tables(export_dir, curves, metrics, file_format='parquet'):
+    """
+    Write the curve and metric tables below export_dir (curves/ and metrics/).
+
+    Args:
+        export_dir: Output directory
+        curves: List of tables from curve_table
+        metrics: Table from metrics_table (or None)
+        file_format: 'parquet' or 'arrow'
+
+    Returns:
+        Number of curve rows written
+    """
+    require_pyarrow()
+    sort_keys = [name for name, _ in PARTITIONS['curves']] + ['iin', 'vout']
+    table = pa.concat_tables(curves).sort_by([(name, 'ascending') for name in sort_keys])
+    write_partitioned(table, os.path.join(export_dir, 'curves'), 'curves', file_format)
+    if metrics is not None:
+        write_partitioned(metrics, os.path.join(export_dir, 'metrics'), 'metrics', file_format)
+    return table.num_rows
+
+
+def open_dataset(export_dir, name='curves'):
+    """
+    Open an exported table as a pyarrow Dataset (nothing is read yet).
+    Files are memory-mapped, so filters and column selections only touch the
+    parts of the files they need; with the 'arrow' format the columns are
+    used without copying.
+
+    Args:
+        export_dir: Directory written by export_tables
+        name: 'curves' or 'metrics'
+
+    Returns:
+        pyarrow.dataset.Dataset
+    """
+    require_pyarrow()
+    root = os.path.join(export_dir, name)
+    file_format = 'ipc' if any(f.endswith('.arrow') for _, _, files in os.walk(root) for f in files) else 'parquet'
+    return ds.dataset(root, format=file_format, partitioning=get_partitioning(name),
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def read_table(export_dir, name='curves', columns=None, filter=None):
+    """
+    Read (part of) an exported table.
+
+    Example:
+        read_table('plots/dataset', filter=(ds.field('process') == 'tt') & (ds.field('iin') == 40e-6))
+
+    Args:
+        export_dir: Directory written by export_tables
+        name: 'curves' or 'metrics'
+        columns: Optional list of columns to read
+        filter: Optional pyarrow.dataset expression
+
+    Returns:
+        pyarrow Table (use .to_pandas() for a DataFrame)
+    """
+    return open_dataset(export_dir, name).to_table(columns=columns, filter=filter)
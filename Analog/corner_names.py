@@ -0,0 +1,129 @@
+import os
+import re
+
+
+# File name grammar of the result files, e.g. tt_01_27 and tt_01_27_Iin. Needs the
+# named groups process, voltage_offset, temperature and iin (the _Iin suffix).
+DEFAULT_NAME_PATTERN = r'^(?P<process>[a-z]{2})_(?P<voltage_offset>01|0|10)_(?P<temperature>-?\d+)(?P<iin>_Iin)?$'
+NAME_PATTERN_GROUPS = ('process', 'voltage_offset', 'temperature', 'iin')
+
+# Supply voltage in V of each voltage offset code in the file names
+DEFAULT_VDD_CODES = {'01': 0.9, '0': 1.0, '10': 1.1}
+
+_name_pattern = re.compile(DEFAULT_NAME_PATTERN)
+_vdd_codes = dict(DEFAULT_VDD_CODES)
+
+
+def set_name_pattern(pattern, vdd_codes=None):
+    """
+    Set the file name grammar used by find_result_files and parse_filename.
+    
+    Args:
+        pattern: Regular expression with the groups in NAME_PATTERN_GROUPS
+        vdd_codes: Optional dict of voltage offset code to supply voltage in V
+            (see get_vdd_numeric), needed when the pattern allows other codes
+    """
+    global _name_pattern, _vdd_codes
+    compiled = re.compile(pattern)
+    missing = [name for name in NAME_PATTERN_GROUPS if name not in compiled.groupindex]
+    if missing:
+        raise ValueError(f"File name pattern needs the named groups: {', '.join(missing)}")
+    _name_pattern = compiled
+    if vdd_codes is not None:
+        _vdd_codes = dict(vdd_codes)
+
+
+def get_name_settings():
+    """
+    Get the current file name grammar, e.g. to pass it on to worker processes.
+    
+    Returns:
+        Tuple of (pattern, vdd_codes) as accepted by set_name_pattern
+    """
+    return _name_pattern.pattern, dict(_vdd_codes)
+
+
+def parse_vdd_codes(items):
+    """
+    Parse voltage offset codes given as CODE=VOLTS, e.g. ["m5=0.95", "p5=1.05"].
+    
+    Returns:
+        Dict of code to supply voltage in V
+    """
+    codes = {}
+    for item in items:
+        code, sep, volts = item.partition('=')
+        if not sep or not code:
+            raise ValueError(f"expected CODE=VOLTS, got '{item}'")
+        codes[code] = float(volts)
+    return codes
+
+
+def find_unknown_vdd_codes(file_paths):
+    """Get the voltage offset codes of the files that get_vdd_numeric does not know, sorted."""
+    codes = {parse_filename(file_path)[1] for file_path in file_paths}
+    return sorted(code for code in codes if code is not None and code not in _vdd_codes)
+
+
+def corner_selected(process, voltage_offset, temperature, filters=None):
+    """
+    Check whether a corner passes the filters.
+    
+    Args:
+        process: Process type (ss, tt, ff)
+        voltage_offset: Voltage offset (0, 01, 10)
+        temperature: Temperature (string)
+        filters: Optional dict with lists of accepted values under the keys
+            process, voltage_offset and temperature (numbers, missing or empty accepts all)
+        
+    Returns:
+        True if the corner is selected
+    """
+    if not filters:
+        return True
+    if filters.get('process') and process not in filters['process']:
+        return False
+    if filters.get('voltage_offset') and voltage_offset not in filters['voltage_offset']:
+        return False
+    if filters.get('temperature') and float(temperature) not in filters['temperature']:
+        return False
+    return True
+
+
+def parse_filename(file_path):
+    """
+    Parse filename to extract process, voltage offset, and temperature.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Tuple of (process, voltage_offset, temperature, is_iin)
+    """
+    filename = os.path.basename(file_path)
+    match = _name_pattern.match(filename)
+    
+    if match:
+        return (match.group('process'), match.group('voltage_offset'), match.group('temperature'),
+                bool(match.group('iin')))
+    return None, None, None, '_Iin' in filename
+
+
+def get_vdd_value(voltage_offset):
+    """Convert voltage offset string to actual V_DD value, e.g. "0.9V" (see get_vdd_numeric)."""
+    v = get_vdd_numeric(voltage_offset)
+    return f"{v:.1f}V" if round(v, 1) == v else f"{v:g}V"
+
+
+def get_vdd_numeric(voltage_offset):
+    """
+    Convert voltage offset string to numeric V_DD value (see set_name_pattern for other codes).
+    
+    Raises:
+        ValueError: If the code has no supply voltage
+    """
+    try:
+        return _vdd_codes[voltage_offset]
+    except KeyError:
+        raise ValueError(f"No supply voltage for voltage offset '{voltage_offset}' "
+                         f"(known: {', '.join(_vdd_codes)})") from None
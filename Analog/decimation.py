@@ -0,0 +1,117 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+def axes_pixel_width(ax):
+    """
+    Get the width in pixels of an axes in the saved figure.
+    Uses the savefig DPI, since that is the resolution the lines end up at.
+
+    Args:
+        ax: Matplotlib axes (no artists needed)
+
+    Returns:
+        Width in pixels (at least 1)
+    """
+    fig = ax.get_figure()
+    dpi = plt.rcParams['savefig.dpi']
+    if not isinstance(dpi, (int, float)):
+        dpi = fig.dpi  # 'figure' means the figure DPI
+    return max(1, int(ax.get_position().width * fig.get_figwidth() * dpi))
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Get the indices of the samples minmax_decimate keeps.
+    The samples are split into n_buckets equal index ranges and the lowest
+    and highest sample of each range are kept, plus the first and last sample.
+
+    Args:
+        y: Array of y values
+        n_buckets: Number of buckets, normally the pixel width of the axes
+
+    Returns:
+        Sorted index array with at most 2 * n_buckets + 2 entries
+        (all indices if the input is already that small)
+    """
+    y = np.asarray(y)
+    n = len(y)
+    if n <= 2 * n_buckets + 2:
+        return np.arange(n)
+
+    # Equal sized buckets, the last one padded by repeating the final sample
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    idx = np.minimum(np.arange(n_buckets * size), n - 1).reshape(n_buckets, size)
+    buckets = y[idx]
+
+    # NaN-safe: a bucket that is all NaN keeps its first sample so gaps stay visible
+    filled_lo = np.where(np.isnan(buckets), np.inf, buckets)
+    filled_hi = np.where(np.isnan(buckets), -np.inf, buckets)
+    offsets = np.arange(n_buckets) * size
+    i_min = offsets + filled_lo.argmin(axis=1)
+    i_max = offsets + filled_hi.argmax(axis=1)
+
+    return np.unique(np.concatenate(([0, n - 1], np.minimum(i_min, n - 1), np.minimum(i_max, n - 1))))
+
+
+def minmax_decimate(x, y, n_buckets):
+    """
+    Reduce a curve to the minimum and maximum of every pixel column.
+    The samples are split into n_buckets equal index ranges and only the
+    lowest and highest sample of each range are kept (in their original
+    order, plus the first and last sample). Drawn at n_buckets pixels wide
+    the result looks the same as the full curve, so peaks, glitches and knees
+    are never averaged away. Runs in O(n) with no Python loop over samples.
+
+    Args:
+        x: Array of x values (sorted, e.g. a sweep)
+        y: Array of y values, same length as x
+        n_buckets: Number of buckets, normally the pixel width of the axes
+
+    Returns:
+        Tuple of (x, y) with at most 2 * n_buckets + 2 points;
+        the input is returned unchanged if it is already that small
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= 2 * n_buckets + 2:
+        return x, y
+    keep = minmax_indices(y, n_buckets)
+    return x[keep], y[keep]
+
+
+def decimate_for_axes(ax, x, y):
+    """
+    Decimate a curve to the pixel width of the axes it will be drawn in.
+    Call before creating the line artist.
+
+    Args:
+        ax: Matplotlib axes
+        x: Array of x values
+        y: Array of y values
+
+    Returns:
+        Tuple of (x, y) to plot
+    """
+    return minmax_decimate(x, y, axes_pixel_width(ax))
+
+
+def decimate_band_for_axes(ax, x, lower, upper):
+    """
+    Decimate a band (the area between two curves) to the pixel width of the
+    axes, like decimate_for_axes. The extremes of both edges are kept on one
+    shared set of x values, as fill_between needs.
+
+    Args:
+        ax: Matplotlib axes
+        x: Array of x values
+        lower: Array of lower edge values
+        upper: Array of upper edge values
+
+    Returns:
+        Tuple of (x, lower, upper) to fill
+    """
+    n_buckets = axes_pixel_width(ax)
+    keep = np.union1d(minmax_indices(lower, n_buckets), minmax_indices(upper, n_buckets))
+    return np.asarray(x)[keep], np.asarray(lower)[keep], np.asarray(upper)[keep]
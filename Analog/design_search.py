@@ -0,0 +1,361 @@
+import argparse
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import mirror_solver
+from simulate_corners import (PROCESSES, VOLTAGE_OFFSETS, TEMPERATURES, make_netlist, set_params, simulate,
+                              netlist_hash, format_spice_value)
+from plotting import get_vdd_numeric, get_iin_values, read_and_split_data
+from pvt_metrics import build_pvt_tensor, compute_pvt_metrics
+
+
+# Searched values of the tx.cir .param line: (lowest, highest, step). Proposals are
+# rounded to the step, so nearby proposals share evaluations.
+PARAMETER_SPACE = {
+    'length': (0.18e-6, 0.5e-6, 0.01e-6),
+    'width': (1e-6, 5e-6, 0.05e-6),
+    'scale': (1.0, 5.0, 0.25),
+    'size': (2.0, 30.0, 1.0),
+}
+
+# I_out @ 0.9 V may deviate this much from I_in before a design is penalized
+MAX_CURRENT_ERROR = 0.01
+
+
+def quantize(params):
+    """Round a parameter set to the grid of PARAMETER_SPACE (and clip it to the bounds)."""
+    design = {}
+    for name, (low, high, step) in PARAMETER_SPACE.items():
+        value = low + round((params[name] - low) / step) * step
+        design[name] = float(f"{min(max(value, low), high):.6g}")
+    return design
+
+
+def random_design(rng):
+    """Draw a parameter set uniformly from PARAMETER_SPACE."""
+    return quantize({name: rng.uniform(low, high) for name, (low, high, _) in PARAMETER_SPACE.items()})
+
+
+def mutate(design, rng, radius):
+    """
+    Propose a neighbour of a design.
+
+    Args:
+        design: Parameter set
+        rng: NumPy random generator
+        radius: Standard deviation of the move as a fraction of each parameter's range
+
+    Returns:
+        Quantized parameter set
+    """
+    return quantize({name: design[name] + rng.normal(0, radius * (high - low))
+                     for name, (low, high, _) in PARAMETER_SPACE.items()})
+
+
+def format_params(design):
+    """Format a parameter set as a tx.cir .param line."""
+    return '.param ' + ' '.join(f"{name}={format_spice_value(design[name])}" for name in design)
+
+
+def design_key(design):
+    """Get a hashable key of a parameter set."""
+    return tuple(sorted(design.items()))
+
+
+class ModelEvaluator:
+    """
+    Evaluate designs with the NumPy mirror model (mirror_solver.py).
+    All missing pairs of one search iteration are solved in one batch,
+    split over jobs processes.
+    """
+
+    def __init__(self, template_path, jobs=1):
+        self.model_dir = os.path.dirname(os.path.abspath(template_path))
+        self.vout, self.iin = mirror_solver.default_sweeps(template_path)
+        self.jobs = jobs
+        # Results change with the solver code, so it is part of the cache key
+        with open(mirror_solver.__file__, 'rb') as f:
+            self.identity = 'model:' + hashlib.sha1(f.read()).hexdigest()
+
+    def evaluate(self, pairs):
+        """
+        Evaluate (design, corner) pairs.
+        The model solves every design at every corner of the batch, which
+        costs little compared to calling it per pair.
+
+        Args:
+            pairs: List of (design, corner) where corner is (process, voltage_offset, temperature)
+
+        Returns:
+            List of (sweep_values, currents) in the order of pairs
+        """
+        designs = list({design_key(design): design for design, _ in pairs}.values())
+        corners = list(dict.fromkeys(corner for _, corner in pairs))
+
+        chunks = np.array_split(np.arange(len(designs)), min(self.jobs, len(designs)))
+        args = [([designs[k] for k in chunk], corners, self.vout, self.iin, self.model_dir) for chunk in chunks]
+        if len(args) == 1:
+            currents = solve_designs(*args[0])
+        else:
+            with ProcessPoolExecutor(max_workers=len(args)) as executor:
+                currents = np.concatenate(list(executor.map(solve_designs, *zip(*args))))
+
+        design_index = {design_key(design): k for k, design in enumerate(designs)}
+        return [(self.vout, currents[design_index[design_key(design)], corners.index(corner)])
+                for design, corner in pairs]
+
+
+def solve_designs(designs, corners, vout, iin, model_dir):
+    """Solve a list of designs at all corners with mirror_solver (runs in a worker process)."""
+    geometry = {name: np.array([design[name] for design in designs]) for name in PARAMETER_SPACE}
+    numeric_corners = [(process, get_vdd_numeric(voltage_offset), float(temperature))
+                       for process, voltage_offset, temperature in corners]
+    return mirror_solver.solve_mirror(geometry, numeric_corners, vout, iin, model_dir=model_dir)
+
+
+class SpiceEvaluator:
+    """
+    Evaluate designs with a circuit simulator (see simulate_corners.simulate),
+    one netlist per (design, corner) pair on a pool of jobs workers.
+    """
+
+    def __init__(self, template_path, simulator='ngspice', jobs=1):
+        self.model_dir = os.path.dirname(os.path.abspath(template_path))
+        self.simulator = simulator
+        self.jobs = jobs
+        self.identity = 'spice:' + simulator
+        with open(template_path) as f:
+            self.template = f.read()
+
+    def evaluate_pair(self, design, corner):
+        """Simulate one design at one corner and read the result like read_and_split_data."""
+        netlist = make_netlist(set_params(self.template, design), *corner)
+        with tempfile.TemporaryDirectory(prefix='design_') as work_dir:
+            output_path = os.path.join(work_dir, 'result')
+            simulate(netlist, output_path, self.model_dir, self.simulator)
+            return read_and_split_data(output_path, use_cache=False)
+
+    def evaluate(self, pairs):
+        """
+        Evaluate (design, corner) pairs.
+
+        Args:
+            pairs: List of (design, corner) where corner is (process, voltage_offset, temperature)
+
+        Returns:
+            List of (sweep_values, currents) in the order of pairs
+        """
+        # Simulations are external processes, so threads are enough to keep them busy
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(lambda pair: self.evaluate_pair(*pair), pairs))
+
+
+class EvaluationCache:
+    """
+    Disk memo of evaluations, one .npy file per (evaluator, design, corner).
+    The key hashes the corner netlist of the design (with the model files it
+    includes) and the evaluator identity, so a changed template, model card or
+    solver never matches an old entry.
+    """
+
+    def __init__(self, cache_dir, template_path):
+        self.cache_dir = cache_dir
+        self.model_dir = os.path.dirname(os.path.abspath(template_path))
+        with open(template_path) as f:
+            self.template = f.read()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, evaluator, design, corner):
+        """Get the cache key of a design at a corner."""
+        netlist = make_netlist(set_params(self.template, design), *corner)
+        return netlist_hash(netlist, self.model_dir, evaluator.identity)
+
+    def load(self, key):
+        """
+        Load an evaluation.
+
+        Returns:
+            Tuple of (sweep_values, currents), or None on a miss
+        """
+        try:
+            data = np.load(os.path.join(self.cache_dir, key + '.npy'))
+        except (OSError, ValueError):
+            return None
+        return data[0], data[1:]
+
+    def store(self, key, sweep_values, currents):
+        """Store an evaluation (the first row holds the sweep values)."""
+        cache_path = os.path.join(self.cache_dir, key + '.npy')
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.vstack([sweep_values, currents]))
+        os.replace(tmp_path, cache_path)
+
+
+def evaluate_designs(designs, corners, evaluator, cache):
+    """
+    Evaluate designs at all corners, only calling the evaluator for pairs missing from the cache.
+
+    Args:
+        designs: List of parameter sets
+        corners: List of (process, voltage_offset, temperature) tuples
+        evaluator: ModelEvaluator, SpiceEvaluator or any object with identity and evaluate(pairs)
+        cache: EvaluationCache
+
+    Returns:
+        Tuple of (results, n_evaluated, n_cached) where results maps design_key
+        to a list of (corner, sweep_values, currents)
+    """
+    results = {design_key(design): [] for design in designs}
+    missing = {}
+    n_cached = 0
+    for design in designs:
+        for corner in corners:
+            key = cache.key(evaluator, design, corner)
+            cached = cache.load(key)
+            if cached is not None:
+                results[design_key(design)].append((corner, *cached))
+                n_cached += 1
+            else:
+                missing.setdefault(key, (design, corner))
+
+    pairs = list(missing.values())
+    if pairs:
+        for key, (design, corner), (sweep_values, currents) in zip(missing, pairs, evaluator.evaluate(pairs)):
+            cache.store(key, sweep_values, currents)
+            results[design_key(design)].append((corner, sweep_values, currents))
+
+    return results, len(pairs), n_cached
+
+
+def score_design(corner_results, max_error=MAX_CURRENT_ERROR):
+    """
+    Score a design with the metrics of generate_metrics_table (lower is better).
+    The score is the worst-case V_out,min over all corners and input
+    currents, plus 1 V per percent that the worst I_out @ 0.9 V deviates from
+    I_in beyond max_error.
+
+    Args:
+        corner_results: List of (corner, sweep_values, currents) of one design
+        max_error: Allowed relative error of I_out @ 0.9 V
+
+    Returns:
+        Dict with keys V_out,min, I_out error, Power (all worst case) and Score
+    """
+    corners = [(process, get_vdd_numeric(voltage_offset), float(temperature), sweep_values, currents)
+               for (process, voltage_offset, temperature), sweep_values, currents in corner_results]
+    iin_values = get_iin_values(max(len(c[4]) for c in corners))
+    axes, sweep, tensor = build_pvt_tensor(corners, iin_values)
+    df = compute_pvt_metrics(axes, sweep, tensor, target_voltages=(0.9,))
+
+    v_out_min = df['V_out,min'].max()
+    error = (np.abs(df['I_out @ V_out=0.9V'] - df['I_in']) / df['I_in']).max()
+    return {
+        'V_out,min': v_out_min,
+        'I_out error': error,
+        'Power': df['Power'].max(),
+        'Score': v_out_min + 100 * max(0.0, error - max_error),
+    }
+
+
+def rank(row):
+    """Sort key of a scored design: score, then the I_out error (V_out,min is on the sweep grid)."""
+    return row['Score'], row['I_out error']
+
+
+def search(evaluator, corners, cache, start, iterations=5, population=32, seed=0, max_error=MAX_CURRENT_ERROR):
+    """
+    Search the parameter space for a low worst-case V_out,min.
+    The first iteration evaluates the start design and random designs, every
+    later one mutates the best quarter of all designs so far with a shrinking
+    radius. Designs that were already scored are never proposed again.
+
+    Args:
+        evaluator: ModelEvaluator or SpiceEvaluator
+        corners: List of (process, voltage_offset, temperature) tuples
+        cache: EvaluationCache
+        start: Parameter set to start from (e.g. the .param line of tx.cir)
+        iterations: Number of search iterations
+        population: Designs proposed per iteration
+        seed: Seed of the proposals
+        max_error: Allowed relative error of I_out @ 0.9 V (see score_design)
+
+    Returns:
+        DataFrame with one row per scored design, best first
+    """
+    rng = np.random.default_rng(seed)
+    scored = {}
+    proposals = [quantize(start)] + [random_design(rng) for _ in range(population - 1)]
+
+    for iteration in range(iterations):
+        designs = list({design_key(d): d for d in proposals if design_key(d) not in scored}.values())
+        if not designs:
+            print(f"Iteration {iteration + 1}: no new designs, stopping")
+            break
+
+        results, n_evaluated, n_cached = evaluate_designs(designs, corners, evaluator, cache)
+        for design in designs:
+            scored[design_key(design)] = {**design, **score_design(results[design_key(design)], max_error)}
+
+        ranked = sorted(scored.values(), key=rank)
+        print(f"Iteration {iteration + 1}: {len(designs)} designs, {n_evaluated} evaluated, {n_cached} cached, "
+              f"best V_out,min = {ranked[0]['V_out,min']:.3f} V")
+
+        parents = ranked[:max(1, population // 4)]
+        radius = 0.2 * 0.6 ** iteration
+        proposals = [mutate(parents[k % len(parents)], rng, radius) for k in range(population)]
+
+    return pd.DataFrame(sorted(scored.values(), key=rank))
+
+
+def main():
+    """Search the tx.cir parameters and write all scored designs to a CSV file."""
+    current_path = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Search the .param values of tx.cir over all PVT corners.")
+    parser.add_argument('--evaluator', choices=['model', 'spice'], default='model',
+                        help="NumPy mirror model (fast pre-screening) or a circuit simulator")
+    parser.add_argument('--simulator', default='ngspice',
+                        help="For --evaluator spice: 'ngspice', 'stub' or a command using {netlist}, {output} "
+                             "and {model_dir}")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--population', type=int, default=32, help="Designs proposed per iteration")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-error', type=float, default=MAX_CURRENT_ERROR,
+                        help="Allowed relative error of I_out @ 0.9 V")
+    parser.add_argument('--process', nargs='+', default=PROCESSES)
+    parser.add_argument('--vdd', nargs='+', default=VOLTAGE_OFFSETS, help="Voltage offsets, e.g. 01 0 10")
+    parser.add_argument('--temp', nargs='+', default=TEMPERATURES)
+    parser.add_argument('--template', default=os.path.join(current_path, 'tx.cir'))
+    parser.add_argument('--cache-dir', default=os.path.join(current_path, 'design_cache'))
+    parser.add_argument('-o', '--output', default=os.path.join(current_path, 'plots', 'design_search.csv'))
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.evaluator == 'model':
+        evaluator = ModelEvaluator(args.template, args.jobs)
+    else:
+        evaluator = SpiceEvaluator(args.template, args.simulator, args.jobs)
+    cache = EvaluationCache(args.cache_dir, args.template)
+    corners = [(p, v, t) for p in args.process for v in args.vdd for t in args.temp]
+    start = {name: value for name, value in mirror_solver.read_params(args.template).items()
+             if name in PARAMETER_SPACE}
+
+    print(f"Searching over {len(corners)} corners with the {args.evaluator} evaluator")
+    df = search(evaluator, corners, cache, start, args.iterations, args.population, args.seed, args.max_error)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    df.to_csv(args.output, index=False)
+    print(f"\nScored {len(df)} designs, saved to: {args.output}")
+    print(df.head(5).to_string(index=False))
+    print(f"\nBest design: {format_params({name: df.iloc[0][name] for name in PARAMETER_SPACE})}")
+
+
+if __name__ == "__main__":
+    main()
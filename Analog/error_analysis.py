@@ -0,0 +1,144 @@
+import numpy as np
+
+
+# Degree of the polynomial trendline fitted to |Iin - Iout|
+DEFAULT_DEGREE = 2
+
+
+def stack_iin_curves(curves):
+    """
+    Stack the curves of several _Iin files that share one input current grid.
+    Curves are never resampled: np.interp would hold the end values outside a
+    curve's range and make up flat segments (see group_iin_curves).
+
+    Args:
+        curves: List of (sweep_current, id_current) array pairs
+
+    Returns:
+        Tuple of (sweep, i_out) where sweep has shape (n_points,) and
+        i_out has shape (n_curves, n_points)
+
+    Raises:
+        ValueError: If the curves are sampled on different grids
+    """
+    if not curves:
+        return np.empty(0), np.empty((0, 0))
+
+    sweep = np.asarray(curves[0][0], dtype=np.float64)
+    i_out = np.empty((len(curves), len(sweep)))
+    for row, (sweep_current, id_current) in zip(i_out, curves):
+        if len(sweep_current) != len(sweep) or not np.array_equal(sweep_current, sweep):
+            raise ValueError("_Iin curves are sampled on different input current grids")
+        row[:] = id_current
+    return sweep, i_out
+
+
+def group_iin_curves(curves):
+    """
+    Group curves by their input current grid and stack each group, so every
+    curve is fitted and evaluated on its own samples. In the usual case of one
+    shared sweep this is a single group.
+
+    Args:
+        curves: List of (sweep_current, id_current) array pairs
+
+    Returns:
+        List of (indices, sweep, i_out): the positions of the group's curves
+        in the input list and their stacked arrays (see stack_iin_curves)
+    """
+    groups = {}
+    for k, (sweep_current, _) in enumerate(curves):
+        key = np.asarray(sweep_current, dtype=np.float64).tobytes()
+        groups.setdefault(key, []).append(k)
+    return [(indices,) + stack_iin_curves([curves[k] for k in indices]) for indices in groups.values()]
+
+
+def current_errors(sweep, i_out):
+    """Absolute error |Iin - Iout| of every curve, shape (n_curves, n_points)."""
+    return np.abs(sweep - i_out)
+
+
+def fit_polynomials(x, y, degree=DEFAULT_DEGREE):
+    """
+    Fit a polynomial to every row of y with one least-squares solve.
+    x is mapped to [-1, 1] first, which keeps the solve well conditioned for
+    currents in the µA range.
+
+    Args:
+        x: Array of x values, shape (n_points,)
+        y: Array of curves, shape (n_curves, n_points)
+        degree: Polynomial degree
+
+    Returns:
+        Tuple of (coefficients, center, half_range) where coefficients has
+        shape (n_curves, degree + 1), highest power first, in the mapped x
+    """
+    x = np.asarray(x, dtype=np.float64)
+    center = (x.max() + x.min()) / 2
+    half_range = (x.max() - x.min()) / 2 or 1.0
+
+    vander = np.vander((x - center) / half_range, degree + 1)
+    coefficients, _, _, _ = np.linalg.lstsq(vander, np.asarray(y, dtype=np.float64).T, rcond=None)
+    return coefficients.T, center, half_range
+
+
+def evaluate_polynomials(fit, x):
+    """
+    Evaluate the polynomials from fit_polynomials.
+
+    Args:
+        fit: Tuple returned by fit_polynomials
+        x: Array of x values, shape (n_x,)
+
+    Returns:
+        Array of shape (n_curves, n_x)
+    """
+    coefficients, center, half_range = fit
+    vander = np.vander((np.asarray(x, dtype=np.float64) - center) / half_range, coefficients.shape[1])
+    return coefficients @ vander.T
+
+
+def fit_error_trendlines(sweep, errors, degree=DEFAULT_DEGREE, n_points=200):
+    """
+    Fit the trendline of every error curve and sample it on a smooth grid.
+
+    Args:
+        sweep: Array of input currents, shape (n_points,)
+        errors: Array of errors, shape (n_curves, n_points)
+        degree: Polynomial degree of the trendlines
+        n_points: Number of points on the smooth trendlines
+
+    Returns:
+        Tuple of (sweep_smooth, trendlines) with shapes (n_points,) and (n_curves, n_points)
+    """
+    sweep_smooth = np.linspace(sweep.min(), sweep.max(), n_points)
+    return sweep_smooth, evaluate_polynomials(fit_polynomials(sweep, errors, degree), sweep_smooth)
+
+
+def errors_at(sweep, i_out, targets):
+    """
+    Get |Iin - Iout| and the error in percent at a vector of target input currents.
+    Uses the sample closest to each target (the lower one on a tie).
+
+    Args:
+        sweep: Array of input currents (increasing), shape (n_points,)
+        i_out: Array of output currents, shape (n_curves, n_points)
+        targets: Array of target input currents, shape (n_targets,)
+
+    Returns:
+        Tuple of (abs_error, percent_error), both of shape (n_curves, n_targets);
+        the percent error is 0 where the input current is ~0
+    """
+    targets = np.atleast_1d(np.asarray(targets, dtype=np.float64))
+    last = len(sweep) - 1
+
+    hi = np.clip(np.searchsorted(sweep, targets), 0, last)
+    lo = np.clip(hi - 1, 0, last)
+    idx = np.where(np.abs(sweep[lo] - targets) <= np.abs(sweep[hi] - targets), lo, hi)
+
+    i_in = sweep[idx]
+    difference = i_in - i_out[:, idx]
+    valid = np.abs(i_in) > 1e-10  # Avoid division by zero
+    ratio = np.divide(difference, i_in, out=np.zeros_like(difference), where=valid)
+    abs_error, percent_error = np.abs(difference), np.abs(ratio) * 100
+    return abs_error, percent_error
@@ -0,0 +1,209 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+
+# inotify event flags (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    Watch a directory with Linux inotify (through libc, no extra packages).
+    Reports a file when its writer closes it or when it is moved in or
+    deleted, so files that are still being written are not reported.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Directory to watch (not recursive)
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        libc_name = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is None or not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+
+    def poll(self, timeout):
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            Set of file names that were completely written, moved in or removed
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                # IN_MODIFY/IN_CREATE only mean "being written"; wait for the close
+                if name and mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                    names.add(name)
+        return names
+
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Watch a directory by comparing the size and mtime of its files.
+    A file is only reported once it has not changed for settle seconds, so
+    files that are still being written are not reported.
+    """
+
+    def __init__(self, directory, interval=1.0, settle=1.0):
+        """
+        Args:
+            directory: Directory to watch (not recursive)
+            interval: Seconds between scans
+            settle: Seconds a file must stay unchanged before it is reported
+        """
+        self.directory = directory
+        self.interval = interval
+        self.settle = settle
+        self.known = self.scan()
+        self.pending = {}  # name -> (stat, time the stat was first seen)
+
+    def scan(self):
+        """Get (size, mtime_ns) of every file in the directory."""
+        state = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    state[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def poll(self, timeout):
+        """
+        Wait up to timeout seconds for files to change and settle.
+
+        Returns:
+            Set of file names that changed (and settled) or were removed
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            state = self.scan()
+            names = {name for name in self.known if name not in state}
+
+            for name, stat in state.items():
+                if self.known.get(name) == stat:
+                    self.pending.pop(name, None)
+                elif name not in self.pending or self.pending[name][0] != stat:
+                    self.pending[name] = (stat, now)
+                elif now - self.pending[name][1] >= self.settle:
+                    names.add(name)
+                    self.known[name] = stat
+                    del self.pending[name]
+
+            for name in names:
+                if name not in state:
+                    self.known.pop(name, None)
+                    self.pending.pop(name, None)
+
+            if names or now >= deadline:
+                return names
+            time.sleep(min(self.interval, max(0.0, deadline - now)))
+
+    def close(self):
+        """Stop watching."""
+
+
+def make_watcher(directory, polling=False, interval=1.0):
+    """
+    Create an inotify watcher, falling back to polling where inotify is not available.
+
+    Args:
+        directory: Directory to watch
+        polling: Always use the polling watcher
+        interval: Seconds between scans of the polling watcher
+
+    Returns:
+        InotifyWatcher or PollingWatcher
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, interval=interval, settle=interval)
+
+
+def is_write_complete(file_path):
+    """Check that a result file exists, is not empty and ends with a complete line."""
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    except OSError:
+        return False
+
+
+def wait_for_changes(watcher, debounce=1.0, timeout=None):
+    """
+    Wait for a burst of changes to end.
+    Returns once at least one file changed and no further change arrived for
+    debounce seconds.
+
+    Args:
+        watcher: InotifyWatcher or PollingWatcher
+        debounce: Quiet time in seconds that ends a burst
+        timeout: Give up after this many seconds without any change (None waits forever)
+
+    Returns:
+        Set of changed file names (empty on timeout)
+    """
+    start = time.monotonic()
+    names = set()
+    while not names:
+        wait = 1.0 if timeout is None else max(0.0, min(1.0, start + timeout - time.monotonic()))
+        names = watcher.poll(wait)
+        if not names and timeout is not None and time.monotonic() - start >= timeout:
+            return names
+
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return names
+        names |= more
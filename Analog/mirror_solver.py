@@ -0,0 +1,448 @@
+import argparse
+import ast
+import operator
+import os
+import re
+import time
+
+import numpy as np
+
+from simulate_corners import parse_spice_value, parse_netlist, aimspice_sweep
+from plotting import (get_vdd_numeric, get_iin_values, find_result_files, parse_filename,
+                      read_and_split_data)
+from pvt_metrics import find_vout_min
+
+
+# Physical constants
+BOLTZMANN = 1.380649e-23
+CHARGE = 1.602176634e-19
+EPS_OX = 3.9 * 8.854187817e-12
+NI = 1.45e16  # Intrinsic carrier concentration of silicon in m^-3 at 300 K
+KELVIN = 273.15
+
+# Model card parameters used by drain_current (everything else in the card is ignored)
+MODEL_PARAMETERS = ['TNOM', 'TOX', 'XJ', 'NCH', 'VTH0', 'K1', 'K2', 'U0', 'UA', 'UB', 'UC', 'VSAT',
+                    'WINT', 'LINT', 'XL', 'XW', 'NFACTOR', 'PCLM', 'DELTA', 'UTE', 'KT1', 'KT2',
+                    'UA1', 'UB1', 'UC1', 'AT']
+
+# Bracketed solves stop once every node voltage is known to SOLVER_TOLERANCE volts
+SOLVER_TOLERANCE = 1e-9
+SOLVER_ITERATIONS = 60
+
+# Curve points (geometry x corner x Iin x Vout) solved per batch
+CHUNK_POINTS = 2 ** 20
+
+# Upper bracket of the node voltages V(2) and V(4) in V. Ibias and Iin are ideal
+# current sources from VDD, so like in AIM-Spice they drive their nodes above VDD
+# when the transistors need it (e.g. the high VTH0 of the ss corner at 0.9 V)
+MAX_NODE_VOLTAGE = 3.0
+
+# Operators allowed in model card expressions
+BINARY_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                    ast.Div: operator.truediv, ast.Pow: operator.pow}
+UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def evaluate_expression(text, params):
+    """
+    Evaluate a model card value: a SPICE number or a quoted expression like '4.1E-9/proc_delta'.
+    Expressions may only use numbers, .param names, + - * / ** and parentheses.
+
+    Args:
+        text: Value as written in the card
+        params: Dict of .param values the expression may use
+
+    Returns:
+        Float value
+    """
+    text = text.strip()
+    # As in SPICE, only quoted (or braced) values are expressions. parse_spice_value
+    # only looks at the leading number, so it would read '0.36+vt_shift' as 0.36.
+    if text[:1] not in ('\'', '"', '{'):
+        return parse_spice_value(text)
+    text = text.strip('\'"{}')
+
+    try:
+        tree = ast.parse(text, mode='eval')
+    except SyntaxError:
+        raise ValueError(f"Invalid expression {text!r}") from None
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    unknown = names - set(params)
+    if unknown:
+        raise ValueError(f"Unknown parameters {sorted(unknown)} in {text!r}")
+    try:
+        return evaluate_node(tree.body, params, text)
+    except (ArithmeticError, TypeError) as e:
+        raise ValueError(f"Cannot evaluate {text!r}: {e}") from None
+
+
+def evaluate_node(node, params, text):
+    """
+    Evaluate a parsed expression that only uses numbers, parameter names,
+    + - * / ** and parentheses (anything else is rejected, nothing is run).
+
+    Args:
+        node: ast node of the expression
+        params: Dict of .param values
+        text: Expression text (for error messages)
+
+    Returns:
+        Float value
+    """
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return float(node.value)
+    if isinstance(node, ast.Name):
+        return float(params[node.id])
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        return BINARY_OPERATORS[type(node.op)](evaluate_node(node.left, params, text),
+                                               evaluate_node(node.right, params, text))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](evaluate_node(node.operand, params, text))
+    raise ValueError(f"Unsupported {type(node).__name__} in expression {text!r}")
+
+
+def read_params(file_path):
+    """
+    Read the .param definitions of a netlist or corner file (e.g. proc_delta and vt_shift).
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Dict of parameter name to float
+    """
+    params = {}
+    with open(file_path) as f:
+        for line in f:
+            if line.lower().startswith('.param'):
+                for name, value in re.findall(r'(\w+)\s*=\s*(\S+)', line[len('.param'):]):
+                    params[name] = evaluate_expression(value, params)
+    return params
+
+
+def read_model_card(file_path, model='NMOS'):
+    """
+    Read the raw parameters of one model from a model card.
+
+    Args:
+        file_path: Path to the .inc model card
+        model: Model name (NMOS or PMOS)
+
+    Returns:
+        Dict of upper case parameter name to value text (expressions are kept as text)
+    """
+    values = {}
+    in_model = False
+    with open(file_path) as f:
+        for line in f:
+            if line.upper().startswith('.MODEL'):
+                in_model = line.split()[1].upper() == model.upper()
+            elif in_model and line.startswith('+'):
+                for name, value in re.findall(r"(\w+)\s*=\s*('[^']*'|\S+)", line[1:]):
+                    values[name.upper()] = value
+    return values
+
+
+def corner_parameters(model_dir, process, model='NMOS'):
+    """
+    Get the model parameters of a process corner.
+    The corner file p18_cmos_models_<process>.inc sets proc_delta and vt_shift,
+    which the model card uses in TOX, VTH0, U0 and the junction parameters.
+
+    Args:
+        model_dir: Directory containing the .inc files
+        process: Process corner (tt, ss, ff)
+        model: Model name (NMOS or PMOS)
+
+    Returns:
+        Dict of parameter name to float (MODEL_PARAMETERS)
+    """
+    corner_params = read_params(os.path.join(model_dir, f"p18_cmos_models_{process}.inc"))
+    card = read_model_card(os.path.join(model_dir, 'p18_model_card.inc'), model)
+    return {name: evaluate_expression(card[name], corner_params) for name in MODEL_PARAMETERS}
+
+
+def stack_parameters(parameter_sets):
+    """Stack a list of parameter dicts into one dict of arrays (one entry per set)."""
+    return {name: np.array([p[name] for p in parameter_sets]) for name in MODEL_PARAMETERS}
+
+
+def drain_current(p, width, length, vgs, vds, vbs, temperature):
+    """
+    Drain current of an NMOS transistor with a reduced BSIM3 model.
+    Keeps the core of BSIM3v3: threshold with body effect and temperature
+    shift, mobility degradation (MOBMOD 1), velocity saturation, a smooth
+    subthreshold to strong inversion and triode to saturation transition, and
+    channel length modulation. Short/narrow channel effects, DIBL, Rds and
+    Abulk are left out, so currents are a pre-screening estimate, not SPICE.
+    All arguments broadcast against each other.
+
+    Args:
+        p: Dict of model parameters (floats or arrays, see corner_parameters)
+        width, length: Drawn width and length in m
+        vgs, vds, vbs: Terminal voltages in V (vds < 0 gives 0 A)
+        temperature: Temperature in °C
+
+    Returns:
+        Drain current in A
+    """
+    t_ratio = (temperature + KELVIN) / (p['TNOM'] + KELVIN)
+    vt = BOLTZMANN * (temperature + KELVIN) / CHARGE
+    vds = np.maximum(vds, 0.0)
+
+    l_eff = length + p['XL'] - 2 * p['LINT']
+    w_eff = width + p['XW'] - 2 * p['WINT']
+    cox = EPS_OX / p['TOX']
+
+    # Threshold voltage with body effect and temperature
+    phi = 2 * 0.02585 * np.log(p['NCH'] * 1e6 / NI)
+    vbs = np.minimum(vbs, 0.9 * phi)
+    vth = (p['VTH0'] + p['K1'] * (np.sqrt(phi - vbs) - np.sqrt(phi)) - p['K2'] * vbs
+           + (p['KT1'] + p['KT2'] * vbs) * (t_ratio - 1))
+
+    # Effective gate overdrive, smooth from subthreshold into strong inversion
+    n = 1 + p['NFACTOR'] * 0.25
+    vgst = 2 * n * vt * np.logaddexp(0, (vgs - vth) / (2 * n * vt))
+
+    # Mobility degradation and temperature dependence
+    ua = p['UA'] + p['UA1'] * (t_ratio - 1)
+    ub = p['UB'] + p['UB1'] * (t_ratio - 1)
+    uc = p['UC'] + p['UC1'] * (t_ratio - 1)
+    field = (vgst + 2 * vth) / p['TOX']
+    mobility = p['U0'] * 1e-4 * t_ratio ** p['UTE'] / (1 + (ua + uc * vbs) * field + ub * field ** 2)
+
+    # Velocity saturation and smooth triode/saturation transition
+    vsat = p['VSAT'] - p['AT'] * (t_ratio - 1)
+    esat_l = 2 * vsat / mobility * l_eff
+    vdsat = esat_l * vgst / (esat_l + vgst)
+    delta = p['DELTA']
+    v1 = vdsat - vds - delta
+    vdseff = vdsat - 0.5 * (v1 + np.sqrt(v1 * v1 + 4 * delta * vdsat))
+
+    ids = mobility * cox * w_eff / l_eff * (vgst - vdseff / 2) * vdseff / (1 + vdseff / esat_l)
+
+    # Channel length modulation with an Early voltage from PCLM and the channel length
+    early = esat_l / p['PCLM'] + vdsat
+    return ids * (1 + (vds - vdseff) / early)
+
+
+def solve_increasing(f, lo, hi, tolerance=SOLVER_TOLERANCE, max_iterations=SOLVER_ITERATIONS):
+    """
+    Solve f(x) = 0 element-wise for a function that increases in x.
+    Uses the Illinois variant of regula falsi, which keeps every root
+    bracketed like bisection but converges superlinearly on the smooth
+    device equations. Elements without a usable secant step (e.g. a flat
+    residual in subthreshold) take a bisection step instead.
+
+    Args:
+        f: Vectorized function of x
+        lo, hi: Arrays with the bracket of every element
+        tolerance: Stop once every bracket or step is below this (in units of x)
+        max_iterations: Upper limit on the number of iterations
+
+    Returns:
+        Array of solutions (clamped to the bracket)
+    """
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64))
+    lo, hi = lo.copy(), hi.copy()
+    f_lo, f_hi = f(lo), f(hi)
+    x = np.where(f_lo >= 0, lo, np.where(f_hi <= 0, hi, 0.5 * (lo + hi)))
+    side = np.zeros(x.shape, dtype=np.int8)  # Which end moved last: -1 lo, 1 hi
+
+    for _ in range(max_iterations):
+        width = hi - lo
+        denominator = f_hi - f_lo
+        secant = lo - f_lo * width / np.where(denominator > 0, denominator, 1.0)
+        bisect = (denominator <= 0) | ~((secant > lo) & (secant < hi))
+        x_new = np.where(bisect, 0.5 * (lo + hi), secant)
+        f_new = f(x_new)
+
+        step = np.abs(x_new - x)
+        x = x_new
+        if np.all((width <= tolerance) | (step <= tolerance) | (f_new == 0)):
+            break
+
+        # Illinois: halve the stale end's residual when the same end moves twice
+        above = f_new > 0
+        f_lo = np.where(above & (side == 1), 0.5 * f_lo, f_lo)
+        f_hi = np.where(~above & (side == -1), 0.5 * f_hi, f_hi)
+        hi = np.where(above, x, hi)
+        f_hi = np.where(above, f_new, f_hi)
+        lo = np.where(above, lo, x)
+        f_lo = np.where(above, f_lo, f_new)
+        side = np.where(above, 1, -1).astype(np.int8)
+
+    return np.clip(x, lo, hi)
+
+
+def read_geometry(template_path):
+    """Read the default geometry (.param length, width, scale, size) from tx.cir."""
+    params = read_params(template_path)
+    return {name: np.array([params[name]]) for name in ['length', 'width', 'scale', 'size']}
+
+
+def solve_mirror_chunk(p, geometry, vdd, temperature, vout, iin, ibias):
+    """
+    Solve one batch of solve_mirror. All arrays are already broadcast to the
+    axes geometry x corner x Iin x Vout.
+
+    Returns:
+        Array of I_out
+    """
+    length, width, scale, size = (geometry[name] for name in ['length', 'width', 'scale', 'size'])
+    w_mirror, l_mirror, l_cascode = size * width, size * length, 2 * size * length
+    w_bias, l_bias = scale * width / 5, scale * length
+
+    # M5a (diode connected) carries Ibias: V(2) = Vgs5
+    v2 = solve_increasing(lambda v: drain_current(p, w_bias, l_bias, v, v, 0.0, temperature) - ibias,
+                          0.0, np.maximum(vdd, MAX_NODE_VOLTAGE) + 0 * w_bias)
+
+    # Input branch: M3a (gate 4, drain 5) and M4a (gate 2, drain 4, source 5) both carry Iin.
+    # For a given V(5), V(4) follows from M3a; M4a's current then falls as V(5) rises.
+    def v4_for(v5):
+        return solve_increasing(lambda v4: drain_current(p, w_mirror, l_mirror, v4, v5, 0.0, temperature) - iin,
+                                0.0, np.maximum(vdd, MAX_NODE_VOLTAGE) + 0 * v5)
+
+    def input_residual(v5):
+        v4 = v4_for(v5)
+        return iin - drain_current(p, w_mirror, l_cascode, v2 - v5, v4 - v5, -v5, temperature)
+
+    v5 = solve_increasing(input_residual, 0.0, v2 + 0 * iin)
+    v4 = v4_for(v5)
+
+    # Output branch: M1a (gate 2, drain Vout, source 7) over M2a (gate 4, drain 7)
+    def output_residual(v7):
+        return (drain_current(p, w_mirror, l_mirror, v4, v7, 0.0, temperature)
+                - drain_current(p, w_mirror, l_cascode, v2 - v7, vout - v7, -v7, temperature))
+
+    v7 = solve_increasing(output_residual, 0.0, vout + 0 * v4)
+    return drain_current(p, w_mirror, l_mirror, v4, v7, 0.0, temperature)
+
+
+def solve_mirror(geometry, corners, vout, iin, ibias=35e-6, model_dir=None, chunk_points=CHUNK_POINTS):
+    """
+    Solve the cascode current mirror of tx.cir for many geometries and corners at once.
+    M5a sets the cascode bias V(2) from Ibias, the input branch (M4a over M3a)
+    sets V(4) and V(5) from Iin, and the output branch (M1a over M2a) gives
+    I_out for every Vout. Each node equation is monotonic and solved as one
+    bracketed solve over the whole batch.
+
+    Args:
+        geometry: Dict of arrays length, width, scale, size (shape (n_geometries,)),
+            as the .param values of tx.cir
+        corners: List of (process, vdd, temperature) tuples, vdd in V and temperature in °C
+        vout: Array of output voltages, shape (n_points,)
+        iin: Array of input currents, shape (n_iin,)
+        ibias: Bias current in A
+        model_dir: Directory containing the .inc files (default: next to this file)
+        chunk_points: Solve this many curve points per batch (limits memory use)
+
+    Returns:
+        Array of I_out with shape (n_geometries, n_corners, n_iin, n_points);
+        currents[g, c] has the layout of read_and_split_data's currents
+    """
+    model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
+    parameter_sets = {process: corner_parameters(model_dir, process) for process, _, _ in corners}
+    p = stack_parameters([parameter_sets[process] for process, _, _ in corners])
+
+    # Axes: geometry x corner x Iin x Vout
+    p = {name: value[None, :, None, None] for name, value in p.items()}
+    geometry = {name: np.asarray(geometry[name], dtype=np.float64)[:, None, None, None]
+                for name in ['length', 'width', 'scale', 'size']}
+    vdd = np.array([c[1] for c in corners], dtype=np.float64)[None, :, None, None]
+    temperature = np.array([c[2] for c in corners], dtype=np.float64)[None, :, None, None]
+    iin = np.asarray(iin, dtype=np.float64)[None, None, :, None]
+    vout = np.asarray(vout, dtype=np.float64)[None, None, None, :]
+
+    n_geometries = len(geometry['length'])
+    currents = np.empty((n_geometries, len(corners), iin.shape[2], vout.shape[3]))
+    step = max(1, chunk_points // currents[0].size)
+    for start in range(0, n_geometries, step):
+        chunk = {name: value[start:start + step] for name, value in geometry.items()}
+        currents[start:start + step] = solve_mirror_chunk(p, chunk, vdd, temperature, vout, iin, ibias)
+    return currents
+
+
+def default_sweeps(template_path):
+    """
+    Get the Vout and Iin sweeps of the [dc] analysis in tx.cir.
+
+    Returns:
+        Tuple of (vout, iin) arrays generated like AIM-Spice does
+    """
+    with open(template_path) as f:
+        sweeps = {source: aimspice_sweep(start, stop, step)
+                  for source, start, stop, step in parse_netlist(f.read())['sweeps']}
+    return sweeps['Vout'], sweeps['Iin']
+
+
+def compare_with_results(results_dir, template_path):
+    """
+    Compare the model with the SPICE results for the geometry in tx.cir.
+
+    Returns:
+        List of (corner name, max |I_out error| in A, max error of V_out,min in V)
+    """
+    geometry = read_geometry(template_path)
+    regular_files, _ = find_result_files(results_dir)
+    rows = []
+    for file_path in regular_files:
+        process, voltage_offset, temperature, _ = parse_filename(file_path)
+        sweep_values, spice = read_and_split_data(file_path)
+        iin = get_iin_values(len(spice))
+        model = solve_mirror(geometry, [(process, get_vdd_numeric(voltage_offset), float(temperature))],
+                             sweep_values, iin)[0, 0]
+        v_min_error = np.abs(find_vout_min(sweep_values, model, iin) - find_vout_min(sweep_values, spice, iin))
+        rows.append((os.path.basename(file_path), np.abs(model - spice).max(), v_min_error.max()))
+    return rows
+
+
+def main():
+    """Solve a grid of geometries for all corners and report the speed and V_out,min."""
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    template_path = os.path.join(current_path, 'tx.cir')
+
+    parser = argparse.ArgumentParser(description="Pre-screen geometries of the tx.cir current mirror.")
+    parser.add_argument('--size', nargs='+', type=float, help="Values of the size parameter")
+    parser.add_argument('--length', nargs='+', type=str, help="Values of the length parameter, e.g. 0.18u")
+    parser.add_argument('--width', nargs='+', type=str, help="Values of the width parameter, e.g. 1.3u")
+    parser.add_argument('--process', nargs='+', default=['ss', 'tt', 'ff'])
+    parser.add_argument('--vdd', nargs='+', default=['01', '0', '10'], help="Voltage offsets (01, 0, 10)")
+    parser.add_argument('--temp', nargs='+', type=float, default=[0, 27, 50])
+    parser.add_argument('--compare', action='store_true',
+                        help="Compare the model with the SPICE results in results/ instead")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(f"{'Corner':<12} {'max |dI_out| [uA]':>18} {'dV_out,min [V]':>15}")
+        for name, current_error, v_min_error in compare_with_results(os.path.join(current_path, 'results'),
+                                                                     template_path):
+            print(f"{name:<12} {current_error * 1e6:>18.3f} {v_min_error:>15.3f}")
+        return
+
+    default = {name: value[0] for name, value in read_geometry(template_path).items()}
+    sizes = args.size or [default['size']]
+    lengths = [parse_spice_value(v) for v in args.length] if args.length else [default['length']]
+    widths = [parse_spice_value(v) for v in args.width] if args.width else [default['width']]
+    grid = np.array(np.meshgrid(sizes, lengths, widths, indexing='ij')).reshape(3, -1)
+    geometry = {'size': grid[0], 'length': grid[1], 'width': grid[2],
+                'scale': np.full(grid.shape[1], default['scale'])}
+
+    corners = [(p, get_vdd_numeric(v), t) for p in args.process for v in args.vdd for t in args.temp]
+    vout, iin = default_sweeps(template_path)
+
+    start = time.perf_counter()
+    currents = solve_mirror(geometry, corners, vout, iin)
+    elapsed = time.perf_counter() - start
+    print(f"Solved {currents.shape[0]} geometries x {len(corners)} corners x {len(iin)} currents "
+          f"x {len(vout)} points in {elapsed:.2f} s")
+
+    # Worst-case V_out,min of every geometry over all corners and currents
+    v_min = find_vout_min(vout, currents, iin).max(axis=(1, 2))
+    for k in np.argsort(v_min)[:10]:
+        print(f"  size={geometry['size'][k]:g} length={geometry['length'][k]:.3g} "
+              f"width={geometry['width'][k]:.3g}: V_out,min = {v_min[k]:.3f} V")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+import numpy as np
+import pandas as pd
+
+from result_cache import load_result_columns
+from decimation import decimate_for_axes, decimate_band_for_axes
+from streaming_stats import DEFAULT_QUANTILES, Welford, P2Quantiles, GridHistogram
+from pvt_metrics import find_vout_min, interpolate_at, compute_power
+from tracing import span
+from plotting import (SweepPlotRenderer, setup_plot_style, save_figure, split_experiments, get_iin_values,
+                      get_vdd_numeric, parse_filename, corner_selected, format_voltage_offset)
+
+
+# Width of the band around the mean curve, in standard deviations
+DEFAULT_K = 3.0
+
+
+def quantile_label(q):
+    """Name of a quantile column, e.g. p5 for 0.05."""
+    return f"p{q * 100:g}"
+
+
+class CornerAccumulator:
+    """
+    Online statistics of the Monte Carlo runs of one corner.
+    Every run updates running moments and quantile markers of the curves, and
+    the distributions of V_out,min and I_out @ 0.9 V, then it is dropped, so
+    memory depends on the sweep length and not on the number of runs.
+    """
+
+    def __init__(self, sweep_values, n_experiments, quantiles=DEFAULT_QUANTILES):
+        """
+        Args:
+            sweep_values: Sweep voltages of the first run (later runs are interpolated onto them)
+            n_experiments: Number of input currents per run
+            quantiles: Probabilities of the per-point quantiles
+        """
+        self.sweep_values = np.asarray(sweep_values, dtype=np.float64)
+        self.iin = get_iin_values(n_experiments)
+        shape = (n_experiments, len(self.sweep_values))
+
+        self.currents = Welford(shape)
+        self.current_quantiles = P2Quantiles(shape, quantiles)
+        self.vout_min = Welford(n_experiments)
+        self.vout_min_histogram = GridHistogram(self.sweep_values, n_experiments)
+        self.i_out = Welford(n_experiments)
+        self.skipped = 0
+
+    def update(self, sweep_values, currents):
+        """
+        Add one run.
+
+        Args:
+            sweep_values: Array of sweep voltages, shape (n_points,)
+            currents: Array of currents, shape (n_experiments, n_points)
+        """
+        if len(currents) < len(self.iin):
+            self.skipped += 1  # Incomplete run
+            return
+        currents = currents[:len(self.iin)]
+        if len(sweep_values) != len(self.sweep_values) or not np.array_equal(sweep_values, self.sweep_values):
+            currents = np.array([np.interp(self.sweep_values, sweep_values, row) for row in currents])
+
+        self.currents.update(currents)
+        self.current_quantiles.update(currents)
+
+        v_out_min = find_vout_min(self.sweep_values, currents, self.iin)
+        self.vout_min.update(v_out_min)
+        self.vout_min_histogram.update(v_out_min)
+        self.i_out.update(interpolate_at(self.sweep_values, currents, (0.9,))[:, 0])
+
+    @property
+    def count(self):
+        """Number of runs added."""
+        return self.currents.count
+
+    def summary(self):
+        """
+        Get the metrics of the corner per input current.
+
+        Returns:
+            Dict of column name to array (one entry per input current)
+        """
+        columns = {
+            'I_in': self.iin,
+            'Runs': np.full(len(self.iin), self.count),
+            'V_out,min mean': self.vout_min.mean,
+            'V_out,min std': self.vout_min.std,
+        }
+        for q in self.current_quantiles.quantiles:
+            columns[f'V_out,min {quantile_label(q)}'] = self.vout_min_histogram.quantile(q)
+        columns['I_out @ V_out=0.9V mean'] = self.i_out.mean
+        columns['I_out @ V_out=0.9V std'] = self.i_out.std
+        columns['Power mean'] = compute_power(self.i_out.mean)
+        return columns
+
+
+def find_mc_corners(mc_dir, filters=None):
+    """
+    Find the Monte Carlo runs of every corner.
+    Each corner is a directory named like a result file (e.g. tt_0_27) that
+    holds one AIM-Spice result file per run.
+
+    Args:
+        mc_dir: Directory containing one directory per corner
+        filters: Optional corner filters (see corner_names.corner_selected)
+
+    Returns:
+        List of (corner_dir, run_files) tuples, sorted by corner name
+    """
+    corners = []
+    for name in sorted(os.listdir(mc_dir)):
+        corner_dir = os.path.join(mc_dir, name)
+        process, voltage_offset, temperature, is_iin = parse_filename(name)
+        if (not os.path.isdir(corner_dir) or process is None or is_iin
+                or not corner_selected(process, voltage_offset, temperature, filters)):
+            continue
+        run_files = [os.path.join(corner_dir, f) for f in sorted(os.listdir(corner_dir))
+                     if os.path.isfile(os.path.join(corner_dir, f)) and not f.endswith('.txt')]
+        if run_files:
+            corners.append((corner_dir, run_files))
+    return corners
+
+
+def accumulate_runs(run_files, quantiles=DEFAULT_QUANTILES):
+    """
+    Stream the runs of one corner into a CornerAccumulator, one file at a time.
+    The result cache is bypassed so thousands of runs do not fill the disk.
+
+    Args:
+        run_files: List of result file paths
+        quantiles: Probabilities of the per-point quantiles
+
+    Returns:
+        CornerAccumulator, or None if no run could be read
+    """
+    accumulator = None
+    for file_path in run_files:
+        try:
+            with span('parse', 'step', file=os.path.basename(file_path)):
+                columns = load_result_columns(file_path, use_cache=False)
+            sweep_values, currents = split_experiments(columns[:, 0], columns[:, 1])
+        except (OSError, ValueError) as e:
+            print(f"Skipping {file_path}: {e}")
+            continue
+
+        if accumulator is None:
+            accumulator = CornerAccumulator(sweep_values, len(currents), quantiles)
+        accumulator.update(sweep_values, currents)
+    return accumulator
+
+
+class BandPlotRenderer(SweepPlotRenderer):
+    """
+    Voltage sweep figure for Monte Carlo runs: the mean curve of each input
+    current with a mean ± kσ band and the per-point quantile curves, in the
+    style of plot_voltage_sweep. The median is dotted, the other quantiles dashed.
+    """
+
+    def __init__(self, n_experiments, k=DEFAULT_K, quantiles=DEFAULT_QUANTILES):
+        super().__init__(n_experiments)
+        self.k = k
+        self.bands = []
+
+        linestyles = [':' if q == 0.5 else '--' for q in quantiles]
+        self.quantile_lines = [[self.ax.plot([], [], color=line.get_color(), linestyle=linestyle,
+                                             linewidth=1, alpha=0.8)[0] for linestyle in linestyles]
+                               for line in self.lines]
+
+        for line in self.lines:
+            line.set_label(f"{line.get_label()} (mean)")
+        band = Patch(color='gray', alpha=0.3, label=f'mean ± {k:g}σ')
+        quantile_handles = [Line2D([], [], color='gray', linestyle=linestyle, linewidth=1,
+                                   label=' / '.join(quantile_label(q) for q, s in zip(quantiles, linestyles)
+                                                    if s == linestyle))
+                            for linestyle in dict.fromkeys(linestyles)]
+        self.ax.legend(handles=self.lines + [band] + quantile_handles, loc='best', framealpha=0.9)
+
+    def render(self, accumulator, output_path, process, voltage_offset, temperature, pdf=None):
+        """
+        Draw the bands of one corner and save them.
+
+        Args:
+            accumulator: CornerAccumulator of the corner
+            output_path: Path to save the plot (None to skip the PNG)
+            process: Process type (ss, tt, ff)
+            voltage_offset: Voltage offset (0, 01, 10)
+            temperature: Temperature (0, 27, 50)
+            pdf: Optional PdfPages stream to write the plot to
+        """
+        sweep_values = accumulator.sweep_values
+        mean = accumulator.currents.mean
+        spread = self.k * np.nan_to_num(accumulator.currents.std)
+
+        for band in self.bands:
+            band.remove()
+        self.bands = [self.ax.fill_between(*decimate_band_for_axes(self.ax, sweep_values, m - s, m + s),
+                                           color=line.get_color(), alpha=0.3, linewidth=0, zorder=1)
+                      for line, m, s in zip(self.lines, mean, spread)]
+        for line, current_data in zip(self.lines, mean):
+            line.set_data(*decimate_for_axes(self.ax, sweep_values, current_data))
+        quantiles = accumulator.current_quantiles.result()
+        for k, lines in enumerate(self.quantile_lines):
+            for line, current_data in zip(lines, quantiles[:, k]):
+                line.set_data(*decimate_for_axes(self.ax, sweep_values, current_data))
+
+        self.title.set_text(f"Monte Carlo ({accumulator.count} runs) - Process: {process.upper()}, "
+                            f"Voltage: {format_voltage_offset(voltage_offset)}, Temperature: {temperature}°C")
+
+        # relim only looks at the lines, so add the band limits to the data limits
+        with span('layout', 'step'):
+            self.ax.relim()
+            self.ax.update_datalim([(sweep_values[0], (mean - spread).min()),
+                                    (sweep_values[-1], (mean + spread).max())])
+            self.ax.autoscale_view()
+            self.fig.tight_layout()
+        save_figure(self.fig, output_path, pdf, close=False)
+
+
+def current_quantile_table(name, accumulator):
+    """
+    Get the per-point statistics of the curves of a corner.
+
+    Returns:
+        DataFrame with one row per input current and sweep point: Corner, I_in,
+        V_sweep, I_out mean, I_out std and one I_out column per quantile
+    """
+    n_experiments, n_points = accumulator.currents.mean.shape
+    columns = {
+        'Corner': name,
+        'I_in': np.repeat(accumulator.iin, n_points),
+        'V_sweep': np.tile(accumulator.sweep_values, n_experiments),
+        'I_out mean': accumulator.currents.mean.ravel(),
+        'I_out std': accumulator.currents.std.ravel(),
+    }
+    sketch = accumulator.current_quantiles
+    for q, values in zip(sketch.quantiles, sketch.result()):
+        columns[f'I_out {quantile_label(q)}'] = values.ravel()
+    return pd.DataFrame(columns)
+
+
+def distribution_rows(name, accumulator):
+    """Get the V_out,min distribution of a corner as rows of (Corner, I_in, V_out,min, Count)."""
+    rows = []
+    for iin, counts in zip(accumulator.iin, accumulator.vout_min_histogram.counts):
+        for k in np.flatnonzero(counts):
+            rows.append((name, iin, accumulator.sweep_values[k], int(counts[k])))
+    return rows
+
+
+def run_monte_carlo(mc_dir, plots_dir, k=DEFAULT_K, jobs=1, filters=None, quantiles=DEFAULT_QUANTILES):
+    """
+    Stream the Monte Carlo runs of every corner and write the band plots and statistics.
+
+    Args:
+        mc_dir: Directory containing one directory of runs per corner
+        plots_dir: Output directory
+        k: Band width in standard deviations
+        jobs: Number of corners accumulated in parallel
+        filters: Optional corner filters (see corner_names.corner_selected)
+        quantiles: Probabilities of the per-point quantiles and the V_out,min quantiles
+
+    Returns:
+        DataFrame with the summary of every corner and input current
+    """
+    corners = find_mc_corners(mc_dir, filters)
+    if not corners:
+        print(f"No Monte Carlo runs found in {mc_dir}")
+        return pd.DataFrame()
+    os.makedirs(plots_dir, exist_ok=True)
+
+    run_files = [files for _, files in corners]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            accumulators = list(executor.map(partial(accumulate_runs, quantiles=quantiles), run_files))
+    else:
+        accumulators = [accumulate_runs(files, quantiles) for files in run_files]
+
+    setup_plot_style()
+    renderers = {}
+    summaries = []
+    distribution = []
+    current_quantiles = []
+    try:
+        for (corner_dir, files), accumulator in zip(corners, accumulators):
+            name = os.path.basename(corner_dir)
+            if accumulator is None:
+                continue
+            process, voltage_offset, temperature, _ = parse_filename(name)
+            n_experiments = len(accumulator.iin)
+            if n_experiments not in renderers:
+                renderers[n_experiments] = BandPlotRenderer(n_experiments, k,
+                                                            accumulator.current_quantiles.quantiles)
+
+            output_path = os.path.join(plots_dir, f"{name}_mc_plot.png")
+            renderers[n_experiments].render(accumulator, output_path, process, voltage_offset, temperature)
+            print(f"Saved plot: {output_path} ({accumulator.count} runs"
+                  + (f", {accumulator.skipped} incomplete" if accumulator.skipped else "") + ")")
+
+            summary = pd.DataFrame(accumulator.summary())
+            summary.insert(0, 'Temp', float(temperature))
+            summary.insert(0, 'V_DD', get_vdd_numeric(voltage_offset))
+            summary.insert(0, 'Process', process.upper())
+            summaries.append(summary)
+            distribution.extend(distribution_rows(name, accumulator))
+            current_quantiles.append(current_quantile_table(name, accumulator))
+    finally:
+        for renderer in renderers.values():
+            renderer.close()
+
+    df = pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame()
+    summary_path = os.path.join(plots_dir, 'mc_summary.csv')
+    df.to_csv(summary_path, index=False)
+    distribution_path = os.path.join(plots_dir, 'mc_vout_min_distribution.csv')
+    pd.DataFrame(distribution, columns=['Corner', 'I_in', 'V_out,min', 'Count']).to_csv(distribution_path,
+                                                                                       index=False)
+    quantiles_path = os.path.join(plots_dir, 'mc_current_quantiles.csv')
+    if current_quantiles:
+        pd.concat(current_quantiles, ignore_index=True).to_csv(quantiles_path, index=False)
+    print(f"Saved statistics: {summary_path}, {distribution_path}, {quantiles_path}")
+    return df
+
+
+def main():
+    """Build the Monte Carlo band plots and statistics."""
+    current_path = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Streaming statistics of Monte Carlo (mismatch) runs.")
+    parser.add_argument('mc_dir', nargs='?', default=os.path.join(current_path, 'mc_results'),
+                        help="Directory with one directory of run files per corner, e.g. mc_results/tt_0_27/")
+    parser.add_argument('--plots', default=os.path.join(current_path, 'plots', 'monte_carlo'),
+                        help="Output directory for the plots and statistics")
+    parser.add_argument('-k', type=float, default=DEFAULT_K, help="Band width in standard deviations")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Corners accumulated in parallel")
+    parser.add_argument('--process', nargs='+', help="Only these process corners, e.g. tt ss")
+    parser.add_argument('--vdd', nargs='+', help="Only these voltage offsets (01, 0, 10)")
+    parser.add_argument('--temp', nargs='+', type=float, help="Only these temperatures, e.g. 27")
+    parser.add_argument('--quantiles', nargs='+', type=float, default=list(DEFAULT_QUANTILES),
+                        help="Quantiles of the curves and of V_out,min, e.g. 0.01 0.5 0.99")
+    args = parser.parse_args()
+    if not all(0 < q < 1 for q in args.quantiles):
+        parser.error("--quantiles must be strictly between 0 and 1")
+
+    filters = {'process': args.process, 'voltage_offset': args.vdd, 'temperature': args.temp}
+    run_monte_carlo(args.mc_dir, args.plots, args.k, args.jobs, filters, tuple(args.quantiles))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,59 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
 import numpy as np
 import os
 import re
+import argparse
+import multiprocessing.util
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from PIL import Image
+from result_cache import load_result_columns
+from decimation import decimate_for_axes
+from error_analysis import (DEFAULT_DEGREE, stack_iin_curves, group_iin_curves, current_errors, fit_error_trendlines,
+                            errors_at)
+from pvt_metrics import PROCESS_ORDER, build_pvt_tensor, compute_pvt_metrics
+from corner_names import (DEFAULT_NAME_PATTERN, NAME_PATTERN_GROUPS, DEFAULT_VDD_CODES, set_name_pattern,
+                          get_name_settings, parse_vdd_codes, find_unknown_vdd_codes, corner_selected,
+                          parse_filename, get_vdd_numeric, get_vdd_value)
+from build_manifest import (hash_files, load_manifest, save_manifest, input_digest,
+                            is_up_to_date, record_output)
+from file_watcher import make_watcher, wait_for_changes, is_write_complete
+from columnar_export import curve_table, metrics_table, export_tables
+from staged_pipeline import DEFAULT_QUEUE_SIZE, Stage, run_stages, format_stage_times
+from tracing import (span, enable_tracing, is_tracing_enabled, drain_events, add_events,
+                     write_chrome_trace, summarize, format_summary)
+
+
+# Bump when a change to the plot style should invalidate previously built outputs
+PLOT_STYLE_VERSION = 1
+
+# Source files whose contents determine the outputs (used by the build manifest)
+PIPELINE_SOURCES = ['plotting.py', 'result_cache.py', 'build_manifest.py', 'pvt_metrics.py',
+                    'aimspice_reader.py', 'decimation.py', 'error_analysis.py', 'tracing.py',
+                    'columnar_export.py', 'staged_pipeline.py', 'corner_names.py']
+
+
+def save_figure(fig, output_path, pdf=None, close=True):
+    """
+    Save a figure and close it.
+    
+    Args:
+        fig: Matplotlib figure
+        output_path: Path to save the PNG, or None to skip the PNG
+        pdf: Optional PdfPages stream to append the figure to as a vector page
+        close: Close the figure after saving (False for figures that are reused)
+    """
+    if pdf is not None:
+        with span('write_pdf_page', 'step'):
+            pdf.savefig(fig)
+    if output_path is not None:
+        with span('encode_png', 'step'):
+            fig.savefig(output_path)
+    if close:
+        plt.close(fig)
 
 
 def setup_plot_style():
@@ -29,222 +79,431 @@ def setup_plot_style():
     plt.rcParams['savefig.bbox'] = 'tight'
 
 
-def read_and_split_data(file_path):
+# Outputs that can be selected on the command line: corner plots, combined error
+# trendline plot, metrics table and all_plots.pdf
+OUTPUT_KINDS = ('plots', 'errors', 'metrics', 'pdf')
+
+
+# Input currents of the inner DC sweep in tx.cir (Iin 40u 50u 5u)
+IIN_START = 40e-6
+IIN_STEP = 5e-6
+
+
+def get_iin_values(n_experiments):
     """
-    Read data from a file and split it into separate experiments.
+    Get the input current of each experiment in a nested DC sweep.
     
     Args:
-        file_path: Path to the data file
+        n_experiments: Number of experiments (inner sweep steps)
         
     Returns:
-        DataFrame with columns: sweep, id_exp1, id_exp2, id_exp3
+        Array of input currents in Amperes
     """
-    data = pd.read_table(file_path)
+    return IIN_START + IIN_STEP * np.arange(n_experiments)
+
+
+def split_experiments(sweep, current, n_experiments=None):
+    """
+    Split a nested sweep into one row per experiment.
+    Every experiment starts where the sweep returns to its start value
+    (found in one pass), so any number of experiments is handled and
+    descending or noisy sweeps are not cut up.
     
-    # Find where each experiment starts (when sweep resets to 0)
-    sweep_col = data.columns[0]  # First sweep column
-    id_col = data.columns[2]      # id(m1a) column
+    Args:
+        sweep: 1-D array of sweep values (all experiments back to back)
+        current: 1-D array of drain currents, same length as sweep
+        n_experiments: Optional number of experiments. Used to divide the data
+            equally if no restarts are found, and to keep only the first
+            n_experiments otherwise.
+        
+    Returns:
+        Tuple of (sweep_values, currents) where sweep_values has shape
+        (n_points,) and currents has shape (n_experiments, n_points)
+        
+    Raises:
+        ValueError: If the experiments do not all have the same length
+    """
+    sweep = np.asarray(sweep, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
     
-    # Find experiment boundaries by detecting when sweep resets to 0
-    experiment_starts = [0]  # Start with first data row
-    for i in range(1, len(data)):
-        if abs(data.iloc[i][sweep_col]) < 1e-10:  # Check if sweep is approximately 0
-            experiment_starts.append(i)
+    # Each experiment starts where the sweep is back at its start value
+    starts = np.flatnonzero(np.abs(sweep - sweep[0]) < 1e-10)
     
-    # Ensure we have exactly 3 experiments
-    if len(experiment_starts) < 3:
-        # If we didn't find enough resets, assume equal division
-        rows_per_experiment = len(data) // 3
-        experiment_starts = [0, rows_per_experiment, 2 * rows_per_experiment]
+    if len(starts) == 1 and n_experiments:
+        # If we didn't find any restarts, assume equal division
+        n_points = len(sweep) // n_experiments
+        starts = np.arange(n_experiments) * n_points
     else:
-        experiment_starts = experiment_starts[:3]  # Take first 3 experiments
-    
-    # Add the end index for the last experiment
-    experiment_starts.append(len(data))
-    
-    # Extract each experiment's data
-    exp1_data = data.iloc[experiment_starts[0]:experiment_starts[1]][id_col].values
-    exp2_data = data.iloc[experiment_starts[1]:experiment_starts[2]][id_col].values
-    exp3_data = data.iloc[experiment_starts[2]:experiment_starts[3]][id_col].values
-    
-    # Get the common sweep values (from first experiment)
-    sweep_values = data.iloc[experiment_starts[0]:experiment_starts[1]][sweep_col].values
-    
-    # Ensure all experiments have the same length (take minimum length)
-    min_length = min(len(exp1_data), len(exp2_data), len(exp3_data))
-    sweep_values = sweep_values[:min_length]
-    exp1_data = exp1_data[:min_length]
-    exp2_data = exp2_data[:min_length]
-    exp3_data = exp3_data[:min_length]
+        if n_experiments:
+            starts = starts[:n_experiments + 1]
+        ends = np.append(starts[1:], len(sweep))
+        lengths = ends - starts
+        if n_experiments and len(starts) > n_experiments:
+            starts, lengths = starts[:-1], lengths[:-1]
+        n_points = int(lengths[0])
+        if np.any(lengths != n_points):
+            raise ValueError(f"Experiments have different lengths: {', '.join(map(str, lengths))} points")
+    
+    # Equal blocks: reshape without copying
+    currents = current[starts[0]:starts[0] + len(starts) * n_points].reshape(len(starts), n_points)
+    return sweep[:n_points], currents
+
+
+def read_and_split_data(file_path, n_experiments=None, use_cache=True):
+    """
+    Read data from a file and split it into separate experiments.
     
-    # Create new DataFrame with 4 columns: sweep, id_exp1, id_exp2, id_exp3
-    split_data = pd.DataFrame({
-        'sweep': sweep_values,
-        'id_exp1': exp1_data,
-        'id_exp2': exp2_data,
-        'id_exp3': exp3_data
-    })
+    Args:
+        file_path: Path to the data file
+        n_experiments: Optional number of experiments (see split_experiments)
+        use_cache: Load the parsed columns from the binary cache
+        
+    Returns:
+        Tuple of (sweep_values, currents) with currents of shape
+        (n_experiments, n_points)
+    """
+    with span('parse', 'step', file=os.path.basename(file_path)):
+        columns = load_result_columns(file_path, use_cache)
     
-    return split_data
+    with span('split', 'step'):
+        return split_experiments(columns[:, 0], columns[:, 1], n_experiments)
 
 
-def read_iin_data(file_path):
+def read_iin_data(file_path, use_cache=True):
     """
     Read data from an _Iin file.
     Note: The file has duplicate sweep columns, we use the first one.
     
     Args:
         file_path: Path to the _Iin data file
+        use_cache: Load the parsed columns from the binary cache
         
     Returns:
-        DataFrame with columns: sweep_current, id_current
+        Dict with arrays: sweep_current, id_current
     """
-    data = pd.read_table(file_path)
+    with span('parse', 'step', file=os.path.basename(file_path)):
+        columns = load_result_columns(file_path, use_cache)
     
-    # Use first sweep column (column 0) and id(m1a) column (column 2)
-    # Ignore the duplicate sweep column (column 1)
-    sweep_col = data.columns[0]  # First sweep column (input current)
-    id_col = data.columns[2]      # id(m1a) column (drain current)
+    return {
+        'sweep_current': columns[:, 0],
+        'id_current': columns[:, 1]
+    }
+
+
+def format_voltage_offset(voltage_offset):
+    """Format a voltage offset (0, 01, 10) for plot titles and labels, e.g. "-10%"."""
+    voltage_str = f"{voltage_offset}" if voltage_offset != "01" else "-10%"
+    if voltage_offset == "10":
+        voltage_str = "+10%"
+    elif voltage_offset == "0":
+        voltage_str = "0%"
+    return voltage_str
+
+
+class SweepPlotRenderer:
+    """
+    Reusable figure for the voltage sweep plots.
+    The styled figure (axes, reference lines, labels, legend, grid) is built
+    once, each corner then only updates the line data and the title.
+    """
     
-    return pd.DataFrame({
-        'sweep_current': data[sweep_col].values,
-        'id_current': data[id_col].values
-    })
+    def __init__(self, n_experiments):
+        self.n_experiments = n_experiments
+        reference_currents = get_iin_values(n_experiments)
+        
+        self.fig, self.ax = plt.subplots(figsize=(12, 8))
+        
+        # One line per experiment, data is set in render()
+        self.lines = [self.ax.plot([], [], label=f'Iin = {iin*1e6:g} μA', linewidth=2, alpha=0.8)[0]
+                      for iin in reference_currents]
+        
+        # Add horizontal reference lines at the input currents
+        for current in reference_currents:
+            self.ax.axhline(y=current, color='gray', linestyle=':', linewidth=1.5, 
+                            alpha=0.7, zorder=0)  # zorder=0 to place behind data lines
+        
+        # Format labels
+        self.ax.set_xlabel('Voltage sweep [V]', fontweight='bold')
+        self.ax.set_ylabel('Drain current M1 [A]', fontweight='bold')
+        self.title = self.ax.set_title('', fontweight='bold', pad=15)
+        
+        self.ax.legend(loc='best', framealpha=0.9)
+        self.ax.grid(True, alpha=0.3, linestyle='--')
+    
+    def render(self, split_data, output_path, process, voltage_offset, temperature, pdf=None):
+        """
+        Draw one corner and save it (see plot_voltage_sweep for the arguments).
+        """
+        sweep_values, currents = split_data
+        
+        # Update all experiments, decimated to the pixel width of the axes
+        for line, current_data in zip(self.lines, currents):
+            line.set_data(*decimate_for_axes(self.ax, sweep_values, current_data))
+        
+        self.title.set_text(f"Process: {process.upper()}, Voltage: {format_voltage_offset(voltage_offset)}, "
+                            f"Temperature: {temperature}°C")
+        
+        # Rescale to the new data and improve layout
+        with span('layout', 'step'):
+            self.ax.relim()
+            self.ax.autoscale_view()
+            self.fig.tight_layout()
+        save_figure(self.fig, output_path, pdf, close=False)
+    
+    def close(self):
+        """Close the figure."""
+        plt.close(self.fig)
+
+
+# Renderers kept open for reuse in this process, keyed by (class, n_experiments)
+_renderers = {}
+
+
+def get_renderer(renderer_class, *args):
+    """Get the cached renderer of a plot type, building its figure on first use."""
+    key = (renderer_class,) + args
+    if key not in _renderers:
+        _renderers[key] = renderer_class(*args)
+    return _renderers[key]
 
 
-def plot_voltage_sweep(split_data, output_path, process, voltage_offset, temperature):
+def close_renderers():
+    """Close the figures of all cached renderers (end of main, worker exit)."""
+    for renderer in _renderers.values():
+        renderer.close()
+    _renderers.clear()
+
+
+def plot_voltage_sweep(split_data, output_path, process, voltage_offset, temperature, verbose=True,
+                       pdf=None, reuse=False):
     """
-    Plot voltage sweep data for all three experiments.
+    Plot voltage sweep data for all experiments.
     
     Args:
-        split_data: DataFrame with columns: sweep, id_exp1, id_exp2, id_exp3
+        split_data: Tuple of (sweep_values, currents) from read_and_split_data
         output_path: Path to save the plot
         process: Process type (ss, tt, ff)
         voltage_offset: Voltage offset (0, 01, 10)
         temperature: Temperature (0, 27, 50)
+        verbose: Print the path of the saved plot
+        pdf: Optional PdfPages stream to write the plot to (output_path may then be None)
+        reuse: Draw on a cached figure instead of building and closing a new one
     """
-    fig, ax = plt.subplots(figsize=(12, 8))
-    
-    # Plot all three experiments
-    ax.plot(split_data['sweep'], split_data['id_exp1'], 
-            label='Iin = 40 μA', linewidth=2, alpha=0.8)
-    ax.plot(split_data['sweep'], split_data['id_exp2'], 
-            label='Iin = 45 μA', linewidth=2, alpha=0.8)
-    ax.plot(split_data['sweep'], split_data['id_exp3'], 
-            label='Iin = 50 μA', linewidth=2, alpha=0.8)
-    
-    # Add horizontal reference lines at 40 uA, 45 uA, and 50 uA
-    reference_currents = [40e-6, 45e-6, 50e-6]  # Convert to Amperes
-    reference_labels = ['40 μA', '45 μA', '50 μA']
-    
-    for current, label in zip(reference_currents, reference_labels):
-        ax.axhline(y=current, color='gray', linestyle=':', linewidth=1.5, 
-                  alpha=0.7, zorder=0)  # zorder=0 to place behind data lines
-    
-    # Format labels
-    ax.set_xlabel('Voltage sweep [V]', fontweight='bold')
-    ax.set_ylabel('Drain current M1 [A]', fontweight='bold')
+    n_experiments = len(split_data[1])
+    if reuse:
+        get_renderer(SweepPlotRenderer, n_experiments).render(split_data, output_path, process,
+                                                              voltage_offset, temperature, pdf)
+    else:
+        renderer = SweepPlotRenderer(n_experiments)
+        renderer.render(split_data, output_path, process, voltage_offset, temperature, pdf)
+        renderer.close()
+    if verbose and output_path is not None:
+        print(f"Saved plot: {output_path}")
+
+
+def compute_current_error(iin_data):
+    """
+    Compute the absolute error between sweep current and drain current at every sample.
     
-    # Create title with file information
-    voltage_str = f"{voltage_offset}" if voltage_offset != "01" else "-10%"
-    if voltage_offset == "10":
-        voltage_str = "+10%"
-    elif voltage_offset == "0":
-        voltage_str = "0%"
+    Args:
+        iin_data: Dict with arrays: sweep_current, id_current
+        
+    Returns:
+        Tuple of (sweep_current, error) arrays
+    """
+    sweep_current = np.asarray(iin_data['sweep_current'], dtype=np.float64)
+    id_current = np.asarray(iin_data['id_current'], dtype=np.float64)
     
-    title = f"Process: {process.upper()}, Voltage: {voltage_str}, Temperature: {temperature}°C"
-    ax.set_title(title, fontweight='bold', pad=15)
+    # Calculate error: |sweep_current - id_current|
+    return sweep_current, np.abs(sweep_current - id_current)
+
+
+def fit_error_trendline(sweep_current, error, n_points=200, degree=DEFAULT_DEGREE):
+    """
+    Fit a polynomial trendline (degree 2 for smooth curve) to the current error.
     
-    ax.legend(loc='best', framealpha=0.9)
-    ax.grid(True, alpha=0.3, linestyle='--')
+    Args:
+        sweep_current: Array of input currents
+        error: Array of absolute errors
+        n_points: Number of points on the smooth trendline
+        degree: Polynomial degree of the trendline
+        
+    Returns:
+        Tuple of (sweep_smooth, trendline) arrays
+    """
+    sweep_smooth, trendlines = fit_error_trendlines(sweep_current, error[None, :], degree, n_points)
+    return sweep_smooth, trendlines[0]
+
+
+class ErrorPlotRenderer:
+    """
+    Reusable figure for the current error plots of the _Iin files.
+    Built once, each file then only updates the data, trendline and title.
+    """
     
-    # Improve layout
-    plt.tight_layout()
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved plot: {output_path}")
+    def __init__(self):
+        self.fig, self.ax = plt.subplots(figsize=(12, 8))
+        
+        # Error data and trendline, data is set in render()
+        self.data_line, = self.ax.plot([], [], linewidth=1, color='red', alpha=0.8, label='Data')
+        self.trend_line, = self.ax.plot([], [], linewidth=2.5, color='blue', alpha=0.9, 
+                                        linestyle='-', label='Trendline')
+        
+        # Format labels
+        self.ax.set_xlabel('Input Current [A]', fontweight='bold')
+        self.ax.set_ylabel('Absolute Error', fontweight='bold')
+        self.title = self.ax.set_title('', fontweight='bold', pad=15)
+        
+        self.ax.legend(loc='best', framealpha=0.9)
+        self.ax.grid(True, alpha=0.3, linestyle='--')
+        
+        # Use scientific notation for y-axis if needed
+        self.ax.ticklabel_format(style='scientific', axis='y', scilimits=(0, 0))
+        self.ax.ticklabel_format(style='scientific', axis='x', scilimits=(0, 0))
+    
+    def render(self, iin_data, output_path, process, voltage_offset, temperature, pdf=None):
+        """
+        Draw one _Iin file and save it (see plot_current_error for the arguments).
+        """
+        sweep_current, error_squared = compute_current_error(iin_data)
+        
+        # Error squared against sweep current, and a polynomial trendline fitted to all samples
+        self.data_line.set_data(*decimate_for_axes(self.ax, sweep_current, error_squared))
+        self.trend_line.set_data(*fit_error_trendline(sweep_current, error_squared))
+        
+        self.title.set_text(f"Current Error |Iin - Iout| - Process: {process.upper()}, "
+                            f"Voltage: {format_voltage_offset(voltage_offset)}, Temperature: {temperature}°C")
+        
+        # Rescale to the new data and improve layout
+        with span('layout', 'step'):
+            self.ax.relim()
+            self.ax.autoscale_view()
+            self.fig.tight_layout()
+        save_figure(self.fig, output_path, pdf, close=False)
+    
+    def close(self):
+        """Close the figure."""
+        plt.close(self.fig)
 
 
-def plot_current_error(iin_data, output_path, process, voltage_offset, temperature):
+def plot_current_error(iin_data, output_path, process, voltage_offset, temperature, pdf=None, reuse=False):
     """
     Plot absolute error squared between sweep current and drain current.
     For each row: (sweep_current - id_current)^2, plotted against sweep_current.
-    Averages every 10 entries in id_current to reduce data points from ~1400 to ~140.
+    The data is decimated to the pixel width of the plot (min/max per pixel),
+    the trendline is fitted to all samples.
     
     Args:
-        iin_data: DataFrame with columns: sweep_current, id_current
+        iin_data: Dict with arrays: sweep_current, id_current
         output_path: Path to save the plot
         process: Process type (ss, tt, ff)
         voltage_offset: Voltage offset (0, 01, 10)
         temperature: Temperature (0, 27, 50)
+        pdf: Optional PdfPages stream to write the plot to (output_path may then be None)
+        reuse: Draw on a cached figure instead of building and closing a new one
     """
-    # Convert to numpy arrays
-    sweep_current = np.array(iin_data['sweep_current'], dtype=np.float64)
-    id_current = np.array(iin_data['id_current'], dtype=np.float64)
-    
-    # Average every 10 entries in id_current
-    chunk_size = 10
-    n_chunks = len(id_current) // chunk_size
-    
-    # Reshape and average id_current in chunks of 10
-    id_current_reshaped = id_current[:n_chunks * chunk_size].reshape(n_chunks, chunk_size)
-    id_current_averaged = np.mean(id_current_reshaped, axis=1)
-    
-    # Take corresponding sweep_current values (first value of each chunk)
-    sweep_current_averaged = sweep_current[::chunk_size][:n_chunks]
-    
-    # Calculate error: (sweep_current - id_current)
-    error_squared = np.abs(sweep_current_averaged - id_current_averaged)
+    if reuse:
+        get_renderer(ErrorPlotRenderer).render(iin_data, output_path, process, voltage_offset,
+                                               temperature, pdf)
+    else:
+        renderer = ErrorPlotRenderer()
+        renderer.render(iin_data, output_path, process, voltage_offset, temperature, pdf)
+        renderer.close()
+    if output_path is not None:
+        print(f"Saved plot: {output_path}")
 
-    fig, ax = plt.subplots(figsize=(12, 8))
-    
-    # Plot error squared against sweep current
-    ax.plot(sweep_current_averaged, error_squared, 
-            linewidth=1, color='red', alpha=0.8, label='Data')
-    
-    # Fit a polynomial trendline (degree 2 for smooth curve)
-    z = np.polyfit(sweep_current_averaged, error_squared, deg=2)
-    p = np.poly1d(z)
-    
-    # Create smooth x values for trendline
-    sweep_smooth = np.linspace(sweep_current_averaged.min(), 
-                               sweep_current_averaged.max(), 200)
-    trendline = p(sweep_smooth)
-    
-    # Plot trendline
-    ax.plot(sweep_smooth, trendline, 
-            linewidth=2.5, color='blue', alpha=0.9, 
-            linestyle='-', label='Trendline')
-    
-    # Format labels
-    ax.set_xlabel('Input Current [A]', fontweight='bold')
-    ax.set_ylabel('Absolute Error', fontweight='bold')
-    
-    # Create title with file information
-    voltage_str = f"{voltage_offset}" if voltage_offset != "01" else "-10%"
-    if voltage_offset == "10":
-        voltage_str = "+10%"
-    elif voltage_offset == "0":
-        voltage_str = "0%"
+
+def load_iin_curves(iin_files, dataset=None):
+    """
+    Load _Iin files and stack the curves of each input current grid (see error_analysis.group_iin_curves).
     
-    title = f"Current Error |Iin - Iout| - Process: {process.upper()}, Voltage: {voltage_str}, Temperature: {temperature}°C"
-    ax.set_title(title, fontweight='bold', pad=15)
+    Args:
+        iin_files: List of paths to _Iin files
+        dataset: Optional CornerDataset to read the files through
+        
+    Returns:
+        Tuple of (loaded_files, groups) where groups is a list of (indices, sweep, i_out)
+        and indices refer to loaded_files; files that fail are left out
+    """
+    loaded_files, curves = [], []
+    for file_path in iin_files:
+        try:
+            iin_data = dataset.load(file_path) if dataset is not None else read_iin_data(file_path)
+            curves.append((iin_data['sweep_current'], iin_data['id_current']))
+            loaded_files.append(file_path)
+        except Exception as e:
+            print(f"Error processing {file_path} for combined plot: {e}")
+    return loaded_files, group_iin_curves(curves)
+
+
+def compute_error_trendlines(iin_files, dataset=None, degree=DEFAULT_DEGREE):
+    """
+    Compute the error trendline of every _Iin file, all fitted in one batched solve.
     
-    ax.legend(loc='best', framealpha=0.9)
-    ax.grid(True, alpha=0.3, linestyle='--')
+    Args:
+        iin_files: List of paths to _Iin files
+        dataset: Optional CornerDataset to read the files through
+        degree: Polynomial degree of the trendlines
+        
+    Returns:
+        Dict mapping file path to (sweep_smooth, trendline); files that fail are left out
+    """
+    loaded_files, groups = load_iin_curves(iin_files, dataset)
+    
+    results = {}
+    with span('fit', 'step', files=len(loaded_files)):
+        for indices, sweep, i_out in groups:
+            sweep_smooth, trendlines = fit_error_trendlines(sweep, current_errors(sweep, i_out), degree)
+            for k, trendline in zip(indices, trendlines):
+                results[loaded_files[k]] = (sweep_smooth, trendline)
+    return {file_path: results[file_path] for file_path in loaded_files}
+
+
+def compute_iin_errors(iin_files, target_iins, dataset=None):
+    """
+    Compute |Iin - Iout| and the error in percent of every _Iin file at several input currents.
     
-    # Use scientific notation for y-axis if needed
-    ax.ticklabel_format(style='scientific', axis='y', scilimits=(0, 0))
-    ax.ticklabel_format(style='scientific', axis='x', scilimits=(0, 0))
+    Args:
+        iin_files: List of paths to _Iin files
+        target_iins: Array of target input currents in Amperes
+        dataset: Optional CornerDataset to read the files through
+        
+    Returns:
+        Tuple of (loaded_files, abs_error, percent_error) where the errors have
+        shape (len(loaded_files), len(target_iins))
+    """
+    loaded_files, groups = load_iin_curves(iin_files, dataset)
+    shape = (len(loaded_files), len(np.atleast_1d(target_iins)))
+    abs_error, percent_error = np.empty(shape), np.empty(shape)
+    for indices, sweep, i_out in groups:
+        abs_error[indices], percent_error[indices] = errors_at(sweep, i_out, target_iins)
+    return loaded_files, abs_error, percent_error
+
+
+def compute_iin_error_table(iin_files, target_iins, dataset=None):
+    """
+    Get the error of every _Iin file at the input currents of the metrics table.
     
-    # Improve layout
-    plt.tight_layout()
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved plot: {output_path}")
+    Args:
+        iin_files: List of paths to _Iin files
+        target_iins: Array of input currents in Amperes
+        dataset: Optional CornerDataset to read the files through
+        
+    Returns:
+        DataFrame with Process, V_DD, Temp, I_in and Error (in percent) per
+        file and input current, in the units of compute_pvt_metrics
+    """
+    loaded_files, _, percent_error = compute_iin_errors(iin_files, target_iins, dataset)
+    rows = []
+    for file_path, errors in zip(loaded_files, percent_error):
+        process, voltage_offset, temperature, _ = parse_filename(file_path)
+        for iin, error in zip(target_iins, errors):
+            rows.append((process.upper(), get_vdd_numeric(voltage_offset), float(temperature), iin, error))
+    return pd.DataFrame(rows, columns=['Process', 'V_DD', 'Temp', 'I_in', 'Error'])
 
 
-def plot_combined_error_trendlines(iin_files, plots_dir, results_dir):
+def plot_combined_error_trendlines(iin_files, plots_dir, results_dir, pdf=None, save_png=True,
+                                   trendlines=None, dataset=None):
     """
     Create a combined plot with trendlines from all _Iin error plots.
     Only shows the interpolated trendlines, not the raw data.
@@ -253,7 +512,14 @@ def plot_combined_error_trendlines(iin_files, plots_dir, results_dir):
         iin_files: List of paths to _Iin files
         plots_dir: Directory to save the combined plot
         results_dir: Directory containing result files (for finding files)
+        pdf: Optional PdfPages stream to write the plot to
+        save_png: Save the plot as a PNG in plots_dir
+        trendlines: Optional dict of precomputed trendlines from compute_error_trendlines
+        dataset: Optional CornerDataset to read the files through
     """
+    if trendlines is None:
+        trendlines = compute_error_trendlines(iin_files, dataset)
+    
     fig, ax = plt.subplots(figsize=(14, 10))
     
     # Color palette for different conditions
@@ -263,58 +529,20 @@ def plot_combined_error_trendlines(iin_files, plots_dir, results_dir):
     
     for file_path in iin_files:
         process, voltage_offset, temperature, is_iin = parse_filename(file_path)
-        if process is None:
+        if process is None or file_path not in trendlines:
             continue
         
-        try:
-            # Read data
-            iin_data = read_iin_data(file_path)
-            
-            # Convert to numpy arrays
-            sweep_current = np.array(iin_data['sweep_current'], dtype=np.float64)
-            id_current = np.array(iin_data['id_current'], dtype=np.float64)
-            
-            # Average every 10 entries in id_current
-            chunk_size = 10
-            n_chunks = len(id_current) // chunk_size
-            
-            # Reshape and average id_current in chunks of 10
-            id_current_reshaped = id_current[:n_chunks * chunk_size].reshape(n_chunks, chunk_size)
-            id_current_averaged = np.mean(id_current_reshaped, axis=1)
-            
-            # Take corresponding sweep_current values (first value of each chunk)
-            sweep_current_averaged = sweep_current[::chunk_size][:n_chunks]
-            
-            # Calculate error: (sweep_current - id_current)
-            error_squared = np.abs(sweep_current_averaged - id_current_averaged)
-            
-            # Fit a polynomial trendline (degree 2 for smooth curve)
-            z = np.polyfit(sweep_current_averaged, error_squared, deg=2)
-            p = np.poly1d(z)
-            
-            # Create smooth x values for trendline
-            sweep_smooth = np.linspace(sweep_current_averaged.min(), 
-                                       sweep_current_averaged.max(), 200)
-            trendline = p(sweep_smooth)
-            
-            # Create label
-            voltage_str = f"{voltage_offset}" if voltage_offset != "01" else "-10%"
-            if voltage_offset == "10":
-                voltage_str = "+10%"
-            elif voltage_offset == "0":
-                voltage_str = "0%"
-            
-            label = f"{process.upper()}, {voltage_str}, {temperature}°C"
-            
-            # Plot trendline only
-            ax.plot(sweep_smooth, trendline, 
-                    linewidth=2, color=colors[color_idx % len(colors)], 
-                    alpha=0.8, label=label)
-            
-            color_idx += 1
-            
-        except Exception as e:
-            print(f"Error processing {file_path} for combined plot: {e}")
+        sweep_smooth, trendline = trendlines[file_path]
+        
+        # Create label
+        label = f"{process.upper()}, {format_voltage_offset(voltage_offset)}, {temperature}°C"
+        
+        # Plot trendline only
+        ax.plot(sweep_smooth, trendline, 
+                linewidth=2, color=colors[color_idx % len(colors)], 
+                alpha=0.8, label=label)
+        
+        color_idx += 1
     
     # Format labels
     ax.set_xlabel('Input Current [A]', fontweight='bold')
@@ -332,110 +560,741 @@ def plot_combined_error_trendlines(iin_files, plots_dir, results_dir):
     plt.tight_layout()
     
     # Save combined plot
-    output_path = os.path.join(plots_dir, 'combined_error_trendlines.png')
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved combined error plot: {output_path}")
+    output_path = os.path.join(plots_dir, 'combined_error_trendlines.png') if save_png else None
+    save_figure(fig, output_path, pdf)
+    if output_path is not None:
+        print(f"Saved combined error plot: {output_path}")
 
 
-def find_result_files(results_dir):
+def find_result_files(results_dir, filters=None):
     """
-    Find all result files matching the pattern xx_yy_zz.txt.
+    Find all result files matching the file name pattern (see set_name_pattern).
     
     Args:
         results_dir: Directory containing result files
+        filters: Optional corner filters (see corner_selected)
         
     Returns:
         Tuple of (regular_files, iin_files) where each is a list of file paths
     """
-    pattern = re.compile(r'^(ss|tt|ff)_(0|01|10)_(0|27|50)$')
-    iin_pattern = re.compile(r'^(ss|tt|ff)_(0|01|10)_(0|27|50)_Iin$')
-    
     regular_files = []
     iin_files = []
     
-    for file in os.listdir(results_dir):
+    # Sort so that plots and tables are always produced in the same order
+    for file in sorted(os.listdir(results_dir)):
         file_path = os.path.join(results_dir, file)
         if os.path.isfile(file_path) and not file.endswith('.txt'):
-            # Try without extension
-            base_name = file
-            if pattern.match(base_name):
-                regular_files.append(file_path)
-            elif iin_pattern.match(base_name):
+            process, voltage_offset, temperature, is_iin = parse_filename(file)
+            if process is None or not corner_selected(process, voltage_offset, temperature, filters):
+                continue
+            if is_iin:
                 iin_files.append(file_path)
+            else:
+                regular_files.append(file_path)
     
     return regular_files, iin_files
 
 
-def parse_filename(file_path):
+class CornerDataset:
+    """
+    Lazy access to all corners of a results directory.
+    Corners are indexed by (process, voltage_offset, temperature, kind) where kind
+    is 'sweep' for regular files and 'iin' for _Iin files. Each file is read on
+    first access and memoized in a bounded LRU cache, so passing one dataset to
+    all plotting and metric functions reads every file once per run.
     """
-    Parse filename to extract process, voltage offset, and temperature.
+    
+    def __init__(self, regular_files, iin_files, max_cached=256):
+        """
+        Args:
+            regular_files: List of paths to regular result files
+            iin_files: List of paths to _Iin files
+            max_cached: Maximum number of loaded corners kept in memory
+        """
+        self.paths = {}
+        for file_path in regular_files + iin_files:
+            process, voltage_offset, temperature, is_iin = parse_filename(file_path)
+            if process is not None:
+                self.paths[(process, voltage_offset, temperature, 'iin' if is_iin else 'sweep')] = file_path
+        self.keys_by_path = {file_path: key for key, file_path in self.paths.items()}
+        
+        self.regular_files = [f for f in regular_files if f in self.keys_by_path]
+        self.iin_files = [f for f in iin_files if f in self.keys_by_path]
+        self.max_cached = max_cached
+        self.n_reads = 0
+        self._cache = OrderedDict()
+    
+    @classmethod
+    def from_results_dir(cls, results_dir, max_cached=256, filters=None):
+        """Create a dataset from the result files found in results_dir (optionally filtered, see corner_selected)."""
+        regular_files, iin_files = find_result_files(results_dir, filters)
+        return cls(regular_files, iin_files, max_cached)
+    
+    def __len__(self):
+        return len(self.paths)
+    
+    def __contains__(self, key):
+        return key in self.paths
+    
+    def keys(self, kind=None):
+        """List the corner keys, optionally only those of one kind ('sweep' or 'iin')."""
+        return [key for key in self.paths if kind is None or key[3] == kind]
+    
+    def __getitem__(self, key):
+        """
+        Get the data of a corner.
+        
+        Args:
+            key: Tuple of (process, voltage_offset, temperature, kind)
+            
+        Returns:
+            (sweep_values, currents) for kind 'sweep' (see read_and_split_data),
+            dict with arrays sweep_current, id_current for kind 'iin'
+        """
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        
+        file_path = self.paths[key]
+        data = read_iin_data(file_path) if key[3] == 'iin' else read_and_split_data(file_path)
+        self.n_reads += 1
+        
+        self._cache[key] = data
+        if len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return data
+    
+    def load(self, file_path):
+        """Get the data of a corner by its file path (see __getitem__)."""
+        return self[self.keys_by_path[file_path]]
+
+
+def init_plot_worker(trace=False, name_pattern=DEFAULT_NAME_PATTERN, vdd_codes=None):
+    """Initialize a worker process for rendering plots (trace: record spans like the main process)."""
+    plt.switch_backend('Agg')
+    setup_plot_style()
+    set_name_pattern(name_pattern, vdd_codes)
+    enable_tracing(trace)
+    drain_events()  # Forked workers start with a copy of the parent's spans
+    # Pool workers leave through multiprocessing, which runs its finalizers but not atexit
+    multiprocessing.util.Finalize(None, close_renderers, exitpriority=10)
+
+
+def render_corner_plot(file_path, plots_dir, pdf=None, save_png=True, dataset=None):
+    """
+    Parse, split, plot and save one corner.
+    Runs in a worker process, so errors are returned instead of printed.
     
     Args:
-        file_path: Path to the file
+        file_path: Path to the result file
+        plots_dir: Directory to save the plot
+        pdf: Optional PdfPages stream to write the plot to
+        save_png: Save the plot as a PNG in plots_dir
+        dataset: Optional CornerDataset to read the file through
         
     Returns:
-        Tuple of (process, voltage_offset, temperature, is_iin)
+        Tuple of (file_path, output_path, error) where error is None on success
+        (output_path is None when no PNG was saved)
     """
+    process, voltage_offset, temperature, is_iin = parse_filename(file_path)
+    if process is None:
+        return file_path, None, "Unrecognized file name"
+    
+    # Create output filename
     filename = os.path.basename(file_path)
-    is_iin = filename.endswith('_Iin') or '_Iin' in filename
+    output_path = os.path.join(plots_dir, f"{filename}_plot.png") if save_png else None
     
-    if is_iin:
-        match = re.match(r'^(ss|tt|ff)_(0|01|10)_(0|27|50)_Iin$', filename)
-    else:
-        match = re.match(r'^(ss|tt|ff)_(0|01|10)_(0|27|50)$', filename)
+    try:
+        with span('render_corner_plot', 'file', file=filename):
+            split_data = dataset.load(file_path) if dataset is not None else read_and_split_data(file_path)
+            plot_voltage_sweep(split_data, output_path, process, voltage_offset, temperature,
+                               verbose=False, pdf=pdf, reuse=True)
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}"
     
-    if match:
-        return match.group(1), match.group(2), match.group(3), is_iin
-    return None, None, None, is_iin
+    return file_path, output_path, None
 
 
-def main():
-    """Main function to process all result files and generate plots."""
-    # Setup
-    setup_plot_style()
-    current_path = os.path.dirname(os.path.abspath(__file__))
-    results_dir = os.path.join(current_path, 'results')
-    plots_dir = os.path.join(current_path, 'plots')
+def render_corner_plot_traced(file_path, plots_dir):
+    """Run render_corner_plot in a worker and return its result together with the recorded spans."""
+    return render_corner_plot(file_path, plots_dir), drain_events()
+
+
+def render_corner_plots(regular_files, plots_dir, jobs=1, dataset=None):
+    """
+    Render the plot of every corner, optionally on a pool of worker processes.
     
-    # Create plots directory if it doesn't exist
-    os.makedirs(plots_dir, exist_ok=True)
+    Args:
+        regular_files: List of paths to regular result files
+        plots_dir: Directory to save the plots
+        jobs: Number of worker processes (1 renders in this process,
+            None or 0 uses all CPU cores)
+        dataset: Optional CornerDataset to read the files through (only used
+            when rendering in this process; workers read their own corner)
+        
+    Returns:
+        List of (file_path, output_path, error) tuples in the order of regular_files
+    """
+    if jobs == 1:
+        return [render_corner_plot(file_path, plots_dir, dataset=dataset) for file_path in regular_files]
+    
+    max_workers = jobs or os.cpu_count()
+    chunksize = max(1, len(regular_files) // (4 * max_workers))
+    trace = is_tracing_enabled()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_plot_worker,
+                             initargs=(trace,) + get_name_settings()) as executor:
+        # map() yields results in submission order, so the output is deterministic
+        if not trace:
+            return list(executor.map(render_corner_plot, regular_files,
+                                     [plots_dir] * len(regular_files), chunksize=chunksize))
+        
+        # Workers send their spans back with each result
+        results = []
+        for result, events in executor.map(render_corner_plot_traced, regular_files,
+                                           [plots_dir] * len(regular_files), chunksize=chunksize):
+            results.append(result)
+            add_events(events)
+        return results
+
+
+def read_corner(item):
+    """
+    Reader stage of the corner pipeline: load the columns of a result file.
+    Copies the data out of the cache memory map, so the disk read happens here.
     
-    # Find all result files
-    regular_files, iin_files = find_result_files(results_dir)
+    Args:
+        item: Tuple of (file_path, kind) with kind 'sweep' or 'iin'
+        
+    Returns:
+        Tuple of (file_path, kind, columns)
+    """
+    file_path, kind = item
+    with span('read', 'file', file=os.path.basename(file_path)):
+        return file_path, kind, np.array(load_result_columns(file_path))
+
+
+def compute_corner(item):
+    """
+    Compute stage of the corner pipeline: split a sweep into experiments and
+    compute its metrics, or fit the error trendline of an _Iin file.
     
-    print(f"Found {len(regular_files)} regular files and {len(iin_files)} _Iin files")
+    Args:
+        item: Tuple of (file_path, kind, columns) from read_corner
+        
+    Returns:
+        Tuple of (file_path, kind, data) where data is (split_data, metric_rows)
+        for a sweep and (sweep_smooth, trendline) for an _Iin file
+    """
+    file_path, kind, columns = item
+    with span('compute', 'file', file=os.path.basename(file_path)):
+        if kind == 'iin':
+            sweep, i_out = stack_iin_curves([(columns[:, 0], columns[:, 1])])
+            sweep_smooth, trendlines = fit_error_trendlines(sweep, current_errors(sweep, i_out))
+            return file_path, kind, (sweep_smooth, trendlines[0])
+        
+        split_data = split_experiments(columns[:, 0], columns[:, 1])
+        process, voltage_offset, temperature, _ = parse_filename(file_path)
+        corner = (process, get_vdd_numeric(voltage_offset), float(temperature)) + split_data
+        axes, sweep, tensor = build_pvt_tensor([corner], get_iin_values(len(split_data[1])))
+        return file_path, kind, (split_data, compute_pvt_metrics(axes, sweep, tensor).to_dict('records'))
+
+
+def encode_corner(item, plots_dir, draw=True):
+    """
+    Encoder stage of the corner pipeline: draw the plot of a sweep and write
+    the PNG. Runs in a worker process and sends its spans back with the result.
     
-    # Process regular files
-    for file_path in regular_files:
-        process, voltage_offset, temperature, is_iin = parse_filename(file_path)
-        if process is None:
+    Args:
+        item: Tuple of (file_path, kind, data) from compute_corner
+        plots_dir: Directory to save the plot
+        draw: Set to False to only pass the metrics on
+        
+    Returns:
+        Tuple of (file_path, kind, data, events) where data is (output_path,
+        metric_rows) for a sweep and unchanged for an _Iin file
+    """
+    file_path, kind, data = item
+    if kind == 'iin':
+        return file_path, kind, data, drain_events()
+    
+    split_data, rows = data
+    output_path = None
+    if draw:
+        process, voltage_offset, temperature, _ = parse_filename(file_path)
+        filename = os.path.basename(file_path)
+        output_path = os.path.join(plots_dir, f"{filename}_plot.png")
+        with span('encode', 'file', file=filename):
+            plot_voltage_sweep(split_data, output_path, process, voltage_offset, temperature,
+                               verbose=False, reuse=True)
+    return file_path, kind, (output_path, rows), drain_events()
+
+
+def run_corner_pipeline(regular_files, iin_files, plots_dir, jobs=1, queue_size=DEFAULT_QUEUE_SIZE,
+                        draw=True):
+    """
+    Read, compute and plot all corners in a staged pipeline (see staged_pipeline).
+    Files are read on a thread, split and reduced to metrics and error fits on
+    a second thread (NumPy releases the GIL), and drawn and PNG-encoded on
+    worker processes. The stages overlap, so the next files are read and
+    computed while earlier plots are encoded, and bounded queues between them
+    keep only a few corners in memory.
+    
+    Args:
+        regular_files: List of paths to regular result files
+        iin_files: List of paths to _Iin files (only their trendlines are computed)
+        plots_dir: Directory to save the plots
+        jobs: Number of encoder processes (None or 0 uses all CPU cores)
+        queue_size: Capacity of the queues between the stages
+        draw: Set to False to only compute the metrics and trendlines
+        
+    Returns:
+        Tuple of (results, metric_rows, trendlines): (file_path, output_path, error)
+        tuples in the order of regular_files, the numeric metric rows of all
+        corners, and the trendlines for plot_combined_error_trendlines
+    """
+    items = [(file_path, 'sweep') for file_path in regular_files] + [(file_path, 'iin') for file_path in iin_files]
+    max_workers = jobs or os.cpu_count()
+    with ThreadPoolExecutor(max_workers=1) as reader, ThreadPoolExecutor(max_workers=1) as computer, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=init_plot_worker,
+                                initargs=(is_tracing_enabled(),) + get_name_settings()) as encoder:
+        stages = [Stage('read', read_corner, reader),
+                  Stage('compute', compute_corner, computer),
+                  Stage('encode', partial(encode_corner, plots_dir=plots_dir, draw=draw), encoder, max_workers)]
+        outputs, wall_time = run_stages(items, stages, queue_size)
+    print(format_stage_times(stages, wall_time))
+    
+    results, metric_rows, trendlines = [], [], {}
+    for (file_path, kind), output, error in outputs:
+        if error is not None:
+            if kind == 'sweep':
+                results.append((file_path, None, error))
+            else:
+                print(f"Error processing {file_path} for combined plot: {error}")
             continue
         
-        try:
-            # Read and split data
-            split_data = read_and_split_data(file_path)
+        add_events(output[3])
+        if kind == 'iin':
+            trendlines[file_path] = output[2]
+        else:
+            output_path, rows = output[2]
+            results.append((file_path, output_path, None))
+            metric_rows.extend(rows)
+    return results, metric_rows, trendlines
+
+
+def write_streaming_report(regular_files, iin_files, plots_dir, results_dir, save_png=True,
+                           dataset=None, outputs=OUTPUT_KINDS):
+    """
+    Write every plot straight into all_plots.pdf as vector pages while it is created.
+    Only one figure is alive at a time, so memory does not grow with the number
+    of corners. The PDF is a single stream, so the plots are rendered in this process.
+    
+    Args:
+        regular_files: List of paths to regular result files
+        iin_files: List of paths to _Iin files
+        plots_dir: Directory to save the PDF (and PNGs)
+        results_dir: Directory containing result files
+        save_png: Also save each plot as a PNG
+        dataset: Optional CornerDataset to read the files through
+        outputs: Plots to include (see OUTPUT_KINDS, only 'plots' and 'errors' apply)
+        
+    Returns:
+        List of (file_path, output_path, error) tuples in the order of regular_files
+    """
+    pdf_path = os.path.join(plots_dir, 'all_plots.pdf')
+    results = []
+    
+    with PdfPages(pdf_path) as pdf:
+        for file_path in regular_files if 'plots' in outputs else []:
+            results.append(render_corner_plot(file_path, plots_dir, pdf=pdf, save_png=save_png,
+                                              dataset=dataset))
+        
+        if iin_files and 'errors' in outputs:
+            plot_combined_error_trendlines(iin_files, plots_dir, results_dir,
+                                           pdf=pdf, save_png=save_png, dataset=dataset)
+        
+        n_pages = pdf.get_pagecount()
+    
+    print(f"\nWrote {n_pages} plots into: {pdf_path}")
+    return results
+
+
+def get_code_version():
+    """Get a version string covering the pipeline source code and the plot style."""
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    sources = [os.path.join(current_path, name) for name in PIPELINE_SOURCES]
+    return hash_files(sources, extra=f"style={PLOT_STYLE_VERSION}")
+
+
+def build_incremental(regular_files, iin_files, plots_dir, results_dir, jobs=1, report='merge',
+                      dataset=None, outputs=OUTPUT_KINDS):
+    """
+    Rebuild only the outputs whose inputs changed since the last run.
+    The build manifest in plots_dir records the content hash of every input
+    and the code version. Corner plots are re-rendered per file, and the
+    metrics table and combined trendline plot are patched by recomputing
+    only the rows and fits of changed files.
+    
+    Args:
+        regular_files: List of paths to regular result files
+        iin_files: List of paths to _Iin files
+        plots_dir: Directory to save the outputs and the manifest
+        results_dir: Directory containing result files
+        jobs: Number of worker processes used to render the corner plots
+        report: 'merge' to rebuild all_plots.pdf when a plot changed, 'none' to skip it
+        dataset: Optional CornerDataset to read the files through
+        outputs: Outputs to build (see OUTPUT_KINDS, 'pdf' is controlled by report)
+        
+    Returns:
+        List of (file_path, output_path, error) tuples for the re-rendered corners
+    """
+    manifest = load_manifest(plots_dir, get_code_version())
+    digests = {file_path: input_digest(manifest, file_path) for file_path in regular_files + iin_files}
+    
+    # Corner plots: only re-render the corners whose input changed
+    stale_files = []
+    for file_path in regular_files if 'plots' in outputs else []:
+        output_path = os.path.join(plots_dir, f"{os.path.basename(file_path)}_plot.png")
+        if not is_up_to_date(manifest, output_path, {file_path: digests[file_path]}):
+            stale_files.append(file_path)
+    
+    results = render_corner_plots(stale_files, plots_dir, jobs, dataset)
+    for file_path, output_path, error in results:
+        if error is None:
+            record_output(manifest, output_path, {file_path: digests[file_path]})
+    
+    if 'plots' in outputs:
+        print(f"Re-rendered {len(stale_files)} of {len(regular_files)} corner plots")
+    
+    # Combined trendlines: only refit the _Iin files that changed
+    trendline_files = iin_files if 'errors' in outputs else []
+    cached_trendlines = manifest['trendlines']
+    trendlines = {}
+    changed_iin_files = []
+    for file_path in trendline_files:
+        entry = cached_trendlines.get(os.path.abspath(file_path))
+        if entry is not None and entry['sha1'] == digests[file_path]:
+            trendlines[file_path] = (np.array(entry['x']), np.array(entry['y']))
+        else:
+            changed_iin_files.append(file_path)
+    
+    for file_path, (sweep_smooth, trendline) in compute_error_trendlines(changed_iin_files, dataset).items():
+        trendlines[file_path] = (sweep_smooth, trendline)
+        cached_trendlines[os.path.abspath(file_path)] = {
+            'sha1': digests[file_path], 'x': sweep_smooth.tolist(), 'y': trendline.tolist()
+        }
+    
+    combined_path = os.path.join(plots_dir, 'combined_error_trendlines.png')
+    combined_inputs = {file_path: digests[file_path] for file_path in trendline_files}
+    if trendline_files and not is_up_to_date(manifest, combined_path, combined_inputs):
+        plot_combined_error_trendlines(trendline_files, plots_dir, results_dir, trendlines=trendlines)
+        record_output(manifest, combined_path, combined_inputs)
+    
+    # Merge all plots into a single PDF if any page changed
+    pdf_path = os.path.join(plots_dir, 'all_plots.pdf')
+    if report == 'merge' and not is_up_to_date(manifest, pdf_path, digests):
+        merge_plots_to_pdf(plots_dir)
+        if os.path.exists(pdf_path):
+            record_output(manifest, pdf_path, digests)
+    
+    # Metrics table: only recompute the rows of changed corners
+    cached_rows = manifest['metrics_rows']
+    table_data = []
+    for file_path in regular_files if 'metrics' in outputs else []:
+        entry = cached_rows.get(os.path.abspath(file_path))
+        if entry is None or entry['sha1'] != digests[file_path]:
+            try:
+                entry = {'sha1': digests[file_path], 'rows': compute_corner_metrics(file_path, dataset)}
+            except Exception as e:
+                print(f"Error processing {file_path} for metrics: {e}")
+                continue
+            cached_rows[os.path.abspath(file_path)] = entry
+        table_data.extend(entry['rows'])
+    
+    csv_path = os.path.join(plots_dir, 'simulation_metrics.csv')
+    metric_inputs = {file_path: digests[file_path] for file_path in regular_files + iin_files}
+    if 'metrics' in outputs and not is_up_to_date(manifest, csv_path, metric_inputs):
+        write_metrics_table(table_data, plots_dir, iin_files, dataset)
+        record_output(manifest, csv_path, metric_inputs)
+    
+    # Forget files that are no longer in the results directory (files left out
+    # by a filter are kept, so a later full build can reuse them)
+    for key in ['inputs', 'trendlines', 'metrics_rows']:
+        manifest[key] = {path: entry for path, entry in manifest[key].items() if os.path.exists(path)}
+    
+    save_manifest(plots_dir, manifest)
+    return results
+
+
+def watch_results(results_dir, plots_dir, jobs=1, report='none', polling=False, debounce=1.0,
+                  filters=None, outputs=OUTPUT_KINDS):
+    """
+    Rebuild the outputs of every result file that lands in results_dir until interrupted.
+    Uses inotify where available and polls otherwise. Bursts of events are
+    debounced, files that are still being written are skipped until they are
+    complete, and only the changed corners are re-rendered, with their metric
+    rows and the combined trendline plot updated (see build_incremental).
+    
+    Args:
+        results_dir: Directory containing result files
+        plots_dir: Directory to save the outputs and the manifest
+        jobs: Number of worker processes used to render the corner plots
+        report: 'merge' to rebuild all_plots.pdf after every change, 'none' to skip it
+        polling: Poll instead of using inotify
+        debounce: Seconds without events that end a burst
+        filters: Optional corner filters (see corner_selected)
+        outputs: Outputs to build (see OUTPUT_KINDS)
+    """
+    watcher = make_watcher(results_dir, polling=polling, interval=debounce)
+    print(f"Watching {results_dir} ({type(watcher).__name__}), press Ctrl+C to stop")
+    
+    try:
+        while True:
+            dataset = CornerDataset.from_results_dir(results_dir, filters=filters)
+            # Skip files that are still being written, their close triggers a new event
+            regular_files = [f for f in dataset.regular_files if is_write_complete(f)]
+            iin_files = [f for f in dataset.iin_files if is_write_complete(f)]
+            unknown_codes = find_unknown_vdd_codes(regular_files + iin_files)
+            if unknown_codes:
+                print(f"Skipping the voltage offsets {', '.join(unknown_codes)}: no supply voltage "
+                      f"(give them with --vdd-codes)")
+                regular_files = [f for f in regular_files if parse_filename(f)[1] not in unknown_codes]
+                iin_files = [f for f in iin_files if parse_filename(f)[1] not in unknown_codes]
             
-            # Create output filename
-            filename = os.path.basename(file_path)
-            output_filename = f"{filename}_plot.png"
-            output_path = os.path.join(plots_dir, output_filename)
+            results = build_incremental(regular_files, iin_files, plots_dir, results_dir, jobs, report,
+                                        dataset, outputs)
+            for file_path, output_path, error in results:
+                if error is not None:
+                    print(f"  {file_path}: {error}")
+            close_renderers()  # Do not hold the figures while idle
             
-            # Plot
-            plot_voltage_sweep(split_data, output_path, process, voltage_offset, temperature)
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
-    # Process _Iin files - create combined plot with trendlines only
-    if iin_files:
-        plot_combined_error_trendlines(iin_files, plots_dir, results_dir)
+            # Wait for a result file to be written, moved in or removed
+            while True:
+                names = wait_for_changes(watcher, debounce)
+                changed = sorted(name for name in names
+                                 if parse_filename(name)[0] is not None
+                                 and corner_selected(*parse_filename(name)[:3], filters))
+                if changed:
+                    break
+            print(f"\nChanged: {', '.join(changed)}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+
+
+def write_trace(trace_path):
+    """
+    Write the recorded spans as Chrome trace JSON and print a summary table.
+    The summary is also saved next to the trace as <name>_summary.txt.
+    
+    Args:
+        trace_path: Path of the trace JSON file
+    """
+    events = drain_events()
+    write_chrome_trace(trace_path, events)
+    summary = format_summary(summarize(events))
+    with open(os.path.splitext(trace_path)[0] + '_summary.txt', 'w') as f:
+        f.write(summary + '\n')
+    print(f"\nWrote trace to: {trace_path}\n{summary}")
+
+
+def main(jobs=1, report='merge', save_png=True, incremental=False, trace_path=None, export=None,
+         watch=False, polling=False, filters=None, outputs=OUTPUT_KINDS, name_pattern=None,
+         pipeline=False, queue_size=DEFAULT_QUEUE_SIZE, vdd_codes=None):
+    """
+    Main function to process all result files and generate plots.
+    
+    Args:
+        jobs: Number of worker processes used to render the corner plots
+        report: How all_plots.pdf is made: 'merge' merges the saved PNGs,
+            'stream' writes vector pages while plotting, 'none' skips the PDF
+        save_png: Save each plot as a PNG (only optional with report='stream')
+        incremental: Only rebuild outputs whose inputs changed (not with report='stream')
+        trace_path: Record the time, CPU, peak RSS and bytes read of every stage
+            and file, and write them as Chrome trace JSON to this path
+        export: Also export all curves and metrics to plots/dataset in this
+            format ('parquet' or 'arrow', needs pyarrow)
+        watch: Keep running and rebuild the outputs of result files as they
+            are written (see watch_results)
+        polling: Poll the results directory instead of using inotify in watch mode
+        filters: Only process the corners that pass these filters (see corner_selected)
+        outputs: Outputs to build (see OUTPUT_KINDS); without 'pdf' no report is made
+        name_pattern: File name grammar of the result files (see set_name_pattern)
+        pipeline: Read, compute and encode the corners in overlapping stages
+            (see run_corner_pipeline)
+        queue_size: Capacity of the queues between the pipeline stages
+        vdd_codes: Supply voltage of each voltage offset code (see set_name_pattern)
+    """
+    if trace_path is not None:
+        enable_tracing()
+    if name_pattern is not None or vdd_codes is not None:
+        set_name_pattern(get_name_settings()[0] if name_pattern is None else name_pattern, vdd_codes)
+    if 'pdf' not in outputs:
+        report = 'none'
+    
+    # Setup
+    setup_plot_style()
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    results_dir = os.path.join(current_path, 'results')
+    plots_dir = os.path.join(current_path, 'plots')
     
-    print(f"\nAll plots saved to: {plots_dir}")
+    # Create plots directory if it doesn't exist
+    os.makedirs(plots_dir, exist_ok=True)
     
-    # Merge all plots into a single PDF
-    merge_plots_to_pdf(plots_dir)
+    try:
+        if watch:
+            if report == 'stream':
+                print("The streaming report is not written in watch mode, using --report none")
+                report = 'none'
+            watch_results(results_dir, plots_dir, jobs, report, polling, filters=filters, outputs=outputs)
+            return
+        
+        # Find the selected result files; every file is read at most once through the dataset
+        with span('find_result_files'):
+            dataset = CornerDataset.from_results_dir(results_dir, filters=filters)
+        regular_files, iin_files = dataset.regular_files, dataset.iin_files
+        
+        print(f"Found {len(regular_files)} regular files and {len(iin_files)} _Iin files")
+        
+        unknown_codes = find_unknown_vdd_codes(regular_files + iin_files)
+        if unknown_codes:
+            print(f"Error: no supply voltage for the voltage offsets {', '.join(unknown_codes)}, "
+                  f"give them with --vdd-codes (e.g. {unknown_codes[0]}=0.95)")
+            return
+        
+        if report != 'stream' and not save_png:
+            print("PNGs can only be skipped with the streaming report, saving them anyway")
+            save_png = True
+        if report == 'stream' and incremental:
+            print("The streaming report is always written in full, ignoring --incremental")
+            incremental = False
+        if pipeline and (incremental or report == 'stream'):
+            print("The pipeline is not used with --incremental or the streaming report")
+            pipeline = False
+        
+        # Process regular files and _Iin files (combined plot with trendlines only)
+        if incremental:
+            with span('build_incremental'):
+                results = build_incremental(regular_files, iin_files, plots_dir, results_dir, jobs, report,
+                                            dataset, outputs)
+        elif report == 'stream':
+            with span('write_streaming_report'):
+                results = write_streaming_report(regular_files, iin_files, plots_dir, results_dir, save_png,
+                                                 dataset, outputs)
+        elif pipeline:
+            with span('run_corner_pipeline', jobs=jobs):
+                results, metric_rows, trendlines = run_corner_pipeline(
+                    regular_files if {'plots', 'metrics'} & set(outputs) else [],
+                    iin_files if 'errors' in outputs else [], plots_dir, jobs, queue_size,
+                    draw='plots' in outputs)
+            if 'plots' not in outputs:
+                results = []
+            if iin_files and 'errors' in outputs:
+                with span('plot_combined_error_trendlines'):
+                    plot_combined_error_trendlines(iin_files, plots_dir, results_dir, trendlines=trendlines)
+        else:
+            results = []
+            if 'plots' in outputs:
+                with span('render_corner_plots', jobs=jobs):
+                    results = render_corner_plots(regular_files, plots_dir, jobs, dataset)
+            if iin_files and 'errors' in outputs:
+                with span('plot_combined_error_trendlines'):
+                    plot_combined_error_trendlines(iin_files, plots_dir, results_dir, dataset=dataset)
+        
+        errors = []
+        for file_path, output_path, error in results:
+            if error is not None:
+                errors.append((file_path, error))
+            elif output_path is not None:
+                print(f"Saved plot: {output_path}")
+        
+        print(f"\nAll plots saved to: {plots_dir}")
+        
+        if errors:
+            print(f"\n{len(errors)} file(s) could not be plotted:")
+            for file_path, error in errors:
+                print(f"  {file_path}: {error}")
+        
+        if not incremental:
+            # Merge all plots into a single PDF
+            if report == 'merge':
+                with span('merge_plots_to_pdf'):
+                    merge_plots_to_pdf(plots_dir)
+        
+            # Generate comprehensive metrics table
+            if 'metrics' in outputs and pipeline:
+                with span('write_metrics_table'):
+                    if metric_rows:
+                        write_metrics_table(metric_rows, plots_dir, iin_files, dataset)
+                    else:
+                        print("No result files found for metrics.")
+            elif 'metrics' in outputs:
+                with span('generate_metrics_table'):
+                    generate_metrics_table(results_dir, plots_dir, dataset)
+        
+        if export is not None:
+            with span('export_corner_data'):
+                try:
+                    export_corner_data(dataset, os.path.join(plots_dir, 'dataset'), export)
+                except ImportError as e:
+                    print(f"Skipping export: {e}")
+        
+        if trace_path is not None:
+            write_trace(trace_path)
+    finally:
+        close_renderers()
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Plot AIM-Spice corner simulation results.")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="Number of worker processes for rendering plots (0 = all cores)")
+    parser.add_argument('--report', choices=['merge', 'stream', 'none'], default='merge',
+                        help="merge: merge PNGs into all_plots.pdf, stream: write vector "
+                             "pages while plotting, none: no PDF")
+    parser.add_argument('--no-png', action='store_true',
+                        help="Do not save PNGs (requires --report stream)")
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help="Only rebuild outputs whose inputs changed since the last run")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="Write a Chrome trace (JSON) of every stage and file to PATH and "
+                             "print a summary table")
+    parser.add_argument('--export', choices=['parquet', 'arrow'],
+                        help="Also export all curves and metrics as a partitioned dataset to plots/dataset")
+    parser.add_argument('-w', '--watch', action='store_true',
+                        help="Keep running and rebuild the outputs of result files as they are written")
+    parser.add_argument('--poll', action='store_true',
+                        help="Poll the results directory instead of using inotify (with --watch)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Overlap reading, computing and PNG encoding of the corners in a staged pipeline")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Corners held between two pipeline stages (with --pipeline)")
+    
+    # Corner selection
+    parser.add_argument('--process', nargs='+', help="Only these process corners, e.g. tt ss")
+    parser.add_argument('--vdd', nargs='+', help="Only these voltage offsets as in the file names (01, 0, 10)")
+    parser.add_argument('--temp', nargs='+', type=float, help="Only these temperatures in °C")
+    parser.add_argument('--outputs', nargs='+', choices=OUTPUT_KINDS, default=list(OUTPUT_KINDS),
+                        help="Outputs to build: corner plots, combined error plot, metrics table, PDF")
+    parser.add_argument('--name-pattern', default=DEFAULT_NAME_PATTERN,
+                        help="Regular expression for result file names with the named groups "
+                             "process, voltage_offset, temperature and iin")
+    parser.add_argument('--vdd-codes', nargs='+', metavar='CODE=VOLTS',
+                        help="Supply voltage of every voltage offset code the name pattern allows "
+                             "(default: 01=0.9 0=1.0 10=1.1)")
+    args = parser.parse_args(argv)
     
-    # Generate comprehensive metrics table
-    generate_metrics_table(results_dir, plots_dir)
+    try:
+        args.vdd_codes = parse_vdd_codes(args.vdd_codes) if args.vdd_codes else None
+    except ValueError as e:
+        parser.error(f"invalid --vdd-codes: {e}")
+    try:
+        set_name_pattern(args.name_pattern, args.vdd_codes)
+    except (re.error, ValueError) as e:
+        parser.error(f"invalid --name-pattern: {e}")
+    return args
 
 
 def merge_plots_to_pdf(plots_dir):
@@ -497,7 +1356,6 @@ def merge_plots_to_pdf(plots_dir):
         print(f"Error merging plots to PDF: {e}")
         # Fallback: try using matplotlib's PdfPages
         try:
-            from matplotlib.backends.backend_pdf import PdfPages
             with PdfPages(pdf_path) as pdf:
                 for plot_file in sorted_plots:
                     img_path = os.path.join(plots_dir, plot_file)
@@ -514,166 +1372,212 @@ def merge_plots_to_pdf(plots_dir):
             print(f"Error with matplotlib PDF backend: {e2}")
 
 
-def get_vdd_value(voltage_offset):
-    """Convert voltage offset string to actual V_DD value."""
-    if voltage_offset == "01":
-        return "0.9V"  # -10%
-    elif voltage_offset == "10":
-        return "1.1V"  # +10%
-    else:
-        return "1.0V"  # nominal (0)
-
-
-def get_vdd_numeric(voltage_offset):
-    """Convert voltage offset string to numeric V_DD value."""
-    if voltage_offset == "01":
-        return 0.9  # -10%
-    elif voltage_offset == "10":
-        return 1.1  # +10%
-    else:
-        return 1.0  # nominal (0)
-
-
 def interpolate_value(x_data, y_data, target_x):
-    """Interpolate y value at target_x from x_data and y_data."""
-    # Find the closest points
-    idx = np.searchsorted(x_data, target_x)
-    
-    if idx == 0:
-        return y_data[0]
-    elif idx >= len(x_data):
-        return y_data[-1]
-    else:
-        # Linear interpolation
-        x1, x2 = x_data[idx-1], x_data[idx]
-        y1, y2 = y_data[idx-1], y_data[idx]
-        return y1 + (y2 - y1) * (target_x - x1) / (x2 - x1)
+    """Interpolate y value at target_x from x_data and y_data (held at the end values outside)."""
+    return np.interp(target_x, x_data, y_data)
 
 
-def calculate_error_percentage(iin_file_path, target_iin):
+def calculate_error_percentage(iin_file_path, target_iin, dataset=None):
     """
-    Calculate error percentage from Iin file for a specific input current.
+    Calculate error percentage from Iin file for a specific input current
+    (one file of compute_iin_errors).
     
     Args:
         iin_file_path: Path to the _Iin file
         target_iin: Target input current in Amperes (e.g., 40e-6)
+        dataset: Optional CornerDataset to read the file through
         
     Returns:
-        Error percentage
+        Error percentage (0.0 if the file cannot be read)
     """
-    try:
-        iin_data = read_iin_data(iin_file_path)
-        sweep_current = np.array(iin_data['sweep_current'], dtype=np.float64)
-        id_current = np.array(iin_data['id_current'], dtype=np.float64)
+    loaded_files, _, percent_error = compute_iin_errors([iin_file_path], [target_iin], dataset)
+    return float(percent_error[0, 0]) if loaded_files else 0.0
+
+
+def load_pvt_tensor(regular_files, dataset=None):
+    """
+    Load all corners into one dense array indexed by process x VDD x temperature x I_in x sweep.
+    
+    Args:
+        regular_files: List of paths to regular result files
+        dataset: Optional CornerDataset to read the files through
         
-        # Find closest sweep current to target
-        idx = np.argmin(np.abs(sweep_current - target_iin))
+    Returns:
+        Tuple of (axes, sweep, tensor), see pvt_metrics.build_pvt_tensor
+    """
+    corners = []
+    for file_path in regular_files:
+        process, voltage_offset, temperature, is_iin = parse_filename(file_path)
+        if process is None:
+            continue
         
-        if idx < len(sweep_current):
-            i_sweep = sweep_current[idx]
-            i_drain = id_current[idx]
-            
-            if abs(i_sweep) > 1e-10:  # Avoid division by zero
-                error_pct = abs((i_sweep - i_drain) / i_sweep) * 100
-                return error_pct
+        try:
+            if dataset is not None:
+                sweep_values, currents = dataset.load(file_path)
+            else:
+                sweep_values, currents = read_and_split_data(file_path)
+        except Exception as e:
+            print(f"Error processing {file_path} for metrics: {e}")
+            continue
         
-        return 0.0
-    except:
-        return 0.0
+        corners.append((process, get_vdd_numeric(voltage_offset), float(temperature),
+                        sweep_values, currents))
+    
+    n_experiments = max((len(corner[4]) for corner in corners), default=0)
+    return build_pvt_tensor(corners, get_iin_values(n_experiments))
 
 
-def generate_metrics_table(results_dir, plots_dir):
+def compute_corner_metrics(file_path, dataset=None):
     """
-    Generate a comprehensive table with key metrics from all 27 simulations.
+    Compute the key metrics of every experiment in one corner.
+    
+    Args:
+        file_path: Path to the regular result file
+        dataset: Optional CornerDataset to read the file through
+        
+    Returns:
+        List of numeric table rows (dicts), one per input current
+    """
+    axes, sweep, tensor = load_pvt_tensor([file_path], dataset)
+    if tensor.size == 0:
+        return []
+    return compute_pvt_metrics(axes, sweep, tensor).to_dict('records')
+
+
+def export_corner_data(dataset, export_dir, file_format='parquet'):
+    """
+    Export every sweep and _Iin curve and the numeric metrics as a partitioned
+    Parquet/Arrow dataset (see columnar_export; needs pyarrow).
+    
+    Args:
+        dataset: CornerDataset with the corners to export
+        export_dir: Output directory (curves/ and metrics/ are replaced)
+        file_format: 'parquet' or 'arrow'
+    """
+    curves = []
+    for process, voltage_offset, temperature, kind in dataset.keys():
+        data = dataset[(process, voltage_offset, temperature, kind)]
+        if kind == 'sweep':
+            sweep_values, currents = data
+            iin = np.repeat(get_iin_values(len(currents)), len(sweep_values))
+            vout, i_out = np.tile(sweep_values, len(currents)), np.ravel(currents)
+        else:
+            iin, i_out = data['sweep_current'], data['id_current']
+            vout = np.full(len(iin), np.nan)
+        curves.append(curve_table(process, get_vdd_numeric(voltage_offset), float(temperature), kind,
+                                  iin, vout, i_out))
+    
+    if not curves:
+        print("No result files found to export.")
+        return
+    
+    axes, sweep, tensor = load_pvt_tensor(dataset.regular_files, dataset)
+    metrics = metrics_table(compute_pvt_metrics(axes, sweep, tensor)) if tensor.size else None
+    
+    n_rows = export_tables(export_dir, curves, metrics, file_format)
+    print(f"Exported {n_rows} curve points of {len(curves)} files to: {export_dir}")
+
+
+def generate_metrics_table(results_dir, plots_dir, dataset=None):
+    """
+    Generate a comprehensive table with key metrics from all simulations.
+    All corners are stacked into one array and every metric is computed in a
+    single vectorized pass.
     
     Args:
         results_dir: Directory containing result files
         plots_dir: Directory to save the output table
+        dataset: Optional CornerDataset to read the files through (results_dir is
+            then not searched again)
     """
-    # Find all regular result files
-    regular_files, _ = find_result_files(results_dir)
+    # Find all result files
+    if dataset is not None:
+        regular_files, iin_files = dataset.regular_files, dataset.iin_files
+    else:
+        regular_files, iin_files = find_result_files(results_dir)
     
-    # Input currents for the three experiments
-    iin_values = [40e-6, 45e-6, 50e-6]  # 40µA, 45µA, 50µA
-    iin_labels = ["40µA", "45µA", "50µA"]
+    axes, sweep, tensor = load_pvt_tensor(regular_files, dataset)
+    if tensor.size == 0:
+        print("No result files found for metrics.")
+        return
     
-    # Store all metrics
-    table_data = []
+    write_metrics_table(compute_pvt_metrics(axes, sweep, tensor), plots_dir, iin_files, dataset)
+
+
+def format_metrics_table(df):
+    """
+    Format a numeric metrics table with units for writing out.
     
-    for file_path in regular_files:
-        process, voltage_offset, temperature, is_iin = parse_filename(file_path)
-        if process is None:
-            continue
+    Args:
+        df: Numeric DataFrame from compute_pvt_metrics (SI units)
         
-        try:
-            # Read and split data
-            split_data = read_and_split_data(file_path)
-            
-            # Get V_DD value
-            vdd_str = get_vdd_value(voltage_offset)
-            vdd_num = get_vdd_numeric(voltage_offset)
-            
-            # Process each of the three experiments
-            for exp_idx, (iin_val, iin_label) in enumerate(zip(iin_values, iin_labels)):
-                # Get experiment data
-                if exp_idx == 0:
-                    current_data = split_data['id_exp1'].values
-                elif exp_idx == 1:
-                    current_data = split_data['id_exp2'].values
-                else:
-                    current_data = split_data['id_exp3'].values
-                
-                voltage_data = split_data['sweep'].values
-                
-                # Find V_out,min: lowest voltage where I_out is within 1% of I_in
-                # I_out should be between 0.99 * I_in and 1.01 * I_in
-                lower_bound = 0.99 * iin_val
-                upper_bound = 1.01 * iin_val
-                
-                # Find indices where current is within 1% of I_in
-                within_range = np.where((current_data >= lower_bound) & (current_data <= upper_bound))[0]
-                
-                if len(within_range) > 0:
-                    v_out_min = voltage_data[within_range[0]]  # First (lowest) voltage where condition is met
-                else:
-                    # If no exact match, find closest
-                    diff = np.abs(current_data - iin_val)
-                    closest_idx = np.argmin(diff)
-                    v_out_min = voltage_data[closest_idx]
-                
-                # Find I_out @ V_out=0.9V (interpolate)
-                i_out_09v = interpolate_value(voltage_data, current_data, 0.9)
-                
-                # Calculate power: P = (50 + 35 + I_out @ V_out) * 0.9
-                # Where 50 and 35 are in µA, I_out is in µA, 0.9 is voltage in V
-                i_out_09v_ua = i_out_09v * 1e6  # Convert to µA
-                power_uw = (50 + 35 + i_out_09v_ua) * 0.9  # Result in µW
-                
-                # Add row to table
-                table_data.append({
-                    'Process': process.upper(),
-                    'V_DD': vdd_str,
-                    'Temp': f"{temperature}°C",
-                    'I_in': iin_label,
-                    'V_out,min': f"{v_out_min:.3f}V",
-                    'I_out @ V_out=0.9V': f"{i_out_09v*1e6:.2f}µA",
-                    'Power': f"{power_uw:.2f}µW"
-                })
-                
-        except Exception as e:
-            print(f"Error processing {file_path} for metrics: {e}")
+    Returns:
+        DataFrame of strings, e.g. "0.9V", "27°C", "40µA", "40.03µA", "112.53µW"
+        ("0.07%" for the Error column of write_iin_error_table)
+    """
+    formatted = pd.DataFrame({'Process': df['Process']})
+    for column in df.columns[1:]:
+        values = df[column].values
+        if column == 'V_DD':
+            formatted[column] = [f"{v:.1f}V" if round(v, 1) == v else f"{v:g}V" for v in values]
+        elif column == 'Temp':
+            formatted[column] = [f"{t:g}°C" for t in values]
+        elif column == 'I_in':
+            formatted[column] = [f"{i*1e6:g}µA" for i in values]
+        elif column == 'V_out,min':
+            formatted[column] = [f"{v:.3f}V" for v in values]
+        elif column.startswith('I_out'):
+            formatted[column] = [f"{i*1e6:.2f}µA" for i in values]
+        elif column == 'Power':
+            formatted[column] = [f"{p*1e6:.2f}µW" for p in values]
+        elif column == 'Error':
+            formatted[column] = ["" if np.isnan(e) else f"{e:.2f}%" for e in values]
+    return formatted
+
+
+def sort_metrics_rows(df):
+    """Sort a numeric metrics DataFrame by Process (in PROCESS_ORDER), V_DD, Temp and I_in."""
+    process_order = df['Process'].str.lower().map(
+        lambda p: PROCESS_ORDER.index(p) if p in PROCESS_ORDER else len(PROCESS_ORDER))
+    df = df.assign(Process_order=process_order)
+    df = df.sort_values(['Process_order', 'Process', 'V_DD', 'Temp', 'I_in'])
+    return df.drop('Process_order', axis=1)
+
+
+def write_iin_error_table(iin_files, target_iins, plots_dir, dataset=None):
+    """
+    Save the percent error of every _Iin file at the input currents of the
+    metrics table as simulation_iin_errors.csv. It shares the Process, V_DD,
+    Temp and I_in columns of simulation_metrics.csv, so the two can be joined.
     
-    # Create DataFrame
-    df = pd.DataFrame(table_data)
+    Args:
+        iin_files: List of paths to _Iin files
+        target_iins: Array of input currents in Amperes
+        plots_dir: Directory to save the table
+        dataset: Optional CornerDataset to read the files through
+    """
+    df = compute_iin_error_table(iin_files, target_iins, dataset)
+    csv_path = os.path.join(plots_dir, 'simulation_iin_errors.csv')
+    format_metrics_table(sort_metrics_rows(df)).to_csv(csv_path, index=False)
+    print(f"Iin error table saved to: {csv_path}")
+
+
+def write_metrics_table(table_data, plots_dir, iin_files=(), dataset=None):
+    """
+    Sort the metric rows and save them as CSV and as a formatted text table.
     
-    # Sort by Process, V_DD, Temp, I_in
-    df['Process_order'] = df['Process'].map({'SS': 1, 'TT': 2, 'FF': 3})
-    df['V_DD_order'] = df['V_DD'].map({'0.9V': 1, '1.0V': 2, '1.1V': 3})
-    df['Temp_order'] = df['Temp'].str.extract(r'(\d+)').astype(float)
-    df['I_in_order'] = df['I_in'].str.extract(r'(\d+)').astype(float)
+    Args:
+        table_data: Numeric DataFrame or list of rows from compute_pvt_metrics
+        plots_dir: Directory to save the output table
+        iin_files: Optional _Iin files; their error at each input current is
+            saved next to the table (see write_iin_error_table)
+        dataset: Optional CornerDataset to read the _Iin files through
+    """
+    df = sort_metrics_rows(pd.DataFrame(table_data))
     
-    df = df.sort_values(['Process_order', 'V_DD_order', 'Temp_order', 'I_in_order'])
-    df = df.drop(['Process_order', 'V_DD_order', 'Temp_order', 'I_in_order'], axis=1)
+    n_simulations = len(df.groupby(['Process', 'V_DD', 'Temp']))
+    target_iins = np.unique(df['I_in'])
+    df = format_metrics_table(df)
     
     # Save to CSV
     csv_path = os.path.join(plots_dir, 'simulation_metrics.csv')
@@ -683,7 +1587,7 @@ def generate_metrics_table(results_dir, plots_dir):
     # Also create a formatted text table
     txt_path = os.path.join(plots_dir, 'simulation_metrics.txt')
     with open(txt_path, 'w') as f:
-        f.write("Comprehensive Table: Key Metrics from All 27 Simulations\n")
+        f.write(f"Comprehensive Table: Key Metrics from All {n_simulations} Simulations\n")
         f.write("=" * 120 + "\n\n")
         f.write(df.to_string(index=False))
         f.write("\n")
@@ -693,7 +1597,16 @@ def generate_metrics_table(results_dir, plots_dir):
     print(f"\nTotal rows in table: {len(df)}")
     print("\nFirst few rows:")
     print(df.head(10).to_string(index=False))
+    
+    if len(iin_files):
+        write_iin_error_table(iin_files, target_iins, plots_dir, dataset)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(jobs=args.jobs, report=args.report, save_png=not args.no_png,
+         incremental=args.incremental, trace_path=args.trace, export=args.export,
+         watch=args.watch, polling=args.poll,
+         filters={'process': args.process, 'voltage_offset': args.vdd, 'temperature': args.temp},
+         outputs=args.outputs, name_pattern=args.name_pattern, pipeline=args.pipeline,
+         queue_size=args.queue_size, vdd_codes=args.vdd_codes)
\ No newline at end of file
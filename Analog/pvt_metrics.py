@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+
+# Sort order of the process corners (unknown processes go last, alphabetically)
+PROCESS_ORDER = ['ss', 'tt', 'ff']
+
+# Power: P = (50 + 35 + I_out @ V_out) * 0.9, with 50 µA max input current,
+# 35 µA bias current and 0.9 V supply
+POWER_CURRENTS = 50e-6 + 35e-6
+POWER_VOLTAGE = 0.9
+
+
+def build_pvt_tensor(corners, iin_values):
+    """
+    Stack corner sweeps into one dense array indexed by process x VDD x temperature x I_in x sweep.
+    Missing corners and experiments are filled with NaN. Corners sampled on a
+    different sweep grid are interpolated onto the grid of the first corner.
+
+    Args:
+        corners: List of (process, vdd, temperature, sweep_values, currents) tuples
+            where vdd and temperature are numeric and currents has shape (n_iin, n_points)
+        iin_values: Array of input currents of the experiments (longest corner)
+
+    Returns:
+        Tuple of (axes, sweep, tensor) where axes is a dict with keys
+        process, vdd, temperature, iin
+    """
+    processes = sorted({c[0] for c in corners},
+                       key=lambda p: (PROCESS_ORDER.index(p) if p in PROCESS_ORDER else len(PROCESS_ORDER), p))
+    vdds = np.array(sorted({c[1] for c in corners}), dtype=np.float64)
+    temperatures = np.array(sorted({c[2] for c in corners}), dtype=np.float64)
+    iin_values = np.asarray(iin_values, dtype=np.float64)
+
+    sweep = np.asarray(corners[0][3], dtype=np.float64) if corners else np.empty(0)
+    tensor = np.full((len(processes), len(vdds), len(temperatures), len(iin_values), len(sweep)), np.nan)
+
+    for process, vdd, temperature, sweep_values, currents in corners:
+        currents = np.asarray(currents, dtype=np.float64)
+        if len(sweep_values) != len(sweep) or not np.array_equal(sweep_values, sweep):
+            currents = np.array([np.interp(sweep, sweep_values, row) for row in currents])
+        index = (processes.index(process), np.searchsorted(vdds, vdd), np.searchsorted(temperatures, temperature))
+        tensor[index][:len(currents)] = currents[:len(iin_values)]
+
+    axes = {'process': processes, 'vdd': vdds, 'temperature': temperatures, 'iin': iin_values}
+    return axes, sweep, tensor
+
+
+def find_vout_min(sweep, tensor, iin_values, tolerance=0.01):
+    """
+    Find V_out,min: lowest voltage where I_out is within tolerance of I_in.
+    If no point is within tolerance, the voltage with the closest current is used.
+
+    Args:
+        sweep: Array of sweep voltages, shape (n_points,)
+        tensor: Array of currents, shape (..., n_iin, n_points)
+        iin_values: Array of input currents, shape (n_iin,)
+        tolerance: Relative tolerance (0.01 = 1%)
+
+    Returns:
+        Array of shape (..., n_iin), NaN where the corner is missing
+    """
+    target = np.asarray(iin_values, dtype=np.float64)[:, None]
+    within_range = (tensor >= (1 - tolerance) * target) & (tensor <= (1 + tolerance) * target)
+
+    # First (lowest) voltage where condition is met, otherwise the closest current
+    diff = np.abs(tensor - target)
+    closest_idx = np.where(np.isnan(diff), np.inf, diff).argmin(axis=-1)
+    idx = np.where(within_range.any(axis=-1), within_range.argmax(axis=-1), closest_idx)
+
+    return np.where(np.isnan(tensor).all(axis=-1), np.nan, sweep[idx])
+
+
+def interpolate_at(sweep, tensor, targets):
+    """
+    Linearly interpolate every curve at a set of target sweep values.
+    Values outside the sweep are clamped to the first/last point.
+
+    Args:
+        sweep: Array of sweep values (increasing), shape (n_points,)
+        tensor: Array of curves, shape (..., n_points)
+        targets: Array of target sweep values, shape (n_targets,)
+
+    Returns:
+        Array of shape (..., n_targets)
+    """
+    targets = np.atleast_1d(np.asarray(targets, dtype=np.float64))
+    last = len(sweep) - 1
+
+    idx = np.searchsorted(sweep, targets)
+    lo = np.clip(idx - 1, 0, last)
+    hi = np.clip(idx, 0, last)
+
+    span = sweep[hi] - sweep[lo]
+    weight = np.divide(targets - sweep[lo], span, out=np.zeros_like(targets), where=span != 0)
+    return tensor[..., lo] * (1 - weight) + tensor[..., hi] * weight
+
+
+def compute_power(i_out):
+    """Calculate power in W from I_out @ V_out (see POWER_CURRENTS and POWER_VOLTAGE)."""
+    return (POWER_CURRENTS + i_out) * POWER_VOLTAGE
+
+
+def compute_pvt_metrics(axes, sweep, tensor, target_voltages=(0.9,)):
+    """
+    Compute V_out,min, I_out at the target voltages and power for every corner and input current.
+    Power uses I_out at the first target voltage.
+
+    Args:
+        axes: Dict of axes from build_pvt_tensor
+        sweep: Array of sweep voltages
+        tensor: Array of currents from build_pvt_tensor
+        target_voltages: Voltages at which to report I_out
+
+    Returns:
+        Numeric DataFrame in SI units (V, °C, A, W) with one row per existing
+        corner and input current, sorted by Process, V_DD, Temp, I_in
+    """
+    v_out_min = find_vout_min(sweep, tensor, axes['iin'])
+    i_out = interpolate_at(sweep, tensor, target_voltages)
+    power = compute_power(i_out[..., 0])
+
+    grid = np.meshgrid(np.arange(len(axes['process'])), axes['vdd'], axes['temperature'], axes['iin'],
+                       indexing='ij')
+    columns = {
+        'Process': np.array([p.upper() for p in axes['process']], dtype=object)[grid[0].ravel()],
+        'V_DD': grid[1].ravel(),
+        'Temp': grid[2].ravel(),
+        'I_in': grid[3].ravel(),
+        'V_out,min': v_out_min.ravel(),
+    }
+    for k, voltage in enumerate(target_voltages):
+        columns[f'I_out @ V_out={voltage:g}V'] = i_out[..., k].ravel()
+    columns['Power'] = power.ravel()
+
+    df = pd.DataFrame(columns)
+    return df[~np.isnan(df['V_out,min'].values)].reset_index(drop=True)
@@ -0,0 +1,298 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from pvt_metrics import find_vout_min, interpolate_at, compute_power
+from plotting import find_result_files, load_pvt_tensor, get_vdd_numeric, format_metrics_table
+
+
+def thin_plate(r):
+    """Thin-plate spline kernel r² log r (0 at r = 0)."""
+    return np.where(r > 0, r * r * np.log(np.where(r > 0, r, 1.0)), 0.0)
+
+
+class ProcessSurface:
+    """
+    Interpolating response surface of one process over (temperature, VDD).
+    A thin-plate spline with a linear tail is fitted to the whole curves
+    (every I_in and Vout point at once), so it passes exactly through the
+    simulated corners and a query is one small matrix product.
+    The leave-one-out predictions of the corners are computed once at fit
+    time, so every query can report an error estimate.
+    """
+
+    def __init__(self, temperatures, vdds, curves, leave_one_out=True):
+        """
+        Args:
+            temperatures: Array of corner temperatures in °C, shape (n_corners,)
+            vdds: Array of corner supply voltages in V, shape (n_corners,)
+            curves: Array of currents, shape (n_corners, n_iin, n_points)
+            leave_one_out: Also refit without each corner (see loo_curves)
+        """
+        points = np.column_stack([temperatures, vdds]).astype(np.float64)
+        self.temperatures = points[:, 0]
+        self.vdds = points[:, 1]
+        self.curves = np.asarray(curves, dtype=np.float64)
+        self.curve_shape = curves.shape[1:]
+        self.low = points.min(axis=0)
+        self.range = np.where(np.ptp(points, axis=0) > 0, np.ptp(points, axis=0), 1.0)
+        self.centers = (points - self.low) / self.range
+
+        n = len(points)
+        tail = np.column_stack([np.ones(n), self.centers])
+        system = np.zeros((n + 3, n + 3))
+        system[:n, :n] = thin_plate(np.linalg.norm(self.centers[:, None] - self.centers[None], axis=-1))
+        system[:n, n:] = tail
+        system[n:, :n] = tail.T
+        values = np.zeros((n + 3, int(np.prod(self.curve_shape))))
+        values[:n] = curves.reshape(n, -1)
+
+        # lstsq also handles degenerate layouts (e.g. all corners at one VDD)
+        self.weights = np.linalg.lstsq(system, values, rcond=None)[0]
+
+        # Prediction of every corner by the surface fitted without it (NaN with
+        # fewer than 3 other corners). Corners on the edge of the grid are then
+        # extrapolated, so the errors are pessimistic for queries inside it.
+        self.loo_curves = np.full(self.curves.shape, np.nan)
+        if leave_one_out and n > 3:
+            for k in range(n):
+                others = np.arange(n) != k
+                surface = ProcessSurface(self.temperatures[others], self.vdds[others], self.curves[others],
+                                         leave_one_out=False)
+                self.loo_curves[k] = surface.predict(self.temperatures[k:k + 1], self.vdds[k:k + 1])[0]
+
+    def in_range(self, temperatures, vdds):
+        """Check which query points lie inside the box of the fitted corners."""
+        scaled = (np.column_stack([temperatures, vdds]) - self.low) / self.range
+        return np.all((scaled >= -1e-9) & (scaled <= 1 + 1e-9), axis=1)
+
+    def predict(self, temperatures, vdds):
+        """
+        Predict the curves at query points.
+
+        Args:
+            temperatures: Array of temperatures in °C, shape (n_queries,)
+            vdds: Array of supply voltages in V, shape (n_queries,)
+
+        Returns:
+            Array of currents, shape (n_queries, n_iin, n_points)
+        """
+        scaled = (np.column_stack([temperatures, vdds]) - self.low) / self.range
+        basis = np.column_stack([
+            thin_plate(np.linalg.norm(scaled[:, None] - self.centers[None], axis=-1)),
+            np.ones(len(scaled)), scaled])
+        return (basis @ self.weights).reshape((len(scaled),) + self.curve_shape)
+
+
+class PVTSurrogate:
+    """
+    Surrogate of the simulated corners for what-if questions between them,
+    e.g. 37°C at -5% VDD. One ProcessSurface per process; queries return
+    I_out curves and the generate_metrics_table metrics.
+    """
+
+    def __init__(self, axes, sweep, tensor):
+        """
+        Args:
+            axes, sweep, tensor: Corner data from plotting.load_pvt_tensor
+        """
+        self.axes = axes
+        self.sweep = sweep
+        self.tensor = tensor
+        self.surfaces = {}
+        for p, process in enumerate(axes['process']):
+            temperatures, vdds, curves = self.corner_data(p)
+            if len(curves):
+                self.surfaces[process] = ProcessSurface(temperatures, vdds, curves)
+
+    @classmethod
+    def from_results_dir(cls, results_dir, filters=None):
+        """Fit the surrogate to the result files in a directory (see plotting.find_result_files)."""
+        regular_files, _ = find_result_files(results_dir, filters)
+        return cls(*load_pvt_tensor(regular_files))
+
+    def corner_data(self, p, exclude=None):
+        """
+        Get the simulated corners of one process.
+
+        Args:
+            p: Index of the process in axes['process']
+            exclude: Optional (vdd index, temperature index) to leave out
+
+        Returns:
+            Tuple of (temperatures, vdds, curves) arrays
+        """
+        temperatures, vdds, curves = [], [], []
+        for v, vdd in enumerate(self.axes['vdd']):
+            for t, temperature in enumerate(self.axes['temperature']):
+                corner = self.tensor[p, v, t]
+                if (v, t) == exclude or np.isnan(corner).all():
+                    continue
+                temperatures.append(temperature)
+                vdds.append(vdd)
+                curves.append(corner)
+        return np.array(temperatures), np.array(vdds), np.array(curves)
+
+    def predict(self, process, temperatures, vdds):
+        """
+        Predict I_out curves of one process at any temperatures and supply voltages.
+
+        Args:
+            process: Process corner (ss, tt, ff)
+            temperatures: Temperature(s) in °C
+            vdds: Supply voltage(s) in V (broadcast against temperatures)
+
+        Returns:
+            Array of currents, shape (n_queries, n_iin, n_points) on self.sweep
+        """
+        temperatures, vdds = np.broadcast_arrays(np.atleast_1d(np.asarray(temperatures, dtype=np.float64)),
+                                                 np.atleast_1d(np.asarray(vdds, dtype=np.float64)))
+        return self.surfaces[process].predict(temperatures, vdds)
+
+    def metrics(self, process, temperatures, vdds, target_voltages=(0.9,)):
+        """
+        Predict the metrics of generate_metrics_table (see pvt_metrics.compute_pvt_metrics).
+
+        Args:
+            process: Process corner (ss, tt, ff)
+            temperatures: Temperature(s) in °C
+            vdds: Supply voltage(s) in V (broadcast against temperatures)
+            target_voltages: Voltages at which to report I_out
+
+        Returns:
+            Numeric DataFrame with one row per query and input current, plus an
+            Interpolated column that is False outside the simulated corners and
+            error columns for V_out,min and each I_out (see loo_errors)
+        """
+        temperatures, vdds = np.broadcast_arrays(np.atleast_1d(np.asarray(temperatures, dtype=np.float64)),
+                                                 np.atleast_1d(np.asarray(vdds, dtype=np.float64)))
+        curves = self.predict(process, temperatures, vdds)
+        iin = self.axes['iin']
+        v_out_min = find_vout_min(self.sweep, curves, iin)
+        i_out = interpolate_at(self.sweep, curves, target_voltages)
+
+        columns = {
+            'Process': np.full(curves.shape[0] * len(iin), process.upper(), dtype=object),
+            'V_DD': np.repeat(vdds, len(iin)),
+            'Temp': np.repeat(temperatures, len(iin)),
+            'I_in': np.tile(iin, len(vdds)),
+            'V_out,min': v_out_min.ravel(),
+        }
+        for k, voltage in enumerate(target_voltages):
+            columns[f'I_out @ V_out={voltage:g}V'] = i_out[..., k].ravel()
+        columns['Power'] = compute_power(i_out[..., 0]).ravel()
+
+        surface = self.surfaces[process]
+        columns['Interpolated'] = np.repeat(surface.in_range(temperatures, vdds), len(iin))
+        vmin_error, i_out_error = self.loo_errors(surface, target_voltages)
+        columns['V_out,min error'] = np.tile(vmin_error, len(temperatures))
+        for k, voltage in enumerate(target_voltages):
+            columns[f'I_out @ V_out={voltage:g}V error'] = np.tile(i_out_error[:, k], len(temperatures))
+        return pd.DataFrame(columns)
+
+    def loo_errors(self, surface, target_voltages=(0.9,)):
+        """
+        Get the leave-one-out RMS errors of a surface, the typical error of a
+        query between its corners.
+
+        Args:
+            surface: ProcessSurface of one process
+            target_voltages: Voltages at which to compare I_out
+
+        Returns:
+            Tuple of (V_out,min errors shape (n_iin,), I_out errors shape
+            (n_iin, n_voltages)), NaN if there are too few corners
+        """
+        iin = self.axes['iin']
+        held_out = ~np.isnan(surface.loo_curves).all(axis=(1, 2))
+        if not held_out.any():
+            return np.full(len(iin), np.nan), np.full((len(iin), len(target_voltages)), np.nan)
+        actual, predicted = surface.curves[held_out], surface.loo_curves[held_out]
+        vmin_residuals = find_vout_min(self.sweep, predicted, iin) - find_vout_min(self.sweep, actual, iin)
+        i_out_residuals = (interpolate_at(self.sweep, predicted, target_voltages)
+                           - interpolate_at(self.sweep, actual, target_voltages))
+        return np.sqrt(np.mean(vmin_residuals ** 2, axis=0)), np.sqrt(np.mean(i_out_residuals ** 2, axis=0))
+
+    def leave_one_out(self, target_voltage=0.9):
+        """
+        Report the leave-one-out errors of the fitted corners: each corner
+        predicted by the surface refitted without it (see ProcessSurface).
+
+        Returns:
+            DataFrame with one row per corner: Process, V_DD, Temp, the largest
+            |I_out| error over the curves, the largest error of V_out,min and of
+            I_out @ target_voltage (over all input currents)
+        """
+        rows = []
+        iin = self.axes['iin']
+        for process, surface in self.surfaces.items():
+            for k, (actual, predicted) in enumerate(zip(surface.curves, surface.loo_curves)):
+                if np.isnan(predicted).all():
+                    continue
+                rows.append({
+                    'Process': process.upper(),
+                    'V_DD': surface.vdds[k],
+                    'Temp': surface.temperatures[k],
+                    'I_out error': np.nanmax(np.abs(predicted - actual)),
+                    'V_out,min error': np.nanmax(np.abs(find_vout_min(self.sweep, predicted, iin)
+                                                        - find_vout_min(self.sweep, actual, iin))),
+                    f'I_out @ V_out={target_voltage:g}V error': np.nanmax(np.abs(
+                        interpolate_at(self.sweep, predicted, (target_voltage,))
+                        - interpolate_at(self.sweep, actual, (target_voltage,)))),
+                })
+        return pd.DataFrame(rows)
+
+
+def main():
+    """Answer what-if queries between the simulated corners."""
+    current_path = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Predict metrics between the simulated PVT corners.")
+    parser.add_argument('--results', default=os.path.join(current_path, 'results'))
+    parser.add_argument('--process', nargs='+', default=['ss', 'tt', 'ff'])
+    parser.add_argument('--temp', nargs='+', type=float, default=[37.0], help="Temperatures in °C")
+    parser.add_argument('--vdd', nargs='+', default=['0.95'],
+                        help="Supply voltages in V, or voltage offsets (01, 0, 10)")
+    parser.add_argument('--validate', action='store_true', help="Print the leave-one-corner-out errors")
+    args = parser.parse_args()
+
+    surrogate = PVTSurrogate.from_results_dir(args.results)
+    vdds = [get_vdd_numeric(v) if v in ('01', '0', '10') else float(v) for v in args.vdd]
+    temperatures, vdds = (a.ravel() for a in np.meshgrid(args.temp, vdds, indexing='ij'))
+
+    processes = [p for p in args.process if p in surrogate.surfaces]
+    start = time.perf_counter()
+    tables = [surrogate.metrics(process, temperatures, vdds) for process in processes]
+    elapsed = time.perf_counter() - start
+    if not tables:
+        print(f"No corners of {', '.join(args.process)} found in {args.results}")
+        return
+
+    df = pd.concat(tables, ignore_index=True)
+    error_columns = [column for column in df.columns if column.endswith(' error')]
+    table = format_metrics_table(df.drop(columns=['Interpolated'] + error_columns))
+    table['V_DD'] = [f"{v:g}V" for v in df['V_DD']]  # Queries are not limited to 0.9/1.0/1.1 V
+    table['Interpolated'] = np.where(df['Interpolated'], 'yes', 'no (extrapolated)')
+    for column in error_columns:
+        if column.startswith('V_out'):
+            table[column] = ["n/a" if np.isnan(e) else f"±{e:.3f}V" for e in df[column]]
+        else:
+            table[column] = ["n/a" if np.isnan(e) else f"±{e * 1e6:.4f}µA" for e in df[column]]
+    print(table.to_string(index=False))
+    n_queries = len(temperatures) * len(processes)
+    print(f"\n{n_queries} queries in {elapsed * 1e6:.0f} µs ({elapsed * 1e6 / n_queries:.1f} µs per query)")
+
+    if args.validate:
+        errors = surrogate.leave_one_out()
+        print("\nLeave-one-corner-out errors:")
+        print(errors.to_string(index=False, formatters={
+            'I_out error': lambda x: f"{x * 1e6:.3f}µA",
+            'V_out,min error': lambda x: f"{x:.3f}V",
+            'I_out @ V_out=0.9V error': lambda x: f"{x * 1e6:.4f}µA"}))
+
+
+if __name__ == "__main__":
+    main()
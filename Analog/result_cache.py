@@ -0,0 +1,117 @@
+import hashlib
+import os
+
+import numpy as np
+
+from aimspice_reader import read_aimspice
+from result_store import is_result_store, read_store_columns
+
+
+# Bump when the parser changes so that entries written by an older parser are not used
+CACHE_FORMAT_VERSION = 2
+
+
+def get_cache_dir(file_path):
+    """
+    Get the cache directory for a result file.
+    The cache lives next to the results directory, e.g. results -> results_cache.
+
+    Args:
+        file_path: Path to the result file
+
+    Returns:
+        Path to the cache directory
+    """
+    results_dir = os.path.dirname(os.path.abspath(file_path))
+    return results_dir + '_cache'
+
+
+def get_cache_path(file_path):
+    """
+    Get the cache file path for a result file.
+    The name is keyed on the absolute path, size and mtime of the source and
+    on the cache format version, so a changed source file never matches an
+    old cache entry.
+
+    Args:
+        file_path: Path to the result file
+
+    Returns:
+        Path to the .npy cache file
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    key = f"{abs_path}:{stat.st_size}:{stat.st_mtime_ns}:{CACHE_FORMAT_VERSION}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    filename = os.path.basename(abs_path)
+    return os.path.join(get_cache_dir(abs_path), f"{filename}-{digest}.npy")
+
+
+def parse_result_file(file_path):
+    """
+    Parse an AIM-Spice result file, or read a compact result store (see result_store).
+    The file has duplicate sweep columns, we use the first one.
+
+    Args:
+        file_path: Path to the result file
+
+    Returns:
+        Array of shape (n_rows, 2) with columns: sweep, id(m1a)
+    """
+    # Use first sweep column (column 0) and id(m1a) column (column 2)
+    # Ignore the duplicate sweep column (column 1)
+    if is_result_store(file_path):
+        return read_store_columns(file_path, columns=(0, 2))
+    return read_aimspice(file_path, columns=(0, 2))
+
+
+def remove_stale_entries(cache_path):
+    """Remove older cache entries for the same source file."""
+    cache_dir = os.path.dirname(cache_path)
+    prefix = os.path.basename(cache_path).rsplit('-', 1)[0] + '-'
+    for file in os.listdir(cache_dir):
+        if file.startswith(prefix) and file.endswith('.npy') and file != os.path.basename(cache_path):
+            try:
+                os.remove(os.path.join(cache_dir, file))
+            except OSError:
+                pass
+
+
+def load_result_columns(file_path, use_cache=True):
+    """
+    Load the sweep and id(m1a) columns of a result file.
+    On a cache hit the array is memory-mapped from the .npy file and the text
+    file is never parsed. On a miss the file is parsed once and cached.
+
+    Args:
+        file_path: Path to the result file
+        use_cache: Set to False to always parse the text file
+
+    Returns:
+        Array of shape (n_rows, 2) with columns: sweep, id(m1a)
+    """
+    # Stores load about as fast as the cache, so they are not cached
+    if not use_cache or is_result_store(file_path):
+        return parse_result_file(file_path)
+
+    cache_path = get_cache_path(file_path)
+    if os.path.exists(cache_path):
+        try:
+            return np.load(cache_path, mmap_mode='r')
+        except (OSError, ValueError):
+            pass  # Corrupt entry, parse again below
+
+    columns = parse_result_file(file_path)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, columns)
+        os.replace(tmp_path, cache_path)
+        remove_stale_entries(cache_path)
+    except OSError as e:
+        print(f"Could not write cache for {file_path}: {e}")
+
+    return columns
@@ -0,0 +1,405 @@
+import argparse
+import json
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from aimspice_reader import parse_header, read_aimspice, write_aimspice
+from corner_names import parse_filename, get_vdd_numeric
+
+
+# Powers of ten that are exact doubles (scales of the decimal codecs)
+POW10 = 10.0 ** np.arange(23)
+
+# File layout: MAGIC, header length (uint32), JSON header padded to 8 bytes,
+# data blocks (each padded to 8 bytes), END_MARKER. All numbers little-endian.
+MAGIC = b'AIMSTOR\x01'
+HEADER_LENGTH = struct.Struct('<I')
+
+# Ends every store file, so a truncated file is detected and file_watcher.is_write_complete
+# (which waits for a final newline) works for stores as for text files
+END_MARKER = b'\nEND\n'
+
+STORE_FORMAT_VERSION = 1
+
+# Codecs of the current columns: 'none' (raw float64), 'zlib' (byte-shuffled
+# float64, deflated) and 'decimal' (the decimal digits of the values, deflated)
+COMPRESSIONS = ('none', 'zlib', 'decimal')
+DEFAULT_COMPRESSION = 'decimal'
+
+# Significant digits of the values in AIM-Spice result files ("%e" format)
+DECIMAL_DIGITS = 7
+
+
+def is_result_store(file_path):
+    """Check whether a file is a compact result store (by its magic bytes)."""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def pad8(data):
+    """Pad bytes with zeros to a multiple of 8 bytes."""
+    return data + b'\0' * (-len(data) % 8)
+
+
+def shuffle_bytes(values):
+    """Group byte k of every value together (byte planes), which deflates much better for floats."""
+    return np.ascontiguousarray(values).view(np.uint8).reshape(len(values), -1).T.tobytes()
+
+
+def unshuffle_bytes(data, dtype, count):
+    """Inverse of shuffle_bytes."""
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, count)
+    return np.ascontiguousarray(planes.T).view(dtype).ravel()
+
+
+def find_decimal_scale(values, max_scale=len(POW10) - 1):
+    """
+    Find the smallest power of ten k for which every value is an integer
+    number of 10^-k that divides back to exactly the same double.
+
+    Returns:
+        Tuple of (k, integers), or (None, None) if there is none
+    """
+    for k in range(max_scale + 1):
+        scaled = np.round(values * POW10[k])
+        if np.all(np.abs(scaled) < 2.0 ** 53) and np.array_equal(scaled / POW10[k], values):
+            return k, scaled.astype(np.int64)
+    return None, None
+
+
+def encode_sweep(sweep):
+    """
+    Describe a sweep column as uniform segments.
+    Each segment is [start, step, count, repeat] in integer units of
+    10^-scale, e.g. a nested sweep of 0..0.99 V in 10 mV steps done three
+    times is one segment [0, 1, 100, 3] with scale 2. Decoding divides by
+    an exact power of ten, so the values come back bit for bit.
+
+    Args:
+        sweep: Array of sweep values
+
+    Returns:
+        Header entry: {'scale', 'segments'}, or None if the sweep is not uniform enough
+    """
+    scale, integers = find_decimal_scale(sweep)
+    if scale is None or len(integers) == 0:
+        return None
+
+    steps = np.diff(integers)
+    changes = np.flatnonzero(steps[1:] != steps[:-1]) + 1
+    segments = []
+    i = 0
+    while i < len(integers):
+        if i == len(integers) - 1:
+            end, step = i, 0
+        else:
+            step = int(steps[i])
+            k = np.searchsorted(changes, i + 1)
+            end = int(changes[k]) if k < len(changes) else len(integers) - 1
+        segment = [int(integers[i]), step, end - i + 1]
+        if segments and segments[-1][:3] == segment:
+            segments[-1][3] += 1
+        else:
+            segments.append(segment + [1])
+        i = end + 1
+        if len(segments) > len(integers) // 8 + 1:
+            return None  # Not uniform, the raw column is smaller
+    return {'scale': scale, 'segments': segments}
+
+
+def decode_sweep(descriptor):
+    """Expand a sweep descriptor from encode_sweep into the array of sweep values."""
+    parts = [np.tile(start + step * np.arange(count, dtype=np.int64), repeat)
+             for start, step, count, repeat in descriptor['segments']]
+    integers = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    return integers / POW10[descriptor['scale']]
+
+
+def encode_decimal(values, digits=DECIMAL_DIGITS):
+    """
+    Split values into a decimal mantissa of the given number of digits and a
+    power of ten, as they were printed in the text file. Values that do not
+    come back bit for bit from mantissa / 10^-exponent (e.g. 1e-31 leakage
+    currents, beyond the exact powers of ten) are kept as exceptions.
+
+    Returns:
+        Tuple of (mantissas int32, exponents int8, exception indices, exception values)
+    """
+    magnitude = np.abs(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponents = np.floor(np.log10(np.where(magnitude > 0, magnitude, 1.0)))
+        exponents = np.clip(np.nan_to_num(exponents) - (digits - 1), -(len(POW10) - 1), 0).astype(np.int64)
+        mantissas = np.round(values * POW10[-exponents])
+        mantissas = np.where(np.abs(mantissas) < 2 ** 31, mantissas, 0).astype(np.int32)
+
+    decoded = mantissas / POW10[-exponents]
+    exact = (decoded == values) & (np.signbit(decoded) == np.signbit(values))  # -0.0 is an exception
+    exceptions = np.flatnonzero(~exact)
+    return mantissas, exponents.astype(np.int8), exceptions.astype(np.uint32), values[exceptions]
+
+
+def decode_decimal(mantissas, exponents, exception_indices, exception_values):
+    """Inverse of encode_decimal (one correctly rounded division per value)."""
+    values = mantissas / POW10[-exponents.astype(np.int64)]
+    values[exception_indices] = exception_values
+    return values
+
+
+def encode_curves(curves, compression):
+    """
+    Encode the current columns.
+
+    Args:
+        curves: float64 array of shape (n_curves, n_rows)
+        compression: One of COMPRESSIONS
+
+    Returns:
+        List of data blocks (bytes)
+    """
+    values = np.ascontiguousarray(curves, dtype='<f8').ravel()
+    if compression == 'none':
+        return [values.tobytes()]
+    if compression == 'zlib':
+        return [zlib.compress(shuffle_bytes(values), 6)]
+    if compression == 'decimal':
+        mantissas, exponents, exception_indices, exception_values = encode_decimal(values)
+        digits = shuffle_bytes(mantissas.astype('<i4')) + exponents.tobytes()
+        return [zlib.compress(digits, 6), exception_indices.astype('<u4').tobytes(),
+                exception_values.astype('<f8').tobytes()]
+    raise ValueError(f"Unknown compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}")
+
+
+def decode_curves(blocks, compression, shape):
+    """Inverse of encode_curves; returns a float64 array of the given shape."""
+    count = int(np.prod(shape))
+    if compression == 'none':
+        values = np.frombuffer(blocks[0], dtype='<f8').astype(np.float64)
+    elif compression == 'zlib':
+        values = unshuffle_bytes(zlib.decompress(blocks[0]), '<f8', count)
+    elif compression == 'decimal':
+        digits = zlib.decompress(blocks[0])
+        mantissas = unshuffle_bytes(digits[:4 * count], '<i4', count)
+        exponents = np.frombuffer(digits[4 * count:], dtype=np.int8)
+        values = decode_decimal(mantissas, exponents, np.frombuffer(blocks[1], dtype='<u4'),
+                                np.frombuffer(blocks[2], dtype='<f8'))
+    else:
+        raise ValueError(f"Unknown compression {compression!r}")
+    return values.reshape(shape)
+
+
+def write_result_store(file_path, names, sweep, curves, compression=DEFAULT_COMPRESSION, metadata=None):
+    """
+    Write a compact result store.
+    The file is written to a temporary name first, so readers never see a partial store.
+
+    Args:
+        file_path: Path of the store
+        names: Column names of the text layout (the sweep twice, then the curves)
+        sweep: Array of sweep values, shape (n_rows,)
+        curves: Array of the other columns, shape (n_curves, n_rows)
+        compression: Codec of the curves (see COMPRESSIONS)
+        metadata: Optional dict of corner metadata (process, V_DD, temperature, ...)
+    """
+    sweep = np.asarray(sweep, dtype=np.float64)
+    curves = np.atleast_2d(np.asarray(curves, dtype=np.float64))
+    blocks = []
+    descriptor = encode_sweep(sweep)
+    if descriptor is None:
+        descriptor = {'block': 0}
+        blocks.append(sweep.astype('<f8').tobytes())
+    curve_blocks = encode_curves(curves, compression)
+
+    header = {
+        'version': STORE_FORMAT_VERSION,
+        'columns': list(names),
+        'n_rows': len(sweep),
+        'sweep': descriptor,
+        'curves': {'compression': compression, 'shape': list(curves.shape),
+                   'blocks': list(range(len(blocks), len(blocks) + len(curve_blocks)))},
+        'block_sizes': [len(block) for block in blocks + curve_blocks],
+        'metadata': metadata or {},
+    }
+    header_bytes = pad8(json.dumps(header, separators=(',', ':')).encode())
+
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + HEADER_LENGTH.pack(len(header_bytes)) + b'\0' * 4 + header_bytes)
+        for block in blocks + curve_blocks:
+            f.write(pad8(block))
+        f.write(END_MARKER)
+    os.replace(tmp_path, file_path)
+
+
+def read_result_store(file_path):
+    """
+    Read a compact result store.
+
+    Args:
+        file_path: Path of the store
+
+    Returns:
+        Tuple of (header, sweep, curves) with curves of shape (n_curves, n_rows)
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{file_path} is not a result store")
+    if not data.endswith(END_MARKER):
+        raise ValueError(f"{file_path} is truncated")
+
+    start = len(MAGIC)
+    header_length, = HEADER_LENGTH.unpack_from(data, start)
+    start += 8
+    header = json.loads(data[start:start + header_length].rstrip(b'\0'))
+    if header['version'] != STORE_FORMAT_VERSION:
+        raise ValueError(f"{file_path} has store format version {header['version']}, "
+                         f"expected {STORE_FORMAT_VERSION}")
+
+    blocks = []
+    offset = start + header_length
+    for size in header['block_sizes']:
+        blocks.append(data[offset:offset + size])
+        offset += size + (-size % 8)
+
+    descriptor = header['sweep']
+    if 'block' in descriptor:
+        sweep = np.frombuffer(blocks[descriptor['block']], dtype='<f8').astype(np.float64)
+    else:
+        sweep = decode_sweep(descriptor)
+    curves = header['curves']
+    return header, sweep, decode_curves([blocks[k] for k in curves['blocks']], curves['compression'],
+                                        curves['shape'])
+
+
+def read_store_columns(file_path, columns=(0, 2)):
+    """
+    Read columns of a store as read_aimspice does for the text layout.
+
+    Args:
+        file_path: Path of the store
+        columns: Indices in the text layout (0 and 1 are the sweep)
+
+    Returns:
+        float64 array of shape (n_rows, len(columns))
+    """
+    header, sweep, curves = read_result_store(file_path)
+    if max(columns) >= len(header['columns']):
+        raise ValueError(f"{file_path} has only {len(header['columns'])} columns")
+    return np.column_stack([sweep if c < 2 else curves[c - 2] for c in columns])
+
+
+def pack_result_file(text_path, store_path, compression=DEFAULT_COMPRESSION, metadata=None):
+    """
+    Convert an AIM-Spice result file into a compact store.
+    The duplicated sweep column is stored once (it must match the first one).
+
+    Args:
+        text_path: Path of the AIM-Spice result file
+        store_path: Path of the store to write (may be text_path to convert in place)
+        compression: Codec of the curves (see COMPRESSIONS)
+        metadata: Optional dict of corner metadata
+    """
+    with open(text_path, 'rb') as f:
+        names = parse_header(f.readline(), text_path)
+    columns = read_aimspice(text_path, columns=tuple(range(len(names))))
+    if not np.array_equal(columns[:, 0], columns[:, 1]):
+        raise ValueError(f"The sweep columns of {text_path} differ")
+    metadata = dict(metadata or {}, source=os.path.basename(text_path))
+    write_result_store(store_path, names, columns[:, 0], columns[:, 2:].T, compression, metadata)
+
+
+def unpack_result_file(store_path, text_path):
+    """Convert a compact store back into the AIM-Spice text layout (see aimspice_reader.write_aimspice)."""
+    header, sweep, curves = read_result_store(store_path)
+    tmp_path = f"{text_path}.{os.getpid()}.tmp"
+    write_aimspice(tmp_path, sweep, curves.T, header='\t'.join(header['columns']))
+    os.replace(tmp_path, text_path)
+
+
+def convert_directory(source_dir, output_dir, pack=True, compression=DEFAULT_COMPRESSION):
+    """
+    Convert every result file in a directory to stores, or every store back to text.
+    Files that already are in the target format are copied as they are.
+
+    Args:
+        source_dir: Directory of result files
+        output_dir: Output directory (may be source_dir to convert in place)
+        pack: True to write stores, False to write text files
+        compression: Codec of the curves when packing
+
+    Returns:
+        Tuple of (n_converted, bytes_before, bytes_after)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    n_converted, bytes_before, bytes_after = 0, 0, 0
+    for name in sorted(os.listdir(source_dir)):
+        source_path = os.path.join(source_dir, name)
+        output_path = os.path.join(output_dir, name)
+        process, voltage_offset, temperature, is_iin = parse_filename(name)
+        if not os.path.isfile(source_path) or process is None:
+            continue
+
+        size = os.path.getsize(source_path)
+        try:
+            if is_result_store(source_path) == pack:
+                if output_path != source_path:
+                    with open(source_path, 'rb') as src, open(output_path, 'wb') as dst:
+                        dst.write(src.read())
+            elif pack:
+                metadata = {'process': process, 'voltage_offset': voltage_offset, 'vdd': get_vdd_numeric(voltage_offset),
+                            'temperature': float(temperature), 'kind': 'iin' if is_iin else 'sweep'}
+                pack_result_file(source_path, output_path, compression, metadata)
+                n_converted += 1
+            else:
+                unpack_result_file(source_path, output_path)
+                n_converted += 1
+        except (OSError, ValueError) as e:
+            print(f"Skipping {source_path}: {e}")
+            continue
+        bytes_before += size
+        bytes_after += os.path.getsize(output_path)
+    return n_converted, bytes_before, bytes_after
+
+
+def main():
+    """Convert result directories between the AIM-Spice text layout and compact stores."""
+    parser = argparse.ArgumentParser(description="Compact binary store for AIM-Spice corner results.")
+    parser.add_argument('action', choices=['pack', 'unpack', 'info'],
+                        help="pack: text to stores, unpack: stores to text, info: show a store header")
+    parser.add_argument('path', help="Results directory (or one store for info)")
+    parser.add_argument('-o', '--output', help="Output directory")
+    parser.add_argument('--in-place', action='store_true',
+                        help="Replace the files in the results directory instead of writing to --output")
+    parser.add_argument('-c', '--compression', choices=COMPRESSIONS, default=DEFAULT_COMPRESSION,
+                        help="Codec of the current columns")
+    args = parser.parse_args()
+
+    if args.action == 'info':
+        start = time.perf_counter()
+        header, sweep, curves = read_result_store(args.path)
+        elapsed = time.perf_counter() - start
+        print(json.dumps(header, indent=1))
+        print(f"Read {curves.shape[0]} curves of {len(sweep)} points in {elapsed * 1e3:.2f} ms")
+        return
+
+    if args.output and args.in_place:
+        parser.error("give either --output or --in-place, not both")
+    if not args.output and not args.in_place:
+        parser.error(f"{args.action} needs --output, or --in-place to replace the files in {args.path}")
+
+    output_dir = args.output or args.path
+    n_converted, before, after = convert_directory(args.path, output_dir, args.action == 'pack', args.compression)
+    print(f"Converted {n_converted} files into {output_dir}: {before / 1024:.1f} KiB -> {after / 1024:.1f} KiB"
+          + (f" ({before / after:.1f}x)" if after else ""))
+
+
+if __name__ == "__main__":
+    main()
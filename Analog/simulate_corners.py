@@ -0,0 +1,431 @@
+import argparse
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from aimspice_reader import write_aimspice
+from corner_names import get_vdd_numeric
+
+
+# Default PVT grid of the project (same naming as find_result_files expects)
+PROCESSES = ['ss', 'tt', 'ff']
+VOLTAGE_OFFSETS = ['01', '0', '10']
+TEMPERATURES = ['0', '27', '50']
+
+# DC sweep of the input current used for the _Iin error runs (start, stop, step)
+IIN_SWEEP = ('38u', '52u', '0.01u')
+
+SPICE_SCALE = {'t': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9,
+               'p': 1e-12, 'f': 1e-15}
+
+
+def parse_spice_value(text):
+    """Convert a SPICE number with an optional scale suffix (e.g. "40u", "1V") to float."""
+    match = re.match(r'^([-+]?[\d.]+(?:e[-+]?\d+)?)(meg|[tgkmunpf])?', text.strip().lower())
+    if not match:
+        raise ValueError(f"Not a SPICE number: {text!r}")
+    return float(match.group(1)) * SPICE_SCALE.get(match.group(2), 1.0)
+
+
+def format_spice_value(value):
+    """Format a number for a netlist, using the u suffix for small values (e.g. 1.8e-07 -> "0.18u")."""
+    if value != 0 and abs(value) < 1e-3:
+        return f"{value / 1e-6:.6g}u"
+    return f"{value:.6g}"
+
+
+def aimspice_sweep(start, stop, step):
+    """
+    Generate sweep points the way AIM-Spice does (repeated addition while <= stop).
+
+    Args:
+        start, stop, step: Sweep limits as floats
+
+    Returns:
+        Array of sweep values
+    """
+    values = []
+    value = start
+    while value <= stop:
+        values.append(value)
+        value += step
+    return np.array(values)
+
+
+def output_name(process, voltage_offset, temperature, kind='sweep'):
+    """Get the result file name of a corner, e.g. tt_0_27 or tt_0_27_Iin."""
+    name = f"{process}_{voltage_offset}_{temperature}"
+    return name + '_Iin' if kind == 'iin' else name
+
+
+def make_netlist(template, process, voltage_offset, temperature, kind='sweep'):
+    """
+    Create the netlist of one corner from the tx.cir template.
+    Swaps the process model include, the supply voltage and the temperature.
+    For kind 'iin' the DC analysis sweeps the input current only.
+
+    Args:
+        template: Text of tx.cir
+        process: Process corner (ss, tt, ff)
+        voltage_offset: Voltage offset (0, 01, 10)
+        temperature: Temperature in °C (string)
+        kind: 'sweep' for the Vout x Iin sweep, 'iin' for the Iin error sweep
+
+    Returns:
+        Netlist text
+    """
+    netlist = re.sub(r'(?m)^\.include\s+p18_cmos_models_\w+\.inc',
+                     f'.include p18_cmos_models_{process}.inc', template)
+    netlist = re.sub(r'(?mi)^(Vdd\s+\S+\s+\S+\s+)\S+',
+                     lambda m: f"{m.group(1)}{get_vdd_numeric(voltage_offset):g}V", netlist)
+    netlist = re.sub(r'(?mi)^Temp\s+\S+', f'Temp {temperature}', netlist)
+
+    if kind == 'iin':
+        start, stop, step = IIN_SWEEP
+        netlist = re.sub(r'(?s)\[dc\]\n.*?(?=\n\[)', f'[dc]\n1\nIin\n{start}\n{stop}\n{step}', netlist)
+    return update_description_length(template, netlist)
+
+
+def set_params(template, params):
+    """
+    Change values on the .param line of the tx.cir template.
+
+    Args:
+        template: Text of tx.cir
+        params: Dict of parameter name to float, e.g. {'size': 20, 'length': 0.2e-6}
+
+    Returns:
+        Template text with the new values
+
+    Raises:
+        ValueError: If the template has no .param line or a parameter is not on it
+    """
+    match = re.search(r'(?m)^\.param\b.*$', template)
+    if not match:
+        raise ValueError("The template has no .param line")
+
+    line = match.group(0)
+    for name, value in params.items():
+        line, count = re.subn(rf'\b{name}\s*=\s*\S+', f"{name}={format_spice_value(value)}", line)
+        if not count:
+            raise ValueError(f"Parameter {name} is not on the .param line")
+
+    netlist = template[:match.start()] + line + template[match.end():]
+    return update_description_length(template, netlist)
+
+
+def update_description_length(template, netlist):
+    """
+    Adjust the character count AIM-Spice stores after [description] by the
+    change in length of the description made when editing the template.
+    """
+    pattern = r'(?s)\[description\]\n(\d+)\n(.*?)(?=\n\[)'
+    old = re.search(pattern, template)
+    new = re.search(pattern, netlist)
+    if not old or not new:
+        return netlist
+
+    length = int(old.group(1)) + len(new.group(2)) - len(old.group(2))
+    return netlist[:new.start(1)] + str(length) + netlist[new.end(1):]
+
+
+def parse_netlist(netlist):
+    """
+    Extract what a simulator needs from an AIM-Spice netlist.
+
+    Args:
+        netlist: Netlist text
+
+    Returns:
+        Dict with keys: title, circuit (lines), process, temperature, gmin,
+        sweeps (list of (source, start, stop, step) with the innermost first)
+    """
+    sections = dict(re.findall(r'(?s)\[(\w+)\]\n(.*?)(?=\n\[|\Z)', netlist))
+    description = sections.get('description', '').split('\n')
+    circuit = [line for line in description[1:] if line.strip()]
+
+    options = dict(line.split(None, 1) for line in sections.get('options', '').split('\n')[1:]
+                   if len(line.split(None, 1)) == 2)
+
+    dc_lines = sections.get('dc', '0').split('\n')
+    sweeps = []
+    for k in range(int(dc_lines[0])):
+        source, start, stop, step = dc_lines[1 + 4 * k:5 + 4 * k]
+        sweeps.append((source.strip(), parse_spice_value(start), parse_spice_value(stop),
+                       parse_spice_value(step)))
+
+    process = re.search(r'p18_cmos_models_(\w+)\.inc', netlist)
+    return {
+        'title': circuit[0] if circuit else '*',
+        'circuit': circuit[1:],
+        'process': process.group(1) if process else None,
+        'temperature': float(options.get('Temp', 27)),
+        'gmin': options.get('Gmin'),
+        'sweeps': sweeps,
+    }
+
+
+def netlist_hash(netlist, model_dir, simulator):
+    """
+    Hash a netlist together with the model files it includes and the simulator.
+
+    Args:
+        netlist: Netlist text
+        model_dir: Directory containing the .inc model files
+        simulator: Simulator name or command template
+
+    Returns:
+        Hex digest string
+    """
+    h = hashlib.sha1(netlist.encode())
+    for include in sorted(set(re.findall(r'(?m)^\.include\s+(\S+)', netlist))):
+        include_path = os.path.join(model_dir, include)
+        with open(include_path, 'rb') as f:
+            h.update(f.read())
+        # The corner files include the model card themselves
+        with open(include_path) as f:
+            for nested in re.findall(r'(?m)^\.include\s+(\S+)', f.read()):
+                with open(os.path.join(model_dir, nested), 'rb') as nf:
+                    h.update(nf.read())
+    h.update(simulator.encode())
+    return h.hexdigest()
+
+
+def run_stub(netlist_path, output_path, model_dir):
+    """
+    Local stand-in for a simulator, useful for testing the orchestration.
+    Reads the corner and DC sweeps from the netlist and writes a smooth
+    current mirror response (not a circuit simulation) in the AIM-Spice layout.
+
+    Args:
+        netlist_path: Path to the netlist
+        output_path: Path of the result file to write
+        model_dir: Directory containing the .inc model files (unused)
+    """
+    with open(netlist_path) as f:
+        info = parse_netlist(f.read())
+
+    # Knee voltage grows for slow corners, high temperature and low supply
+    knee = {'ss': 0.12, 'tt': 0.10, 'ff': 0.085}.get(info['process'], 0.1)
+    knee *= 1 + 0.002 * (info['temperature'] - 27)
+    vdd_line = next((line for line in info['circuit'] if line.lower().startswith('vdd')), 'Vdd 1 0 1V')
+    vdd = parse_spice_value(vdd_line.split()[3])
+    vout_line = next((line for line in info['circuit'] if line.lower().startswith('vout')), 'Vout 6 0 1V')
+    iin_line = next((line for line in info['circuit'] if line.lower().startswith('iin')), 'Iin 1 4 40u')
+    values = {'Vout': parse_spice_value(vout_line.split()[3]), 'Iin': parse_spice_value(iin_line.split()[3])}
+
+    grids = [aimspice_sweep(start, stop, step) for source, start, stop, step in info['sweeps']]
+    mesh = np.meshgrid(*grids[::-1], indexing='ij')  # innermost sweep varies fastest
+    for (source, *_), grid in zip(info['sweeps'][::-1], mesh):
+        values[source] = grid.ravel()
+
+    vout, iin = np.broadcast_arrays(values['Vout'], values['Iin'])
+    current = iin * (1 - np.exp(-vout / knee)) * (1 + 0.01 * (vout - 0.5) + 0.02 * (vdd - 1.0))
+    sweep = values[info['sweeps'][0][0]] if info['sweeps'] else vout
+    write_aimspice(output_path, np.broadcast_to(sweep, current.shape), current)
+
+
+def make_ngspice_deck(netlist, output_path, model_dir):
+    """
+    Convert an AIM-Spice netlist into an ngspice batch deck that writes id(M1a).
+
+    Args:
+        netlist: AIM-Spice netlist text
+        output_path: Path for ngspice's wrdata output
+        model_dir: Directory containing the .inc model files
+
+    Returns:
+        Deck text
+    """
+    info = parse_netlist(netlist)
+    lines = [info['title']]
+    for line in info['circuit']:
+        if line.lower().startswith('.include'):
+            line = f".include {os.path.join(model_dir, line.split()[1])}"
+        if line.lower().startswith('.plot'):
+            continue
+        lines.append(line)
+
+    options = f".options temp={info['temperature']:g}"
+    if info['gmin']:
+        options += f" gmin={info['gmin']}"
+    lines.append(options)
+    lines.append('.dc ' + ' '.join(f"{source} {start:g} {stop:g} {step:g}"
+                                   for source, start, stop, step in info['sweeps']))
+    lines += ['.save @m1a[id]', '.control', 'set wr_singlescale', 'run',
+              f'wrdata {output_path} @m1a[id]', '.endc', '.end']
+    return '\n'.join(lines) + '\n'
+
+
+def run_ngspice(netlist_path, output_path, model_dir, command='ngspice'):
+    """
+    Simulate a netlist with ngspice in batch mode and convert the result to the AIM-Spice layout.
+
+    Args:
+        netlist_path: Path to the AIM-Spice netlist
+        output_path: Path of the result file to write
+        model_dir: Directory containing the .inc model files
+        command: ngspice executable
+    """
+    with open(netlist_path) as f:
+        netlist = f.read()
+
+    work_dir = os.path.dirname(netlist_path)
+    deck_path = os.path.join(work_dir, 'deck.sp')
+    data_path = os.path.join(work_dir, 'wrdata.txt')
+    with open(deck_path, 'w') as f:
+        f.write(make_ngspice_deck(netlist, data_path, model_dir))
+
+    subprocess.run([command, '-b', deck_path], cwd=model_dir, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    data = np.loadtxt(data_path)
+    write_aimspice(output_path, data[:, 0], data[:, 1])
+
+
+def run_command(netlist_path, output_path, model_dir, command):
+    """
+    Run a user supplied simulator command.
+    The command template may use {netlist}, {output} and {model_dir}, and must
+    write the result in the AIM-Spice layout to {output}.
+    """
+    args = [arg.format(netlist=netlist_path, output=output_path, model_dir=model_dir)
+            for arg in shlex.split(command)]
+    subprocess.run(args, cwd=model_dir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def simulate(netlist, output_path, model_dir, simulator):
+    """
+    Simulate one netlist in a temporary directory.
+
+    Args:
+        netlist: Netlist text
+        output_path: Path of the result file to write
+        model_dir: Directory containing the .inc model files
+        simulator: 'stub', 'ngspice' or a command template (see run_command)
+    """
+    with tempfile.TemporaryDirectory(prefix='corner_') as work_dir:
+        netlist_path = os.path.join(work_dir, 'netlist.cir')
+        with open(netlist_path, 'w') as f:
+            f.write(netlist)
+
+        if simulator == 'stub':
+            run_stub(netlist_path, output_path, model_dir)
+        elif simulator == 'ngspice':
+            run_ngspice(netlist_path, output_path, model_dir)
+        else:
+            run_command(netlist_path, output_path, model_dir, simulator)
+
+
+def run_corner(template, corner, results_dir, cache_dir, model_dir, simulator, force=False):
+    """
+    Produce the result file of one corner, simulating only on a cache miss.
+
+    Args:
+        template: Text of tx.cir
+        corner: Tuple of (process, voltage_offset, temperature, kind)
+        results_dir: Directory to write the result file to
+        cache_dir: Directory of the simulation cache (one file per netlist hash)
+        model_dir: Directory containing the .inc model files
+        simulator: 'stub', 'ngspice' or a command template
+        force: Overwrite result files that were not produced by this cache
+
+    Returns:
+        Tuple of (name, status, error) where status is 'cached', 'simulated',
+        'kept' (existing result left alone) or 'failed'
+    """
+    name = output_name(*corner)
+    output_path = os.path.join(results_dir, name)
+    netlist = make_netlist(template, *corner)
+
+    try:
+        cache_path = os.path.join(cache_dir, netlist_hash(netlist, model_dir, simulator))
+        if os.path.exists(cache_path):
+            status = 'cached'
+        elif os.path.exists(output_path) and not force:
+            return name, 'kept', None
+        else:
+            tmp_path = f"{cache_path}.{os.getpid()}.{name}.tmp"
+            simulate(netlist, tmp_path, model_dir, simulator)
+            os.replace(tmp_path, cache_path)
+            status = 'simulated'
+
+        shutil.copyfile(cache_path, output_path + '.tmp')
+        os.replace(output_path + '.tmp', output_path)
+    except Exception as e:
+        return name, 'failed', f"{type(e).__name__}: {e}"
+
+    return name, status, None
+
+
+def run_corners(corners, template_path, results_dir, simulator='ngspice', jobs=4, force=False):
+    """
+    Simulate a grid of corners on a bounded pool of workers.
+
+    Args:
+        corners: List of (process, voltage_offset, temperature, kind) tuples
+        template_path: Path to tx.cir
+        results_dir: Directory to write the result files to
+        simulator: 'stub', 'ngspice' or a command template (see run_command)
+        jobs: Maximum number of simulations running at the same time
+        force: Overwrite result files that were not produced by the cache
+
+    Returns:
+        List of (name, status, error) tuples in the order of corners
+    """
+    model_dir = os.path.dirname(os.path.abspath(template_path))
+    cache_dir = os.path.join(model_dir, 'sim_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(results_dir, exist_ok=True)
+
+    with open(template_path) as f:
+        template = f.read()
+
+    # Simulations are external processes, so threads are enough to keep them busy
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_corner, template, corner, results_dir, cache_dir, model_dir,
+                                   simulator, force)
+                   for corner in corners]
+        return [future.result() for future in futures]
+
+
+def main():
+    """Expand the corner grid and simulate every corner."""
+    current_path = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Simulate PVT corners of tx.cir.")
+    parser.add_argument('--process', nargs='+', default=PROCESSES)
+    parser.add_argument('--vdd', nargs='+', default=VOLTAGE_OFFSETS, help="Voltage offsets, e.g. 01 0 10")
+    parser.add_argument('--temp', nargs='+', default=TEMPERATURES)
+    parser.add_argument('--kind', nargs='+', choices=['sweep', 'iin'], default=['sweep'])
+    parser.add_argument('--simulator', default='ngspice',
+                        help="'ngspice', 'stub' or a command using {netlist}, {output} and {model_dir}")
+    parser.add_argument('--template', default=os.path.join(current_path, 'tx.cir'))
+    parser.add_argument('--results', default=os.path.join(current_path, 'results'))
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--force', action='store_true',
+                        help="Overwrite existing result files that are not in the simulation cache")
+    args = parser.parse_args()
+
+    corners = [(p, v, t, k) for p in args.process for v in args.vdd for t in args.temp for k in args.kind]
+    print(f"Simulating {len(corners)} corners with {args.simulator} on {args.jobs} workers")
+
+    counts = {}
+    for name, status, error in run_corners(corners, args.template, args.results, args.simulator,
+                                           args.jobs, args.force):
+        counts[status] = counts.get(status, 0) + 1
+        if error is not None:
+            print(f"  {name}: {error}")
+
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
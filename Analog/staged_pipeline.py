@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+
+# Items waiting between two stages. A full queue blocks the stage before it,
+# so at most this many items (plus those being worked on) are held in memory.
+DEFAULT_QUEUE_SIZE = 4
+
+# Marks the end of the items in a queue
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a staged pipeline: a function applied to every item on an executor.
+    Pick the executor by the kind of work: a thread pool for file reads and
+    NumPy (which releases the GIL), a process pool for pure Python or
+    Matplotlib work, or None for cheap steps run on the event loop itself.
+    """
+
+    def __init__(self, name, function, executor=None, workers=1):
+        """
+        Args:
+            name: Stage name (used in the timing summary)
+            function: Called as function(item), returns the item for the next stage.
+                Must be picklable when the executor is a process pool.
+            executor: concurrent.futures executor to run the function on, or None
+            workers: Number of items worked on at once (normally the executor's max_workers)
+        """
+        self.name = name
+        self.function = function
+        self.executor = executor
+        self.workers = workers
+        self.busy = 0.0  # Seconds of work, summed over the workers
+        self.count = 0
+
+
+async def _feed(items, outbox, n_workers):
+    """Put the items into the first queue, waiting while it is full."""
+    for index, item in enumerate(items):
+        await outbox.put((index, item, item, None))
+    for _ in range(n_workers):
+        await outbox.put(_DONE)
+
+
+async def _work(stage, inbox, outbox):
+    """Take items from inbox, run the stage on them and pass them on until the end marker."""
+    loop = asyncio.get_running_loop()
+    while True:
+        entry = await inbox.get()
+        if entry is _DONE:
+            return
+        index, source, value, error = entry
+        if error is None:
+            start = time.perf_counter()
+            try:
+                if stage.executor is None:
+                    value = stage.function(value)
+                else:
+                    value = await loop.run_in_executor(stage.executor, stage.function, value)
+            except Exception as e:
+                value, error = None, f"{stage.name}: {type(e).__name__}: {e}"
+            stage.busy += time.perf_counter() - start
+            stage.count += 1
+        # Failed items skip the remaining stages but still reach the end, in order
+        await outbox.put((index, source, value, error))
+
+
+async def _run_stage(stage, inbox, outbox, n_next):
+    """Run the workers of a stage, then tell the next stage that no more items come."""
+    await asyncio.gather(*(_work(stage, inbox, outbox) for _ in range(stage.workers)))
+    for _ in range(n_next):
+        await outbox.put(_DONE)
+
+
+async def run_pipeline(items, stages, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Pass items through stages connected by bounded queues.
+    All stages run at the same time on different items, so the total time
+    approaches that of the slowest stage instead of the sum of all stages,
+    and a slow stage makes the ones before it wait (backpressure) instead of
+    piling up items in memory.
+
+    Args:
+        items: Iterable of input items
+        stages: List of Stage
+        queue_size: Capacity of each queue between two stages
+
+    Returns:
+        List of (item, result, error) tuples in the order of items, where
+        error is None on success and otherwise names the stage that failed
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    tasks = [asyncio.create_task(_feed(items, queues[0], stages[0].workers))]
+    for k, stage in enumerate(stages):
+        n_next = stages[k + 1].workers if k + 1 < len(stages) else 1
+        tasks.append(asyncio.create_task(_run_stage(stage, queues[k], queues[k + 1], n_next)))
+
+    results = {}
+    try:
+        while True:
+            entry = await queues[-1].get()
+            if entry is _DONE:
+                break
+            index, source, value, error = entry
+            results[index] = (source, value, error)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return [results[index] for index in sorted(results)]
+
+
+def run_stages(items, stages, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Run a staged pipeline to completion (see run_pipeline).
+
+    Returns:
+        Tuple of (results, wall_time): the run_pipeline results and the elapsed seconds
+    """
+    start = time.perf_counter()
+    results = asyncio.run(run_pipeline(items, stages, queue_size))
+    return results, time.perf_counter() - start
+
+
+def format_stage_times(stages, wall_time):
+    """
+    Summarize where the time of a pipeline run went, e.g.
+    "read 0.41 s, compute 0.22 s, encode 3.90 s (slowest) in 4.05 s".
+    The time of a stage is its work divided by its workers, so the slowest
+    stage is the one that limits the throughput.
+    """
+    times = [stage.busy / max(stage.workers, 1) for stage in stages]
+    slowest = max(range(len(stages)), key=times.__getitem__) if stages else None
+    parts = [f"{stage.name} {t:.2f} s" + (" (slowest)" if k == slowest else "")
+             for k, (stage, t) in enumerate(zip(stages, times))]
+    return f"Pipeline stages: {', '.join(parts)} in {wall_time:.2f} s"
@@ -0,0 +1,175 @@
+import numpy as np
+
+
+# Quantiles tracked per point by default (5%, median, 95%)
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+
+class Welford:
+    """
+    Running mean and variance of arrays (Welford's algorithm), element-wise.
+    Numerically stable for long runs and needs two arrays of the data shape.
+    """
+
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def update(self, x):
+        """Add one observation (an array of the data shape)."""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        """Add the observations of another accumulator (Chan's parallel update)."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self):
+        """Sample variance (NaN with fewer than two observations)."""
+        if self.count < 2:
+            return np.full(self.mean.shape, np.nan)
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        """Sample standard deviation."""
+        return np.sqrt(self.variance)
+
+
+class P2Quantiles:
+    """
+    Streaming quantile estimates of arrays with the P-square algorithm
+    (Jain and Chlamtac, 1985), element-wise and for several quantiles at once.
+    Keeps five markers per quantile and element, so memory does not grow with
+    the number of observations. The first five observations are exact.
+    """
+
+    def __init__(self, shape, quantiles=DEFAULT_QUANTILES):
+        """
+        Args:
+            shape: Shape of each observation
+            quantiles: Probabilities to track, e.g. (0.05, 0.5, 0.95)
+        """
+        self.quantiles = np.asarray(quantiles, dtype=np.float64)
+        self.shape = tuple(np.atleast_1d(shape).astype(int))
+        self.count = 0
+        self.initial = []
+
+        p = self.quantiles.reshape((-1,) + (1,) * len(self.shape))
+        self.increments = np.stack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+        full = (5, len(self.quantiles)) + self.shape
+        self.heights = np.zeros(full)
+        self.positions = np.zeros(full)
+        self.desired = np.zeros(full)
+
+    def update(self, x):
+        """Add one observation (an array of the data shape)."""
+        self.count += 1
+        if self.count <= 5:
+            self.initial.append(np.array(x, dtype=np.float64))
+            return
+        if self.count == 6:
+            self.start_markers()
+
+        q, n = self.heights, self.positions
+        x = np.broadcast_to(x, q.shape[1:])
+
+        # Extend the outer markers and find the cell of x
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        cell = (x >= q[1]).astype(np.int8) + (x >= q[2]) + (x >= q[3])
+        for i in range(1, 5):
+            n[i] += cell < i
+        self.desired += self.increments
+
+        # Move the middle markers towards their desired positions
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(1, 4):
+                d = self.desired[i] - n[i]
+                move = ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1))
+                if not move.any():
+                    continue
+                step = np.sign(d)
+
+                parabolic = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                q_next = np.where(step > 0, q[i + 1], q[i - 1])
+                n_next = np.where(step > 0, n[i + 1], n[i - 1])
+                linear = q[i] + step * (q_next - q[i]) / (n_next - n[i])
+                height = np.where((q[i - 1] < parabolic) & (parabolic < q[i + 1]), parabolic, linear)
+
+                q[i] = np.where(move, height, q[i])
+                n[i] += np.where(move, step, 0)
+
+    def start_markers(self):
+        """Set up the markers from the first five observations."""
+        observations = np.sort(np.stack(self.initial), axis=0)
+        self.heights[:] = observations[:, None]
+        self.positions[:] = np.arange(5).reshape((5, 1) + (1,) * len(self.shape))
+        p = self.increments[2]
+        self.desired[:] = np.stack([np.zeros_like(p), 2 * p, 4 * p, 2 + 2 * p, np.full_like(p, 4)])
+        self.initial = []
+
+    def result(self):
+        """
+        Get the quantile estimates.
+
+        Returns:
+            Array of shape (n_quantiles, *shape), NaN before the first observation
+        """
+        if self.count == 0:
+            return np.full((len(self.quantiles),) + self.shape, np.nan)
+        if self.count <= 5:
+            return np.quantile(np.stack(self.initial), self.quantiles, axis=0)
+        return self.heights[2].copy()
+
+
+class GridHistogram:
+    """
+    Exact distribution of values that fall on a fixed grid, e.g. V_out,min on
+    the sweep voltages. Counts one bin per grid point and element.
+    """
+
+    def __init__(self, grid, shape=()):
+        """
+        Args:
+            grid: Sorted array of the possible values
+            shape: Shape of each observation (one histogram per element)
+        """
+        self.grid = np.asarray(grid, dtype=np.float64)
+        self.counts = np.zeros(tuple(np.atleast_1d(shape).astype(int)) + (len(self.grid),), dtype=np.int64)
+
+    def update(self, values):
+        """Count one observation in the nearest grid bin; NaN values are skipped."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        valid = ~np.isnan(values)
+        index = np.abs(values[valid, None] - self.grid).argmin(axis=1)
+        counts = self.counts.reshape(-1, len(self.grid))
+        np.add.at(counts, (np.flatnonzero(valid), index), 1)
+
+    def merge(self, other):
+        """Add the counts of another histogram on the same grid."""
+        self.counts += other.counts
+
+    def quantile(self, q):
+        """
+        Get quantiles from the counts (the lowest grid value covering the fraction q).
+
+        Returns:
+            Array of the observation shape, NaN where nothing was counted
+        """
+        cumulative = np.cumsum(self.counts, axis=-1)
+        total = cumulative[..., -1:]
+        index = (cumulative >= np.maximum(q * total, 1)).argmax(axis=-1)
+        return np.where(total[..., 0] > 0, self.grid[index], np.nan)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The Analog scripts import each other as top-level modules
+ANALOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ANALOG_DIR)
+os.environ.setdefault('MPLBACKEND', 'Agg')
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ANALOG_DIR
+from aimspice_reader import AIMSPICE_HEADER, count_rows, decode_body, iter_aimspice_chunks, read_aimspice, write_aimspice
+
+
+def format_rows(values, n_columns=3, newline='\n'):
+    """Write values as "%e" text, n_columns per row, like AIM-Spice."""
+    rows = values.reshape(-1, n_columns)
+    return ''.join('\t'.join(f"{v:e}" for v in row) + newline for row in rows).encode()
+
+
+def random_values(n, seed=0):
+    """
+    Random doubles with two-digit exponents (as "%e" writes them) and both signs,
+    including zeros and values beyond the exact powers of ten.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(1, 10, n) * 10.0 ** rng.integers(-40, 40, n) * rng.choice([-1, 1], n)
+    values[::97] = 0.0
+    return values
+
+
+def reference(body, n_columns, columns):
+    """Decode with Python's float(), which is correctly rounded."""
+    rows = [[float(v) for v in line.split()] for line in body.decode().splitlines() if line.strip()]
+    return np.array(rows).reshape(-1, n_columns)[:, list(columns)]
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_decode_matches_float(newline):
+    body = format_rows(random_values(30000), newline=newline)
+    result = decode_body(body, 3, (0, 2))
+    expected = reference(body, 3, (0, 2))
+    assert np.array_equal(result.view(np.uint64), expected.view(np.uint64))
+
+
+def test_decode_keeps_any_columns():
+    body = format_rows(random_values(3000, seed=1))
+    for columns in [(0,), (1,), (2,), (2, 0), (0, 1, 2)]:
+        assert np.array_equal(decode_body(body, 3, columns), reference(body, 3, columns))
+
+
+def test_other_formats():
+    values = random_values(300, seed=2)
+    values[5] = -5e-320
+    body = ''.join(f"{float(a)!r} {b:.3f}\t{c:g}\n\n" for a, b, c in values.reshape(-1, 3)).encode()
+    assert np.array_equal(decode_body(body, 3, (0, 2)), reference(body, 3, (0, 2)))
+
+
+def test_count_rows():
+    assert count_rows(b'') == 0
+    assert count_rows(b' \n\r\n') == 0
+    assert count_rows(b'1 2\n3 4') == 2
+    assert count_rows(b'\n1 2\r\n\n \n3 4\n\n') == 2
+
+
+@pytest.mark.parametrize('body', [
+    b'1.0\t1.0\t2.0\n1.0\tnan?\t2.0\n3.0\t3.0\t4.0\n',  # Parser stops at a bad token
+    b'1.0\t1.0\t2.0\n1.0\t1.0\n',  # Missing value
+    b'1.0\t1.0\t2.0\n1.0\t1.0\t2.0\t3.0\n',  # Extra value
+])
+def test_bad_body(tmp_path, body):
+    file_path = tmp_path / 'tt_0_27'
+    file_path.write_bytes(AIMSPICE_HEADER.encode() + b'\n' + body)
+    with pytest.raises(ValueError, match='tt_0_27'):
+        read_aimspice(file_path)
+    with pytest.raises(ValueError, match='tt_0_27'):
+        list(iter_aimspice_chunks(file_path, chunk_bytes=7))
+
+
+def test_chunks_match_whole_file(tmp_path):
+    file_path = tmp_path / 'tt_0_27'
+    values = random_values(3000, seed=3).reshape(-1, 3)
+    write_aimspice(file_path, values[:, 0], values[:, 2])
+
+    whole = read_aimspice(file_path)
+    for chunk_bytes in [1, 17, 4096, 1 << 20]:
+        chunks = list(iter_aimspice_chunks(file_path, chunk_bytes=chunk_bytes))
+        assert np.array_equal(np.concatenate(chunks), whole)
+
+
+def test_bundled_results_match_float():
+    results_dir = os.path.join(ANALOG_DIR, 'results')
+    for name in sorted(os.listdir(results_dir)):
+        file_path = os.path.join(results_dir, name)
+        with open(file_path, 'rb') as f:
+            f.readline()
+            body = f.read()
+        assert np.array_equal(read_aimspice(file_path), reference(body, 3, (0, 2))), name
+
+
+def test_bad_header(tmp_path):
+    file_path = tmp_path / 'bad'
+    file_path.write_text("v(6)\tid(m1a)\n1.000000e+00\t2.000000e-05\n")
+    with pytest.raises(ValueError):
+        read_aimspice(file_path)
+
+
+def test_write_read_round_trip(tmp_path):
+    file_path = tmp_path / 'tt_0_27'
+    sweep = np.round(np.arange(0, 1.01, 0.01), 2)
+    current = 40e-6 * np.tanh(sweep / 0.2)
+    write_aimspice(file_path, sweep, current)
+
+    with open(file_path) as f:
+        assert f.readline().rstrip('\n') == AIMSPICE_HEADER
+    columns = read_aimspice(file_path)
+    assert np.array_equal(columns[:, 0], [float(f"{v:e}") for v in sweep])
+    assert np.array_equal(columns[:, 1], [float(f"{v:e}") for v in current])
@@ -0,0 +1,32 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from decimation import decimate_band_for_axes, minmax_decimate, minmax_indices
+
+
+def test_minmax_keeps_extremes():
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1.8, 100001)
+    y = np.sin(20 * x) + rng.normal(0, 0.01, len(x))
+    y[12345] = 5.0  # Glitch
+    xd, yd = minmax_decimate(x, y, 500)
+    assert len(xd) <= 2 * 500 + 2
+    assert yd.max() == 5.0 and yd.min() == y.min()
+    assert (xd[0], xd[-1]) == (x[0], x[-1])
+    assert np.array_equal(minmax_indices(y[:50], 500), np.arange(50))
+
+
+def test_band_is_decimated_like_its_edges():
+    fig, ax = plt.subplots(figsize=(4, 3))
+    try:
+        x = np.linspace(0, 1.8, 50001)
+        mean = 40e-6 * np.tanh(x / 0.2)
+        spread = 1e-6 * (1 + np.cos(37 * x))
+        xd, lower, upper = decimate_band_for_axes(ax, x, mean - spread, mean + spread)
+        assert len(xd) < len(x) // 10
+        assert len(xd) == len(lower) == len(upper)
+        assert lower.min() == (mean - spread).min() and upper.max() == (mean + spread).max()
+        keep = np.searchsorted(x, xd)
+        assert np.array_equal(lower, (mean - spread)[keep]) and np.array_equal(upper, (mean + spread)[keep])
+    finally:
+        plt.close(fig)
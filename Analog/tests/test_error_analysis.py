@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from error_analysis import (current_errors, errors_at, evaluate_polynomials, fit_error_trendlines, fit_polynomials,
+                            group_iin_curves, stack_iin_curves)
+
+
+def make_curve(start, stop, n, gain):
+    sweep = np.linspace(start, stop, n)
+    return sweep, gain * sweep + 1e-8 * (sweep / stop) ** 2
+
+
+def test_fit_matches_polyfit():
+    sweep = np.linspace(30e-6, 60e-6, 301)
+    errors = np.abs(np.random.default_rng(0).normal(0, 1e-8, (5, 301)) + 1e-3 * (sweep - 45e-6) ** 2 * 1e4)
+    trendlines = evaluate_polynomials(fit_polynomials(sweep, errors), sweep)
+    for row, trendline in zip(errors, trendlines):
+        assert np.allclose(trendline, np.polyval(np.polyfit(sweep, row, 2), sweep), rtol=1e-10, atol=1e-20)
+
+
+def test_stack_refuses_different_grids():
+    with pytest.raises(ValueError):
+        stack_iin_curves([make_curve(30e-6, 60e-6, 301, 1.0), make_curve(20e-6, 50e-6, 301, 1.0)])
+
+
+def test_curves_are_fitted_on_their_own_grid():
+    curves = [make_curve(30e-6, 60e-6, 301, 0.999), make_curve(20e-6, 50e-6, 151, 0.998),
+              make_curve(30e-6, 60e-6, 301, 0.997)]
+    groups = group_iin_curves(curves)
+    assert [indices for indices, _, _ in groups] == [[0, 2], [1]]
+
+    for indices, sweep, i_out in groups:
+        sweep_smooth, trendlines = fit_error_trendlines(sweep, current_errors(sweep, i_out))
+        for k, trendline in zip(indices, trendlines):
+            own_sweep, own_current = curves[k]
+            # Same as fitting the curve alone, and only over its own range
+            _, alone = fit_error_trendlines(own_sweep, current_errors(own_sweep, own_current[None, :]))
+            assert np.allclose(trendline, alone[0], rtol=1e-12)
+            assert (sweep_smooth.min(), sweep_smooth.max()) == (own_sweep.min(), own_sweep.max())
+
+        abs_error, percent_error = errors_at(sweep, i_out, [40e-6, 45e-6])
+        for k, row in zip(indices, abs_error):
+            own_sweep, own_current = curves[k]
+            idx = [np.argmin(np.abs(own_sweep - t)) for t in (40e-6, 45e-6)]
+            assert np.array_equal(row, np.abs(own_sweep[idx] - own_current[idx]))
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ANALOG_DIR
+from mirror_solver import (compare_with_results, corner_parameters, default_sweeps, evaluate_expression,
+                           read_geometry, read_params, solve_increasing, solve_mirror)
+
+TEMPLATE_PATH = os.path.join(ANALOG_DIR, 'tx.cir')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1.00E-07', 1e-7),
+    ('0.18u', 0.18e-6),
+    ("'4.1E-9/proc_delta'", 4.1e-9 / 0.95),
+    ("'0.36+vt_shift'", 0.46),
+    ("'260*proc_delta*proc_delta'", 260 * 0.95 ** 2),
+    ('{-(0.36 - vt_shift) ** 2}', -(0.26 ** 2)),
+])
+def test_evaluate_expression(text, expected):
+    assert evaluate_expression(text, {'proc_delta': 0.95, 'vt_shift': 0.1}) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize('text', [
+    "'__import__(\"os\").getcwd()'",
+    "'vt_shift.real'",
+    "'abs(vt_shift)'",
+    "'vt_shift[0]'",
+    "'unknown + 1'",
+    "'1/0'",
+    "'(1'",
+])
+def test_evaluate_expression_rejects(text):
+    with pytest.raises(ValueError):
+        evaluate_expression(text, {'vt_shift': 0.1})
+
+
+def test_corner_parameters():
+    tt = corner_parameters(ANALOG_DIR, 'tt')
+    ss = corner_parameters(ANALOG_DIR, 'ss')
+    ff = corner_parameters(ANALOG_DIR, 'ff')
+    assert tt['TOX'] == pytest.approx(4.1e-9)
+    assert ss['TOX'] == pytest.approx(4.1e-9 / 0.95)
+    assert (ss['VTH0'], tt['VTH0'], ff['VTH0']) == pytest.approx((0.46, 0.36, 0.26))
+    assert ff['U0'] == pytest.approx(260 * 1.05 ** 2)
+    assert ss['K1'] == tt['K1'] == ff['K1']
+
+
+def test_read_params():
+    params = read_params(TEMPLATE_PATH)
+    assert {'length', 'width', 'scale', 'size'} <= set(params)
+    assert all(isinstance(value, float) for value in params.values())
+
+
+def test_solve_increasing():
+    targets = np.linspace(0.1, 2.9, 50)
+    x = solve_increasing(lambda v: v ** 3 + v - targets, 0.0, np.full_like(targets, 3.0))
+    assert np.allclose(x ** 3 + x, targets, atol=1e-8)
+
+
+def test_matches_spice_results():
+    rows = compare_with_results(os.path.join(ANALOG_DIR, 'results'), TEMPLATE_PATH)
+    assert len(rows) == 27
+    for name, current_error, v_min_error in rows:
+        assert current_error < 2e-6, name
+        assert v_min_error < 0.1, name
+
+
+def test_corners_and_geometries():
+    geometry = read_geometry(TEMPLATE_PATH)
+    vout, iin = default_sweeps(TEMPLATE_PATH)
+    corners = [('tt', 0.9, 27.0), ('tt', 1.1, 27.0), ('ss', 1.0, 27.0), ('ff', 1.0, 27.0)]
+    currents = solve_mirror(geometry, corners, vout, iin)
+    assert currents.shape == (1, 4, len(iin), len(vout))
+    assert np.all(np.isfinite(currents))
+
+    # V_DD only supplies the bias circuit, not the mirror
+    assert np.allclose(currents[0, 0], currents[0, 1], rtol=0, atol=1e-12)
+    # The corners differ; ff conducts more than ss at low Vout
+    assert currents[0, 3, :, 1:10].sum() > currents[0, 2, :, 1:10].sum()
+
+    # Batching several geometries (and chunking them) gives the same as solving one at a time
+    batch = {name: np.repeat(value, 3) for name, value in geometry.items()}
+    batch['size'] = batch['size'] * np.array([1.0, 2.0, 0.5])
+    together = solve_mirror(batch, corners[:1], vout, iin, chunk_points=1)
+    for g in range(3):
+        single = {name: value[g:g + 1] for name, value in batch.items()}
+        assert np.allclose(together[g], solve_mirror(single, corners[:1], vout, iin), rtol=0, atol=1e-15)
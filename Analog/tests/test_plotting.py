@@ -0,0 +1,74 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from conftest import ANALOG_DIR
+from aimspice_reader import read_aimspice
+from plotting import (ErrorPlotRenderer, SweepPlotRenderer, close_renderers, get_renderer, read_and_split_data,
+                      split_experiments)
+
+
+def nested_sweep(sweep_values, n_experiments):
+    sweep = np.tile(sweep_values, n_experiments)
+    current = np.concatenate([k * 1e-6 + 1e-7 * np.arange(len(sweep_values)) for k in range(n_experiments)])
+    return sweep, current
+
+
+@pytest.mark.parametrize('sweep_values', [
+    np.round(np.arange(0, 1.81, 0.01), 2),  # Ascending
+    np.round(np.arange(1.8, -0.01, -0.01), 2),  # Descending
+    np.round(np.arange(0, 1.81, 0.01), 2) + np.random.default_rng(0).normal(0, 1e-3, 181) * (np.arange(181) > 0),
+])
+@pytest.mark.parametrize('n_experiments', [1, 3, 7])
+def test_split_at_sweep_restarts(sweep_values, n_experiments):
+    sweep, current = nested_sweep(sweep_values, n_experiments)
+    split_sweep, currents = split_experiments(sweep, current)
+    assert np.array_equal(split_sweep, sweep_values)
+    assert np.array_equal(currents, current.reshape(n_experiments, -1))
+
+
+def test_split_keeps_first_experiments():
+    sweep, current = nested_sweep(np.linspace(0, 1, 11), 5)
+    split_sweep, currents = split_experiments(sweep, current, n_experiments=3)
+    assert np.array_equal(currents, current.reshape(5, -1)[:3])
+
+
+def test_split_divides_equally_without_restarts():
+    sweep = np.linspace(0, 1, 30)
+    split_sweep, currents = split_experiments(sweep, sweep * 2, n_experiments=3)
+    assert currents.shape == (3, 10)
+    assert np.array_equal(split_sweep, sweep[:10])
+
+
+def test_split_refuses_unequal_experiments():
+    sweep, current = nested_sweep(np.linspace(0, 1, 11), 3)
+    with pytest.raises(ValueError):
+        split_experiments(sweep[:-2], current[:-2])
+
+
+def test_bundled_results_split():
+    results_dir = os.path.join(ANALOG_DIR, 'results')
+    for name in sorted(os.listdir(results_dir)):
+        if name.endswith('_Iin'):
+            continue
+        file_path = os.path.join(results_dir, name)
+        sweep_values, currents = read_and_split_data(file_path, use_cache=False)
+        columns = read_aimspice(file_path)
+        assert currents.shape == (3, len(sweep_values)), name
+        assert np.array_equal(currents.ravel(), columns[:, 1]), name
+
+
+def test_close_renderers():
+    close_renderers()
+    open_before = set(plt.get_fignums())
+    sweep_renderer = get_renderer(SweepPlotRenderer, 3)
+    assert get_renderer(SweepPlotRenderer, 3) is sweep_renderer
+    get_renderer(ErrorPlotRenderer)
+    assert len(set(plt.get_fignums()) - open_before) == 2
+
+    close_renderers()
+    assert set(plt.get_fignums()) == open_before
+    assert get_renderer(SweepPlotRenderer, 3) is not sweep_renderer
+    close_renderers()
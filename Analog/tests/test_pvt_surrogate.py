@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ANALOG_DIR
+from plotting import find_result_files, load_pvt_tensor
+from pvt_metrics import interpolate_at
+from pvt_surrogate import PVTSurrogate
+
+
+@pytest.fixture(scope='module')
+def corners():
+    regular_files, _ = find_result_files(os.path.join(ANALOG_DIR, 'results'))
+    return load_pvt_tensor(regular_files)
+
+
+def test_fitted_corners_are_exact(corners):
+    axes, sweep, tensor = corners
+    surrogate = PVTSurrogate(axes, sweep, tensor)
+    temperatures, vdds = np.meshgrid(axes['temperature'], axes['vdd'])
+    predicted = surrogate.predict('tt', temperatures.ravel(), vdds.ravel())
+    assert np.allclose(predicted, tensor[1].reshape(predicted.shape), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('v, t', [(1, 1), (0, 1), (2, 0)])
+def test_reported_error_matches_held_out_corner(corners, v, t):
+    axes, sweep, tensor = corners
+    held_out = tensor.copy()
+    held_out[1, v, t] = np.nan
+    surrogate = PVTSurrogate(axes, sweep, held_out)
+    temperature, vdd = axes['temperature'][t], axes['vdd'][v]
+
+    metrics = surrogate.metrics('tt', temperature, vdd, target_voltages=(0.9,))
+    reported = metrics['I_out @ V_out=0.9V error'].to_numpy()
+    assert np.isfinite(reported).all() and np.isfinite(metrics['V_out,min error']).all()
+
+    # The leave-one-out RMS is the order of the actual error at the held-out corner
+    actual = np.abs(interpolate_at(sweep, surrogate.predict('tt', temperature, vdd), (0.9,))
+                    - interpolate_at(sweep, tensor[1, v, t][None], (0.9,))).ravel()
+    assert np.all(actual < 3 * reported)
+    assert np.all(actual > reported / 10)
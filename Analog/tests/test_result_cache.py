@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+import result_cache
+from aimspice_reader import read_aimspice, write_aimspice
+from result_cache import get_cache_dir, get_cache_path, load_result_columns
+from result_store import pack_result_file
+
+
+def write_corner(file_path, scale=1.0):
+    sweep = np.round(np.arange(0, 1.01, 0.01), 2)
+    write_aimspice(file_path, np.tile(sweep, 3), scale * 40e-6 * np.tanh(np.tile(sweep, 3) / 0.2))
+
+
+def cache_entries(file_path):
+    cache_dir = get_cache_dir(file_path)
+    return sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []
+
+
+def test_miss_then_memory_mapped_hit(tmp_path):
+    file_path = tmp_path / 'results' / 'tt_0_27'
+    file_path.parent.mkdir()
+    write_corner(file_path)
+
+    parsed = load_result_columns(file_path)
+    assert np.array_equal(parsed, read_aimspice(file_path))
+    assert os.path.exists(get_cache_path(file_path))
+
+    cached = load_result_columns(file_path)
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, parsed)
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    file_path = tmp_path / 'results' / 'tt_0_27'
+    file_path.parent.mkdir()
+    write_corner(file_path)
+    load_result_columns(file_path)
+    old_entry = get_cache_path(file_path)
+
+    # Same size, only the content and the mtime change
+    write_corner(file_path, scale=1.5)
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert get_cache_path(file_path) != old_entry
+
+    assert np.array_equal(load_result_columns(file_path), read_aimspice(file_path))
+    assert cache_entries(file_path) == [os.path.basename(get_cache_path(file_path))]
+
+
+def test_format_version_invalidates(tmp_path, monkeypatch):
+    file_path = tmp_path / 'results' / 'tt_0_27'
+    file_path.parent.mkdir()
+    write_corner(file_path)
+    old_entry = get_cache_path(file_path)
+
+    monkeypatch.setattr(result_cache, 'CACHE_FORMAT_VERSION', result_cache.CACHE_FORMAT_VERSION + 1)
+    assert get_cache_path(file_path) != old_entry
+
+
+def test_corrupt_entry_is_replaced(tmp_path):
+    file_path = tmp_path / 'results' / 'tt_0_27'
+    file_path.parent.mkdir()
+    write_corner(file_path)
+    load_result_columns(file_path)
+
+    with open(get_cache_path(file_path), 'wb') as f:
+        f.write(b'not an npy file')
+    assert np.array_equal(load_result_columns(file_path), read_aimspice(file_path))
+    assert np.array_equal(np.load(get_cache_path(file_path)), read_aimspice(file_path))
+
+
+def test_uncached_reads(tmp_path):
+    file_path = tmp_path / 'results' / 'tt_0_27'
+    file_path.parent.mkdir()
+    write_corner(file_path)
+    assert np.array_equal(load_result_columns(file_path, use_cache=False), read_aimspice(file_path))
+    assert cache_entries(file_path) == []
+
+    # Result stores are read directly and never cached
+    store_path = tmp_path / 'results' / 'tt_0_0'
+    pack_result_file(file_path, store_path)
+    assert np.array_equal(load_result_columns(store_path), read_aimspice(file_path))
+    assert cache_entries(store_path) == []
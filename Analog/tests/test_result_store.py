@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ANALOG_DIR
+from aimspice_reader import read_aimspice, write_aimspice
+from result_store import (COMPRESSIONS, convert_directory, decode_curves, decode_sweep, encode_curves,
+                          encode_sweep, is_result_store, pack_result_file, read_result_store,
+                          read_store_columns, unpack_result_file, write_result_store)
+
+RESULTS_DIR = os.path.join(ANALOG_DIR, 'results')
+RESULT_FILES = sorted(os.listdir(RESULTS_DIR))
+
+
+def same_bits(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return a.shape == b.shape and np.array_equal(a.view(np.uint64), b.view(np.uint64))
+
+
+@pytest.mark.parametrize('compression', COMPRESSIONS)
+def test_bundled_results_round_trip(tmp_path, compression):
+    for name in RESULT_FILES:
+        text_path = os.path.join(RESULTS_DIR, name)
+        store_path = tmp_path / f"{name}.store"
+        pack_result_file(text_path, store_path, compression)
+        assert is_result_store(store_path) and not is_result_store(text_path)
+
+        # Same values as the text parser, bit for bit
+        assert same_bits(read_store_columns(store_path, (0, 1, 2)), read_aimspice(text_path, (0, 1, 2)))
+
+        # Unpacking writes the original text back byte for byte
+        unpacked_path = tmp_path / name
+        unpack_result_file(store_path, unpacked_path)
+        with open(text_path, 'rb') as original, open(unpacked_path, 'rb') as unpacked:
+            assert original.read() == unpacked.read(), name
+
+
+@pytest.mark.parametrize('compression', COMPRESSIONS)
+def test_codecs_are_lossless(compression):
+    rng = np.random.default_rng(0)
+    curves = rng.uniform(-1, 1, (4, 5000)) * 10.0 ** rng.integers(-35, 5, (4, 5000))
+    curves[0, :100] = np.round(curves[0, :100], 3)  # Short decimals
+    curves[1, ::7] = 0.0
+    curves[2, 5] = -0.0
+    curves[3, :50] = np.array([float(f"{v:e}") for v in curves[3, :50]])  # As printed by "%e"
+    decoded = decode_curves(encode_curves(curves, compression), compression, curves.shape)
+    assert same_bits(decoded, curves)
+
+
+@pytest.mark.parametrize('compression', COMPRESSIONS)
+def test_negative_zero_round_trip(tmp_path, compression):
+    text_path = tmp_path / 'tt_0_27'
+    sweep = np.round(np.arange(0, 0.1, 0.01), 2)
+    current = np.array([-0.0, 0.0, 1e-31, -1e-31, 2.5e-6, -2.5e-6, 0.0, -0.0, 1.0, -1.0])
+    write_aimspice(text_path, sweep, current)
+    pack_result_file(text_path, tmp_path / 'store', compression)
+    unpack_result_file(tmp_path / 'store', tmp_path / 'unpacked')
+    assert (tmp_path / 'unpacked').read_bytes() == text_path.read_bytes()
+
+
+def test_unknown_compression():
+    with pytest.raises(ValueError):
+        encode_curves(np.zeros((1, 3)), 'lzma')
+
+
+def test_nested_sweep_is_one_segment():
+    sweep = np.tile(np.round(np.arange(0, 1, 0.01), 2), 3)
+    descriptor = encode_sweep(sweep)
+    assert descriptor == {'scale': 2, 'segments': [[0, 1, 100, 3]]}
+    assert same_bits(decode_sweep(descriptor), sweep)
+
+
+def test_sweep_segments():
+    sweep = np.concatenate([np.round(np.arange(0, 0.5, 0.05), 2), np.round(np.arange(0.5, 1.001, 0.001), 3),
+                            [-2.5]])
+    descriptor = encode_sweep(sweep)
+    assert descriptor is not None and len(descriptor['segments']) <= 4
+    assert same_bits(decode_sweep(descriptor), sweep)
+
+
+def test_irregular_sweep_is_stored_raw(tmp_path):
+    sweep = np.sort(np.random.default_rng(1).uniform(0, 1, 200))
+    assert encode_sweep(sweep) is None
+
+    store_path = tmp_path / 'store'
+    curves = np.vstack([sweep * 2e-5])
+    write_result_store(store_path, ['sweep', 'sweep', 'id'], sweep, curves)
+    header, read_sweep, read_curves = read_result_store(store_path)
+    assert 'block' in header['sweep']
+    assert same_bits(read_sweep, sweep) and same_bits(read_curves, curves)
+
+
+def test_truncated_store(tmp_path):
+    store_path = tmp_path / 'tt_0_27'
+    pack_result_file(os.path.join(RESULTS_DIR, 'tt_0_27'), store_path)
+    data = store_path.read_bytes()
+    store_path.write_bytes(data[:-3])
+    with pytest.raises(ValueError, match='truncated'):
+        read_result_store(store_path)
+
+
+def test_convert_directory_round_trip(tmp_path):
+    n_packed, before, after = convert_directory(RESULTS_DIR, tmp_path / 'stores')
+    assert n_packed == len(RESULT_FILES) and after < before
+
+    header, _, _ = read_result_store(tmp_path / 'stores' / 'ss_01_27')
+    assert header['metadata']['process'] == 'ss' and header['metadata']['vdd'] == 0.9
+
+    n_unpacked, _, _ = convert_directory(tmp_path / 'stores', tmp_path / 'text', pack=False)
+    assert n_unpacked == len(RESULT_FILES)
+    for name in RESULT_FILES:
+        with open(os.path.join(RESULTS_DIR, name), 'rb') as original:
+            assert (tmp_path / 'text' / name).read_bytes() == original.read(), name
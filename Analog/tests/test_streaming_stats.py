@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from streaming_stats import GridHistogram, P2Quantiles, Welford
+
+
+def p2_reference(observations, p):
+    """Scalar P-square estimate of one quantile, step by step as in Jain and Chlamtac (1985)."""
+    q = sorted(observations[:5])
+    n = [0, 1, 2, 3, 4]
+    desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+    increments = [0, p / 2, p, (1 + p) / 2, 1]
+    for x in observations[5:]:
+        if x < q[0]:
+            q[0] = x
+        if x > q[4]:
+            q[4] = x
+        k = sum(x >= q[i] for i in (1, 2, 3))
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = [d + inc for d, inc in zip(desired, increments)]
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                n[i] += s
+    return q[2]
+
+
+def test_welford_matches_two_pass():
+    rng = np.random.default_rng(0)
+    data = 40e-6 + rng.normal(0, 1e-9, (2000, 3, 4))  # I_out-like: large offset, small spread
+    stats = Welford((3, 4))
+    for x in data:
+        stats.update(x)
+    assert stats.count == len(data)
+    assert np.allclose(stats.mean, data.mean(axis=0), rtol=1e-14, atol=0)
+    assert np.allclose(stats.variance, data.var(axis=0, ddof=1), rtol=1e-9)
+    assert np.allclose(stats.std, data.std(axis=0, ddof=1), rtol=1e-9)
+
+
+def test_welford_merge():
+    rng = np.random.default_rng(1)
+    data = rng.normal(5, 2, (500, 7))
+    whole, left, right, empty = Welford(7), Welford(7), Welford(7), Welford(7)
+    for k, x in enumerate(data):
+        whole.update(x)
+        (left if k < 123 else right).update(x)
+    left.merge(right)
+    left.merge(empty)
+    assert left.count == whole.count
+    assert np.allclose(left.mean, whole.mean, rtol=1e-13)
+    assert np.allclose(left.variance, whole.variance, rtol=1e-12)
+
+
+def test_welford_few_observations():
+    stats = Welford(3)
+    assert np.isnan(stats.variance).all()
+    stats.update(np.array([1.0, 2.0, 3.0]))
+    assert np.isnan(stats.std).all()
+
+
+@pytest.mark.parametrize('n', [1, 3, 5])
+def test_p2_first_observations_are_exact(n):
+    data = np.random.default_rng(n).normal(size=(n, 4))
+    sketch = P2Quantiles(4, (0.05, 0.5, 0.95))
+    for x in data:
+        sketch.update(x)
+    assert np.allclose(sketch.result(), np.quantile(data, (0.05, 0.5, 0.95), axis=0))
+
+
+def test_p2_empty():
+    assert np.isnan(P2Quantiles((2, 3)).result()).all()
+
+
+def test_p2_matches_scalar_reference():
+    rng = np.random.default_rng(2)
+    data = np.stack([rng.normal(size=3000), rng.exponential(size=3000), rng.uniform(size=3000),
+                     np.repeat(rng.normal(size=300), 10)], axis=1)  # Last: many ties
+    quantiles = (0.05, 0.25, 0.5, 0.95)
+    sketch = P2Quantiles(4, quantiles)
+    for x in data:
+        sketch.update(x)
+    expected = [[p2_reference(list(data[:, j]), p) for j in range(4)] for p in quantiles]
+    assert np.allclose(sketch.result(), expected, rtol=1e-12, atol=0)
+
+
+def test_p2_accuracy():
+    rng = np.random.default_rng(3)
+    data = rng.normal(size=(20000, 2)) * [1.0, 1e-6] + [0.0, 40e-6]
+    sketch = P2Quantiles(2, (0.05, 0.5, 0.95))
+    for x in data:
+        sketch.update(x)
+    exact = np.quantile(data, (0.05, 0.5, 0.95), axis=0)
+    assert np.all(np.abs(sketch.result() - exact) < 0.03 * data.std(axis=0))
+
+
+def test_grid_histogram():
+    grid = np.round(np.arange(0, 1.01, 0.01), 2)
+    rng = np.random.default_rng(4)
+    values = grid[rng.integers(0, len(grid), (1000, 3))]
+    values[::50, 1] = np.nan
+    histogram, left, right = GridHistogram(grid, 3), GridHistogram(grid, 3), GridHistogram(grid, 3)
+    for k, x in enumerate(values):
+        histogram.update(x)
+        (left if k % 2 else right).update(x)
+    left.merge(right)
+    assert np.array_equal(left.counts, histogram.counts)
+    assert np.array_equal(histogram.counts.sum(axis=-1), np.sum(~np.isnan(values), axis=0))
+
+    for q in (0.05, 0.5, 0.95):
+        for j in range(3):
+            column = np.sort(values[~np.isnan(values[:, j]), j])
+            assert histogram.quantile(q)[j] == column[max(int(np.ceil(q * len(column))) - 1, 0)]
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from vcd_reader import load_tsetlin_model
+
+GATES = {'not': lambda a: not a, 'buf': lambda a: a, 'and': lambda *a: all(a), 'or': lambda *a: any(a),
+         'nand': lambda *a: not all(a)}
+
+
+def flipflop2(name, d, q):
+    """Gate list of flipflop2.v (output, gate, inputs), nets prefixed with the instance name."""
+    n = lambda net: f"{name}.{net}"
+    return [(n('not_D'), 'not', [d]), (n('not_clk'), 'not', ['clk']), (n('not_reset'), 'not', ['reset']),
+            (n('t1'), 'nand', [d, n('not_clk')]), (n('t2'), 'nand', [n('not_D'), n('not_clk')]),
+            (n('t3'), 'nand', [n('t1'), n('t4')]), (n('t4'), 'nand', [n('t3'), n('t2')]),
+            (n('not_t3'), 'not', [n('t3')]),
+            (n('t5'), 'nand', [n('t3'), 'clk']), (n('t6'), 'nand', [n('not_t3'), 'clk']),
+            (n('Q_int'), 'nand', [n('t5'), n('t8'), n('not_reset')]), (n('t8'), 'nand', [n('t6'), n('Q_int')]),
+            (q, 'buf', [n('Q_int')])]
+
+
+# combinatorics.v on the register outputs, in the order of the source
+COMBINATORICS = [
+    ('notb1', 'not', ['b1']), ('t1', 'and', ['b2', 'notb1', 'betaOut']), ('t2', 'and', ['b2', 'notb1', 'b0']),
+    ('notb2', 'not', ['b2']), ('t3', 'and', ['notb2', 'b1', 'b0', 'betaOut']), ('b2o', 'or', ['t1', 't2', 't3']),
+    ('notbeta', 'not', ['betaOut']), ('u1', 'and', ['notb2', 'b1', 'notbeta']), ('u2', 'and', ['notb2', 'b0', 'notbeta']),
+    ('notb0', 'not', ['b0']), ('u3', 'and', ['b2', 'notb1', 'notb0', 'notbeta']), ('b1o', 'or', ['u1', 'u2', 'u3']),
+    ('v1', 'and', ['notb2', 'notb0', 'betaOut']), ('v2', 'and', ['notb2', 'notb0', 'notbeta']),
+    ('v3', 'and', ['b2', 'notb1', 'notb0']), ('b0o', 'or', ['v1', 'v2', 't1', 'v3']),
+    ('w1', 'and', ['notb2', 'b1', 'notb0', 'notbeta']), ('w2', 'and', ['b2', 'notb1']),
+    ('alpha', 'or', ['w1', 't3', 'w2'])]
+
+# registerNY2 feeding combinatorics, whose next state goes back into the register
+SYSTEM = (flipflop2('u2', 'b2o', 'b2') + flipflop2('u1', 'b1o', 'b1') + flipflop2('u0', 'b0o', 'b0')
+          + flipflop2('beta_Flip', 'beta', 'betaOut') + COMBINATORICS)
+
+
+def settle(nets):
+    """Evaluate the gates in order until no net changes."""
+    for _ in range(50):
+        changed = False
+        for output, gate, inputs in SYSTEM:
+            value = GATES[gate](*(nets.get(net, False) for net in inputs))
+            changed |= nets.get(output) != value
+            nets[output] = value
+        if not changed:
+            return
+    raise AssertionError("Netlist does not settle")
+
+
+def gate_level_run(betas, resets):
+    """
+    Scalar reference: one clock period per input, beta set up while the clock
+    is low. A reset pulse starts after the rising edge and ends while the
+    clock is low again (released while it is high, the slave latch would
+    reload the value captured at the edge). The outputs are read at the end
+    of the period, as check_tsetlin_model in vcd_reader compares them.
+    """
+    nets = {}
+    outputs = []
+    for beta, reset in zip(betas, resets):
+        phases = [(False, False), (True, False)]
+        phases += [(True, True), (False, True), (False, False)] if reset else [(False, False)]
+        for clk, reset_level in phases:
+            nets.update(clk=clk, beta=bool(beta), reset=reset_level)
+            settle(nets)
+        outputs.append([nets[net] for net in ('b2', 'b1', 'b0', 'betaOut', 'alpha')])
+    return np.array(outputs)
+
+
+@pytest.fixture(scope='module')
+def model():
+    return load_tsetlin_model()
+
+
+def test_reset_forces_outputs_high():
+    outputs = gate_level_run([0, 0, 0], [1, 0, 0])
+    assert outputs[0, :4].all()  # Q forced high, not low as the comment in flipflop2.v says
+    assert not outputs[1, :3].any()  # The unused state 111 goes to 000
+
+
+def test_model_matches_gate_level_reference(model):
+    n_automata, n_cycles = 130, 120
+    rng = np.random.default_rng(0)
+    betas = rng.random((n_cycles, n_automata)) < 0.5
+    resets = rng.random((n_cycles, n_automata)) < 0.1
+    resets[0] = True
+
+    bank = model.TsetlinBank(n_automata)
+    outputs = []
+    for beta, reset in zip(betas, resets):
+        alpha = bank.step(model.pack_bits(beta), model.pack_bits(reset))
+        outputs.append([model.unpack_bits(words, n_automata) for words in (bank.b2, bank.b1, bank.b0, bank.beta, alpha)])
+    outputs = np.array(outputs)
+
+    # Automata in the first, a middle and the last (partial) word
+    for automaton in (0, 63, 64, 129):
+        expected = gate_level_run(betas[:, automaton], resets[:, automaton])
+        assert np.array_equal(outputs[:, :, automaton], expected), f"automaton {automaton}"
+
+    # run() is the same loop
+    run_bank = model.TsetlinBank(n_automata)
+    states, alphas = run_bank.run(model.pack_bits(betas), model.pack_bits(resets))
+    assert np.array_equal(model.unpack_bits(states, n_automata), outputs[:, :3])
+    assert np.array_equal(model.unpack_bits(alphas, n_automata), outputs[:, 4])
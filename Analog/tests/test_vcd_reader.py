@@ -0,0 +1,201 @@
+import os
+
+import numpy as np
+import pytest
+
+from vcd_reader import (VALUE_DTYPES, VCDIndex, find_variable, parse_timescale, parse_vcd_header,
+                        scan_changes)
+
+# (name, id code, width, type): short codes, codes with a shared first KEY_BYTES
+# bytes, a code that looks like a timestamp and a vector dumped as a scalar
+SIGNALS = [('clk', '!', 1, 'wire'), ('reset', '"', 1, 'wire'), ('bus', '%', 8, 'wire'),
+           ('wide', '&', 70, 'wire'), ('level', 'r1', 64, 'real'), ('tick', '#', 1, 'reg'),
+           ('long_a', 'longcode123', 1, 'wire'), ('long_b', 'longcode124', 4, 'wire'),
+           ('long_c', 'longcod', 1, 'wire')]
+SCALAR_CODES = {'0': 0, '1': 1, 'x': 2, 'X': 2, 'z': 3, 'Z': 3}
+
+
+def write_vcd(path, n_steps=400, seed=0, newline='\n'):
+    """Write a random dump with every kind of change line, one change per line."""
+    rng = np.random.default_rng(seed)
+    lines = ['$date today $end', '$timescale 10 ps $end', '$scope module tb $end', '$scope module dut $end']
+    lines += [f"$var {kind} {width} {code} {name} $end" for name, code, width, kind in SIGNALS]
+    lines += ['$upscope $end', '$var wire 1 ( clk $end', '$upscope $end', '$enddefinitions $end',
+              '$dumpvars', 'x!', 'bx %', 'r0 r1', '$end']
+    time = 0
+    for _ in range(n_steps):
+        time += int(rng.integers(1, 1000))
+        lines.append(f"#{time}")
+        for name, code, width, kind in SIGNALS:
+            if rng.random() < 0.5:
+                continue
+            if kind == 'real':
+                lines.append(f"r{rng.normal() * 10.0 ** rng.integers(-12, 3):.17g} {code}")
+            elif width == 1 and rng.random() < 0.9:
+                lines.append(f"{rng.choice(list(SCALAR_CODES))}{code}")
+            elif width == 1:
+                lines.append(f"b{rng.choice(['0', '1', 'x'])} {code}")
+            else:
+                bits = ''.join(rng.choice(['0', '1'], int(rng.integers(1, width + 1))))
+                if rng.random() < 0.1:
+                    bits = bits[:-1] + rng.choice(['x', 'z'])
+                lines.append(f"b{bits} {code}")
+        if rng.random() < 0.05:
+            lines.append('$comment checkpoint $end')
+    with open(path, 'w', newline='') as f:
+        f.write(newline.join(lines) + newline)
+
+
+def naive_changes(path):
+    """Reference parser: one Python step per line."""
+    with open(path, 'rb') as f:
+        _, variables = parse_vcd_header(f)
+        text = f.read().decode()
+    kind_of = {v['code']: v['kind'] for v in variables}
+    changes = {code: ([], []) for code in kind_of}
+    time = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == '#':
+            time = int(line[1:])
+            continue
+        if line[0] in SCALAR_CODES:
+            value, code = SCALAR_CODES[line[0]], line[1:]
+        elif line[0] in 'bBrR':
+            text_value, code = line[1:].split()
+            if code not in kind_of:
+                continue
+            if kind_of[code] == 'real':
+                value = float(text_value)
+            elif kind_of[code] == 'scalar':
+                value = SCALAR_CODES[text_value[-1]]
+            elif set(text_value) <= {'0', '1'} and len(text_value) <= 63:
+                value = int(text_value, 2)
+            else:
+                value = -1
+        else:
+            continue
+        if code in changes:
+            changes[code][0].append(time)
+            changes[code][1].append(value)
+    return {code: (np.array(times, dtype=np.int64), np.array(values, dtype=VALUE_DTYPES[kind_of[code]]))
+            for code, (times, values) in changes.items()}
+
+
+@pytest.fixture(scope='module')
+def vcd_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('vcd') / 'dump.vcd'
+    write_vcd(path)
+    return path
+
+
+def assert_same_changes(times, values, expected):
+    assert np.array_equal(times, expected[0])
+    assert values.dtype == expected[1].dtype
+    assert np.array_equal(values, expected[1], equal_nan=values.dtype.kind == 'f')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 17, 4096, 1 << 20])
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_scan_matches_naive_parse(tmp_path, chunk_size, newline):
+    path = tmp_path / 'dump.vcd'
+    write_vcd(path, n_steps=150 if chunk_size == 1 else 400, newline=newline)
+    expected = naive_changes(path)
+
+    with open(path, 'rb') as f:
+        _, variables = parse_vcd_header(f)
+        counts, end_time = scan_changes(f, variables, tmp_path, chunk_size)
+
+    for variable in variables:
+        code, kind = variable['code'], variable['kind']
+        stem = os.path.join(tmp_path, code.encode().hex())
+        times = np.fromfile(stem + '.t', dtype=np.int64)
+        values = np.fromfile(stem + '.v', dtype=VALUE_DTYPES[kind])
+        assert counts[code] == len(times)
+        assert_same_changes(times, values, expected[code])
+    assert end_time == max(len(t) and t[-1] for t, _ in expected.values())
+
+
+def test_header(vcd_path):
+    with open(vcd_path, 'rb') as f:
+        timescale, variables = parse_vcd_header(f)
+        assert f.readline().strip() == b'$dumpvars'
+    assert timescale == pytest.approx(10e-12)
+    assert find_variable(variables, 'clk')['name'] == 'tb.clk'  # The shallowest match
+    assert find_variable(variables, 'dut.clk')['code'] == '!'
+    assert find_variable(variables, 'level')['kind'] == 'real'
+    assert find_variable(variables, 'wide')['kind'] == 'vector'
+    with pytest.raises(ValueError):
+        find_variable(variables, 'missing')
+
+
+def test_parse_timescale():
+    assert parse_timescale('1ps') == 1e-12
+    assert parse_timescale(' 100 ns ') == pytest.approx(1e-7)
+    with pytest.raises(ValueError):
+        parse_timescale('1 minute')
+
+
+def test_index_queries(vcd_path, tmp_path):
+    expected = naive_changes(vcd_path)
+    index = VCDIndex(vcd_path, index_dir=tmp_path / 'index')
+    times, values = expected['!']
+
+    # value_at: the last change at or before each time, x before the first change
+    queries = np.array([0, times[0] - 1, times[0], times[0] + 1, times[-1], times[-1] + 10])
+    sampled = index.value_at('dut.clk', queries)
+    for query, value in zip(queries, sampled):
+        before = np.flatnonzero(times <= query)
+        assert value == (values[before[-1]] if len(before) else 2)
+
+    start, end = int(times[10]) + 1, int(times[50])
+    window_times, window_values = index.window('dut.clk', start, end)
+    inside = (times > start) & (times <= end)
+    assert window_times[0] == start and window_values[0] == index.value_at('dut.clk', start)
+    assert np.array_equal(window_times[1:], times[inside])
+    assert np.array_equal(window_values[1:], values[inside])
+
+    rising = [t for k, t in enumerate(times) if values[k] == 1 and (k == 0 or values[k - 1] != 1)]
+    assert np.array_equal(index.rising_edges('dut.clk'), rising)
+
+
+def test_index_is_extended_and_invalidated(vcd_path, tmp_path):
+    index_dir = tmp_path / 'index'
+    expected = naive_changes(vcd_path)
+    assert VCDIndex(vcd_path, ['bus'], index_dir).names == ['tb.dut.bus']
+
+    # A second signal is added to the same index
+    index = VCDIndex(vcd_path, ['long_b'], index_dir)
+    assert index.names == ['tb.dut.bus', 'tb.dut.long_b']
+    assert_same_changes(*index.changes('bus'), expected['%'])
+    assert_same_changes(*index.changes('long_b'), expected['longcode124'])
+
+    # A rewritten dump is indexed again
+    changed_path = tmp_path / 'changed.vcd'
+    write_vcd(changed_path, seed=1)
+    os.replace(changed_path, tmp_path / 'dump.vcd')
+    index = VCDIndex(tmp_path / 'dump.vcd', ['bus'], index_dir)
+    assert index.names == ['tb.dut.bus']
+    assert_same_changes(*index.changes('bus'), naive_changes(tmp_path / 'dump.vcd')['%'])
+
+
+def test_index_keeps_other_files(vcd_path, tmp_path):
+    # A non-empty directory that is not an index is refused and left alone
+    precious_dir = tmp_path / 'precious'
+    precious_dir.mkdir()
+    (precious_dir / 'important.txt').write_text('keep')
+    with pytest.raises(ValueError):
+        VCDIndex(vcd_path, ['bus'], precious_dir)
+    assert os.listdir(precious_dir) == ['important.txt']
+
+    # Rebuilding an outdated index only removes the files it wrote
+    index_dir = tmp_path / 'index'
+    VCDIndex(vcd_path, ['bus', 'long_b'], index_dir)
+    (index_dir / 'notes.txt').write_text('keep')
+    write_vcd(tmp_path / 'dump.vcd', seed=2)
+    index = VCDIndex(tmp_path / 'dump.vcd', ['bus'], index_dir)
+    assert index.names == ['tb.dut.bus']
+    assert sorted(os.listdir(index_dir)) == sorted(['index.json', 'notes.txt', b'%'.hex() + '.t', b'%'.hex() + '.v'])
+    assert_same_changes(*index.changes('bus'), naive_changes(tmp_path / 'dump.vcd')['%'])
@@ -0,0 +1,187 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+
+# Tracing is off unless enable_tracing() is called, span() is then a shared no-op
+_enabled = False
+_events = []
+_NO_SPAN = contextlib.nullcontext()
+
+
+def enable_tracing(enabled=True):
+    """Turn recording of spans on or off in this process."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_tracing_enabled():
+    """Check whether spans are recorded in this process."""
+    return _enabled
+
+
+def reset_peak_rss():
+    """
+    Reset the peak resident set size of this process (Linux only).
+
+    Returns:
+        True if the peak was reset, so the next get_peak_rss covers only what follows
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss():
+    """Get the peak resident set size of this process in bytes, or None if unknown."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024  # Linux reports KiB
+
+
+def get_bytes_read():
+    """Get the number of bytes this process has read so far (Linux only), or None."""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+@contextlib.contextmanager
+def _record_span(name, category, args):
+    start = time.perf_counter_ns()
+    start_cpu = time.process_time()
+    start_read = get_bytes_read()
+    try:
+        yield
+    finally:
+        end_read = get_bytes_read()
+        args = dict(args)
+        args['cpu_ms'] = (time.process_time() - start_cpu) * 1e3
+        args['peak_rss_mb'] = (get_peak_rss() or 0) / 2**20
+        if start_read is not None and end_read is not None:
+            args['bytes_read'] = end_read - start_read
+
+        _events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start / 1e3,
+            'dur': (time.perf_counter_ns() - start) / 1e3,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        })
+
+
+def span(name, category='stage', **args):
+    """
+    Record the wall time, CPU time, peak RSS and bytes read of a block of work.
+    Does nothing unless tracing is enabled.
+
+    Args:
+        name: Span name, e.g. 'parse' or 'render_corner_plot'
+        category: 'stage' for pipeline stages, 'file' for per-file work, 'step' for steps inside those
+        **args: Extra values shown with the span, e.g. file=...
+
+    Returns:
+        Context manager
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _record_span(name, category, args)
+
+
+def drain_events():
+    """Remove and return the spans recorded so far (e.g. to send them back from a worker)."""
+    events = _events[:]
+    del _events[:]
+    return events
+
+
+def add_events(events):
+    """Add spans recorded in another process."""
+    _events.extend(events)
+
+
+def write_chrome_trace(trace_path, events=None):
+    """
+    Write spans as Chrome trace JSON (chrome://tracing, ui.perfetto.dev).
+
+    Args:
+        trace_path: Path of the JSON file
+        events: Spans to write (default: all recorded in this process)
+    """
+    events = list(_events if events is None else events)
+    names = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': label}}
+             for pid, label in process_labels(events).items()]
+    with open(trace_path, 'w') as f:
+        json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, f)
+
+
+def process_labels(events):
+    """Label this process 'main' and every other process in the spans 'worker N'."""
+    labels = {os.getpid(): 'main'}
+    for event in events:
+        if event['pid'] not in labels:
+            labels[event['pid']] = f"worker {len(labels)}"
+    return labels
+
+
+def summarize(events=None):
+    """
+    Total the spans by name.
+
+    Args:
+        events: Spans to summarize (default: all recorded in this process)
+
+    Returns:
+        List of dicts with keys name, category, count, wall_s, cpu_s, peak_rss_mb,
+        bytes_read, sorted by total wall time
+    """
+    totals = {}
+    for event in _events if events is None else events:
+        row = totals.setdefault(event['name'], {
+            'name': event['name'], 'category': event['cat'], 'count': 0,
+            'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': 0.0, 'bytes_read': 0
+        })
+        row['count'] += 1
+        row['wall_s'] += event['dur'] / 1e6
+        row['cpu_s'] += event['args']['cpu_ms'] / 1e3
+        row['peak_rss_mb'] = max(row['peak_rss_mb'], event['args']['peak_rss_mb'])
+        row['bytes_read'] += event['args'].get('bytes_read', 0)
+    return sorted(totals.values(), key=lambda row: -row['wall_s'])
+
+
+def format_summary(rows):
+    """Format the rows from summarize as a text table."""
+    lines = [f"{'Span':<32} {'Kind':<6} {'Count':>6} {'Wall [s]':>9} {'CPU [s]':>9} "
+             f"{'Peak RSS [MB]':>14} {'Read [MB]':>10}"]
+    for row in rows:
+        lines.append(f"{row['name']:<32} {row['category']:<6} {row['count']:>6} {row['wall_s']:>9.3f} "
+                     f"{row['cpu_s']:>9.3f} {row['peak_rss_mb']:>14.1f} {row['bytes_read'] / 2**20:>10.2f}")
+    return '\n'.join(lines)
@@ -0,0 +1,698 @@
+import argparse
+import importlib.util
+import json
+import os
+import re
+import shutil
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from decimation import decimate_for_axes
+from tracing import span
+from plotting import setup_plot_style, save_figure
+
+
+# Bump when the index layout changes so that indexes written by an older reader are rebuilt
+INDEX_FORMAT_VERSION = 1
+
+# Bytes read per step of the streaming scan (always cut at a line end)
+CHUNK_SIZE = 16 << 20
+
+# Signals of the Tsetlin automaton (detTotaleSystem.bde) indexed by default
+TSETLIN_SIGNALS = ('clk', 'reset', 'beta', 'b2o', 'b1o', 'b0o', 'betaOut', 'alpha')
+
+# Reference model used by check_tsetlin_model (--model)
+TSETLIN_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Digital', 'TsetlinMachine',
+                                  'tsetlin_model.py')
+
+# Scalar values are stored as codes 0, 1, 2 (x) and 3 (z), indexed by the first byte of a change line
+NOT_SCALAR = 255
+SCALAR_TABLE = np.full(256, NOT_SCALAR, dtype=np.uint8)
+SCALAR_TABLE[[ord(c) for c in '01xXzZ']] = [0, 1, 2, 2, 3, 3]
+VALUE_X = 2
+
+# First bytes of vector and real change lines ("b1010 <code>", "r1.5 <code>")
+VALUED_PREFIXES = np.frombuffer(b'bBrR', dtype=np.uint8)
+
+# Id codes are matched as packed keys of their first bytes and length; longer codes are checked in full
+KEY_BYTES = 7
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+# Stored value of a vector with x or z bits
+VECTOR_UNKNOWN = -1
+
+# Storage type of the values of each kind of signal
+VALUE_DTYPES = {'scalar': np.uint8, 'vector': np.int64, 'real': np.float64}
+KIND_IDS = {'scalar': 0, 'vector': 1, 'real': 2}
+
+TIME_UNITS = {'s': 1.0, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9, 'ps': 1e-12, 'fs': 1e-15}
+
+
+def parse_timescale(text):
+    """
+    Parse a $timescale value such as "1ps" or "10 ns".
+
+    Returns:
+        Seconds per time tick
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*([munpf]?s)\s*', text)
+    if match is None:
+        raise ValueError(f"Unexpected VCD timescale: {text!r}")
+    return int(match.group(1)) * TIME_UNITS[match.group(2)]
+
+
+def parse_vcd_header(f):
+    """
+    Parse the header of a VCD file up to $enddefinitions.
+    Leaves f at the first line of the value changes.
+
+    Args:
+        f: VCD file opened in binary mode
+
+    Returns:
+        Tuple of (timescale, variables): seconds per time tick, and a list of
+        dicts with the hierarchical name, id code, width and kind
+        ('scalar', 'vector' or 'real') of every $var
+    """
+    scopes, variables, timescale = [], [], 1.0
+    command, args = None, []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("VCD header has no $enddefinitions")
+        for token in line.decode('utf-8', errors='replace').split():
+            if command is None:
+                if token.startswith('$'):
+                    command, args = token, []
+                continue
+            if token != '$end':
+                args.append(token)
+                continue
+
+            if command == '$enddefinitions':
+                return timescale, variables
+            if command == '$timescale':
+                timescale = parse_timescale(''.join(args))
+            elif command == '$scope':
+                scopes.append(args[-1])
+            elif command == '$upscope':
+                scopes.pop()
+            elif command == '$var':
+                var_type, width, code, reference = args[:4]
+                if var_type in ('real', 'realtime'):
+                    kind = 'real'
+                else:
+                    kind = 'scalar' if int(width) == 1 else 'vector'
+                variables.append({'name': '.'.join(scopes + [reference]), 'code': code,
+                                  'width': int(width), 'kind': kind})
+            command = None
+
+
+def find_variable(variables, name):
+    """
+    Find a signal by its hierarchical name or by the end of it, e.g. "b2o"
+    for "tb.dut.b2o". Several matches resolve to the one closest to the top.
+
+    Args:
+        variables: List of variable dicts (see parse_vcd_header)
+        name: Signal name
+
+    Returns:
+        Variable dict
+    """
+    matches = [v for v in variables if v['name'] == name or v['name'].endswith('.' + name)]
+    if not matches:
+        raise ValueError(f"Signal {name} not found, available: {', '.join(v['name'] for v in variables)}")
+    return min(matches, key=lambda v: (v['name'].count('.'), v['name']))
+
+
+def split_lines(data):
+    """
+    Find the lines of a chunk of text.
+
+    Returns:
+        Tuple of (bytes, starts, ends): uint8 view of data and the start and
+        end offsets of every non-empty line (without the line break)
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(arr == NEWLINE)
+    if len(arr) and arr[-1] != NEWLINE:
+        ends = np.append(ends, len(arr))
+    starts = np.concatenate([[0], ends[:-1] + 1]).astype(np.int64)
+    ends = ends - ((ends > starts) & (arr[np.maximum(ends - 1, 0)] == CARRIAGE_RETURN))
+    nonempty = ends > starts
+    return arr, starts[nonempty], ends[nonempty]
+
+
+def byte_column(arr, starts, ends, k):
+    """Get byte k of every range (0 past the end of the range) and whether it exists."""
+    positions = starts + k
+    inside = positions < ends
+    return np.where(inside, arr[np.minimum(positions, len(arr) - 1)], 0), inside
+
+
+def parse_decimal(arr, starts, ends):
+    """Parse unsigned decimal integers (up to 18 digits) from byte ranges, column by column."""
+    values = np.zeros(len(starts), dtype=np.int64)
+    for k in range(int((ends - starts).max(initial=0))):
+        byte, inside = byte_column(arr, starts, ends, k)
+        values = np.where(inside, values * 10 + byte.astype(np.int64) - ord('0'), values)
+    return values
+
+
+def parse_binary(arr, starts, ends):
+    """
+    Parse binary vector values from byte ranges, column by column.
+    Values with x or z bits, or wider than 63 bits, become VECTOR_UNKNOWN.
+    """
+    values = np.zeros(len(starts), dtype=np.int64)
+    known = ends - starts <= 63
+    for k in range(int(min((ends - starts).max(initial=0), 63))):
+        byte, inside = byte_column(arr, starts, ends, k)
+        known &= ~inside | (byte == ord('0')) | (byte == ord('1'))
+        values = np.where(inside, (values << 1) | (byte == ord('1')), values)
+    return np.where(known, values, VECTOR_UNKNOWN)
+
+
+def code_key(code):
+    """Pack an id code into the uint64 key used by pack_codes: the first KEY_BYTES bytes and the length."""
+    raw = code.encode()
+    return int.from_bytes(raw[:KEY_BYTES], 'little') | (min(len(raw), 255) << 56)
+
+
+def pack_codes(arr, starts, ends):
+    """Pack the id codes in byte ranges into uint64 keys (see code_key)."""
+    keys = np.minimum(ends - starts, 255).astype(np.uint64) << np.uint64(56)
+    for k in range(KEY_BYTES):
+        byte, _ = byte_column(arr, starts, ends, k)
+        keys |= byte.astype(np.uint64) << np.uint64(8 * k)
+    return keys
+
+
+def parse_chunk(data, codes, keys, kinds, now):
+    """
+    Find the timestamps and the value changes of selected id codes in a chunk
+    of whole lines. Every line is classified by its first byte and the id
+    codes are matched as packed keys, so no Python code runs per line except
+    for the changes of real signals.
+
+    Args:
+        data: Chunk of the value change section (bytes)
+        codes: Sorted list of the selected id codes
+        keys: Array of their code_key values (same order)
+        kinds: Array of their kinds as KIND_IDS (same order)
+        now: Timestamp in effect at the start of the chunk
+
+    Returns:
+        Tuple of (code_index, times, ints, reals, now): per change the index
+        into codes, the time, the value as int64 (scalars and vectors) and
+        as float64 (real signals, NaN otherwise), and the last timestamp
+    """
+    arr, starts, ends = split_lines(data)
+    first = arr[starts]
+
+    # Time in effect on every line: the last "#<time>" line at or before it
+    is_time = first == ord('#')
+    timestamps = parse_decimal(arr, starts[is_time] + 1, ends[is_time])
+    line_times = np.concatenate([[now], timestamps])[np.cumsum(is_time)]
+    if len(timestamps):
+        now = int(timestamps[-1])
+
+    # Scalar changes are "<value><code>", vector and real changes "b<bits> <code>" / "r<number> <code>"
+    scalar = SCALAR_TABLE[first] != NOT_SCALAR
+    lines = np.flatnonzero(scalar | np.isin(first, VALUED_PREFIXES))
+    value_starts = starts[lines] + 1
+    value_ends = value_starts.copy()
+    code_starts = value_starts.copy()
+    valued = ~scalar[lines]
+    if valued.any():
+        separators = np.append(np.flatnonzero((arr == ord(' ')) | (arr == ord('\t'))), len(arr))
+        value_ends[valued] = separators[np.searchsorted(separators, value_starts[valued])]
+        code_starts[valued] = value_ends[valued] + 1
+
+    line_keys = pack_codes(arr, code_starts, ends[lines])
+    code_index = np.minimum(np.searchsorted(keys, line_keys), len(keys) - 1)
+    selected = (keys[code_index] == line_keys) & (code_starts < ends[lines])
+    # Long codes can share a key, so look them up by their full text
+    long_codes = {code.encode(): c for c, code in enumerate(codes) if len(code.encode()) > KEY_BYTES}
+    for i in np.flatnonzero(selected & (ends[lines] - code_starts > KEY_BYTES)):
+        c = long_codes.get(data[code_starts[i]:ends[lines][i]])
+        selected[i] = c is not None
+        code_index[i] = c if c is not None else code_index[i]
+
+    lines, code_index = lines[selected], code_index[selected]
+    value_starts, value_ends, valued = value_starts[selected], value_ends[selected], valued[selected]
+    kind = kinds[code_index]
+
+    ints = SCALAR_TABLE[first[lines]].astype(np.int64)
+    # Scalars dumped in vector form ("b1 !") take their last bit
+    scalar_bits = valued & (kind == KIND_IDS['scalar'])
+    ints[scalar_bits] = SCALAR_TABLE[arr[value_ends[scalar_bits] - 1]]
+    vectors = valued & (kind == KIND_IDS['vector'])
+    ints[vectors] = parse_binary(arr, value_starts[vectors], value_ends[vectors])
+    reals = np.full(len(lines), np.nan)
+    for i in np.flatnonzero(valued & (kind == KIND_IDS['real'])):
+        reals[i] = float(data[value_starts[i]:value_ends[i]])
+    return code_index, line_times[lines], ints, reals, now
+
+
+def scan_changes(f, variables, out_dir, chunk_size=CHUNK_SIZE):
+    """
+    Stream the value changes of selected signals to raw files in one pass.
+    Each chunk is parsed at once (see parse_chunk) and its changes are
+    appended to <code>.t (int64 times) and <code>.v (values, see
+    VALUE_DTYPES), so memory does not grow with the size of the dump.
+    Expects one change per line, as simulators write them.
+
+    Args:
+        f: VCD file opened in binary mode, positioned after the header
+        variables: List of variable dicts to index
+        out_dir: Directory for the raw files
+        chunk_size: Bytes read per step
+
+    Returns:
+        Tuple of (counts, end_time): number of changes per id code and the last timestamp
+    """
+    kind_of = {v['code']: v['kind'] for v in variables}
+    codes = sorted(kind_of, key=code_key)
+    keys = np.array([code_key(code) for code in codes], dtype=np.uint64)
+    kinds = np.array([KIND_IDS[kind_of[code]] for code in codes])
+    files = [(open(os.path.join(out_dir, f"{code.encode().hex()}.t"), 'wb'),
+              open(os.path.join(out_dir, f"{code.encode().hex()}.v"), 'wb')) for code in codes]
+    counts = np.zeros(len(codes), dtype=np.int64)
+    now = 0
+    rest = b''
+    try:
+        while True:
+            data = f.read(chunk_size)
+            rest += data
+            cut = rest.rfind(b'\n') + 1 if data else len(rest)
+            chunk, rest = rest[:cut], rest[cut:]
+            if chunk:
+                code_index, times, ints, reals, now = parse_chunk(chunk, codes, keys, kinds, now)
+
+                # Group the changes by signal, keeping their order in time
+                order = np.argsort(code_index, kind='stable')
+                bounds = np.concatenate([[0], np.cumsum(np.bincount(code_index, minlength=len(codes)))])
+                for c in np.flatnonzero(np.diff(bounds)):
+                    part = order[bounds[c]:bounds[c + 1]]
+                    values = reals if kind_of[codes[c]] == 'real' else ints
+                    times[part].tofile(files[c][0])
+                    values[part].astype(VALUE_DTYPES[kind_of[codes[c]]]).tofile(files[c][1])
+                    counts[c] += len(part)
+            if not data:
+                break
+    finally:
+        for times_file, values_file in files:
+            times_file.close()
+            values_file.close()
+    return dict(zip(codes, counts.tolist())), now
+
+
+def get_index_dir(vcd_path):
+    """Get the default index directory of a VCD file (next to it, e.g. wave.vcd -> wave.vcd.index)."""
+    return os.path.abspath(vcd_path) + '.index'
+
+
+def read_manifest(index_dir):
+    """Read the index.json of an index directory, None if it is missing or unreadable."""
+    try:
+        with open(os.path.join(index_dir, 'index.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def load_manifest(index_dir, vcd_path):
+    """
+    Load the manifest of an index if it still matches the VCD file
+    (size, mtime and index format version), otherwise None.
+    """
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        return None
+    stat = os.stat(vcd_path)
+    if (manifest.get('version') != INDEX_FORMAT_VERSION or manifest.get('size') != stat.st_size
+            or manifest.get('mtime_ns') != stat.st_mtime_ns):
+        return None
+    return manifest
+
+
+def save_manifest(index_dir, manifest):
+    """Write the manifest of an index atomically."""
+    tmp_path = os.path.join(index_dir, f"index.json.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, os.path.join(index_dir, 'index.json'))
+
+
+def remove_index_files(index_dir):
+    """
+    Remove an outdated index: only index.json and the signal files its
+    manifest names are deleted, never anything else in the directory.
+    A non-empty directory without an index.json is refused.
+    """
+    if not os.path.isdir(index_dir) or not os.listdir(index_dir):
+        return
+    manifest_path = os.path.join(index_dir, 'index.json')
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"{index_dir} is not empty and holds no index.json, refusing to build an index there")
+
+    old_manifest = read_manifest(index_dir) or {}
+    signals = old_manifest.get('signals')
+    for signal in (signals.values() if isinstance(signals, dict) else []):
+        for suffix in ('.t', '.v'):
+            try:
+                os.remove(os.path.join(index_dir, str(signal.get('code')).encode().hex() + suffix))
+            except (OSError, AttributeError):
+                pass
+    os.remove(manifest_path)
+
+
+def build_index(vcd_path, signals=None, index_dir=None):
+    """
+    Build or extend the on-disk change index of a VCD file.
+    Signals already in a valid index are not scanned again; the missing ones
+    are read together in one pass over the file.
+
+    Args:
+        vcd_path: Path to the VCD file
+        signals: Signal names to index (see find_variable), None for all
+        index_dir: Index directory (default: next to the VCD file). It must
+            be empty, missing or hold an earlier index.
+
+    Returns:
+        Manifest dict (see VCDIndex)
+    """
+    index_dir = index_dir or get_index_dir(vcd_path)
+    manifest = load_manifest(index_dir, vcd_path)
+
+    with open(vcd_path, 'rb') as f:
+        timescale, variables = parse_vcd_header(f)
+        selected = variables if signals is None else [find_variable(variables, name) for name in signals]
+        if manifest is None:
+            remove_index_files(index_dir)
+            os.makedirs(index_dir, exist_ok=True)
+            stat = os.stat(vcd_path)
+            manifest = {'version': INDEX_FORMAT_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                        'timescale': timescale, 'end_time': 0, 'signals': {}}
+            # Mark the directory as an index before any signal file is written
+            save_manifest(index_dir, manifest)
+
+        missing = {}
+        for variable in selected:
+            if variable['name'] not in manifest['signals']:
+                missing.setdefault(variable['code'], variable)
+        if not missing:
+            return manifest
+
+        # Scan into a temporary directory so readers never see a partial signal
+        tmp_dir = os.path.join(index_dir, f"scan.{os.getpid()}.tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            with span('index_vcd', 'step', file=os.path.basename(vcd_path), signals=len(missing)):
+                counts, end_time = scan_changes(f, list(missing.values()), tmp_dir)
+            for code in missing:
+                for suffix in ('.t', '.v'):
+                    name = code.encode().hex() + suffix
+                    os.replace(os.path.join(tmp_dir, name), os.path.join(index_dir, name))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    manifest['end_time'] = max(manifest['end_time'], end_time)
+    for variable in variables:
+        if variable['code'] in missing:
+            manifest['signals'][variable['name']] = dict(variable, count=counts[variable['code']])
+    save_manifest(index_dir, manifest)
+    return manifest
+
+
+class VCDIndex:
+    """
+    Random access to the signals of a VCD file through its change index.
+    The times and values of every indexed signal are memory-mapped, so a
+    time-window query is two binary searches and never touches the text.
+    Times are in ticks of the dump's timescale.
+    """
+
+    def __init__(self, vcd_path, signals=None, index_dir=None):
+        """
+        Args:
+            vcd_path: Path to the VCD file
+            signals: Signal names to index, None for all
+            index_dir: Index directory (default: next to the VCD file)
+        """
+        self.vcd_path = vcd_path
+        self.index_dir = index_dir or get_index_dir(vcd_path)
+        self.manifest = build_index(vcd_path, signals, self.index_dir)
+        self.timescale = self.manifest['timescale']
+        self.end_time = self.manifest['end_time']
+        self._changes = {}
+
+    @property
+    def names(self):
+        """Hierarchical names of the indexed signals."""
+        return sorted(self.manifest['signals'])
+
+    def signal(self, name):
+        """Get the manifest entry of an indexed signal (see find_variable for the name)."""
+        return find_variable(list(self.manifest['signals'].values()), name)
+
+    def changes(self, name):
+        """
+        Get all changes of a signal.
+
+        Returns:
+            Tuple of (times, values) arrays, memory-mapped from the index
+        """
+        signal = self.signal(name)
+        if signal['name'] not in self._changes:
+            stem = os.path.join(self.index_dir, signal['code'].encode().hex())
+            if signal['count'] == 0:
+                arrays = (np.empty(0, dtype=np.int64), np.empty(0, dtype=VALUE_DTYPES[signal['kind']]))
+            else:
+                arrays = (np.memmap(stem + '.t', dtype=np.int64, mode='r'),
+                          np.memmap(stem + '.v', dtype=VALUE_DTYPES[signal['kind']], mode='r'))
+            self._changes[signal['name']] = arrays
+        return self._changes[signal['name']]
+
+    def unknown_value(self, name):
+        """Value of a signal before its first change (x, unknown or NaN)."""
+        return {'scalar': VALUE_X, 'vector': VECTOR_UNKNOWN, 'real': np.nan}[self.signal(name)['kind']]
+
+    def value_at(self, name, times):
+        """
+        Sample a signal: the value in effect at each time, including changes at that time.
+
+        Args:
+            name: Signal name
+            times: Time or array of times in ticks
+
+        Returns:
+            Array of values (unknown_value before the first change)
+        """
+        change_times, values = self.changes(name)
+        index = np.searchsorted(change_times, times, side='right') - 1
+        sampled = values[np.maximum(index, 0)] if len(values) else np.zeros(np.shape(index), dtype=values.dtype)
+        return np.where(index >= 0, sampled, self.unknown_value(name))
+
+    def window(self, name, start, end):
+        """
+        Get the changes of a signal within [start, end].
+        The first entry is the value in effect at start, so the result can be
+        drawn as a step plot without looking outside the window.
+
+        Returns:
+            Tuple of (times, values) arrays
+        """
+        change_times, values = self.changes(name)
+        first, last = np.searchsorted(change_times, [start, end], side='right')
+        times = np.concatenate([[start], change_times[first:last]]).astype(np.int64)
+        return times, np.concatenate([np.atleast_1d(self.value_at(name, start)), values[first:last]])
+
+    def rising_edges(self, name, start=0, end=None):
+        """Get the times where a scalar signal goes to 1 from another value, within [start, end]."""
+        change_times, values = self.window(name, start, self.end_time if end is None else end)
+        edges = np.flatnonzero((values[1:] == 1) & (values[:-1] != 1)) + 1
+        return change_times[edges]
+
+
+def format_time(seconds):
+    """Format a time in seconds with an SI prefix, e.g. 1.5e-9 -> "1.5 ns"."""
+    for unit in ('s', 'ms', 'us', 'ns', 'ps', 'fs'):
+        if abs(seconds) >= TIME_UNITS[unit] or unit == 'fs' or seconds == 0:
+            return f"{seconds / TIME_UNITS[unit]:g} {unit}"
+
+
+def plot_digital_traces(index, names, output_path, start=0, end=None, pdf=None):
+    """
+    Plot signals of a VCD index as stacked step traces over a time window,
+    in the style of the analog plots. x and z values are shaded red.
+
+    Args:
+        index: VCDIndex
+        names: Signal names, one row each
+        output_path: Path to save the plot (None to skip the PNG)
+        start: Start of the window in ticks
+        end: End of the window in ticks (default: end of the dump)
+        pdf: Optional PdfPages stream to write the plot to
+    """
+    end = index.end_time if end is None else end
+    fig, axes = plt.subplots(len(names), 1, sharex=True, squeeze=False,
+                             figsize=(12, 1.5 + 0.9 * len(names)))
+    for ax, name in zip(axes[:, 0], names):
+        signal = index.signal(name)
+        times, values = index.window(name, start, end)
+        times = np.append(times, end) * index.timescale
+        values = np.append(values, values[-1])
+
+        if signal['kind'] == 'scalar':
+            unknown = values >= VALUE_X
+            y = np.where(unknown, 0.5, values).astype(np.float64)
+            # A step spans to the next change, so shade up to that point too
+            shade = unknown | np.concatenate([[False], unknown[:-1]])
+            ax.fill_between(times, 0, 1, where=shade, step='post', color='red', alpha=0.3, linewidth=0)
+            ax.set_ylim(-0.2, 1.2)
+            ax.set_yticks([0, 1])
+        else:
+            y = np.where(values == VECTOR_UNKNOWN, np.nan, values).astype(np.float64)
+
+        ax.plot(*decimate_for_axes(ax, times, y), drawstyle='steps-post', linewidth=1.5)
+        ax.set_ylabel(signal['name'].rsplit('.', 1)[-1], rotation=0, ha='right', va='center', fontweight='bold')
+        ax.grid(True, alpha=0.3, linestyle='--')
+
+    axes[-1, 0].set_xlabel('Time [s]', fontweight='bold')
+    axes[-1, 0].set_xlim(start * index.timescale, end * index.timescale)
+    axes[0, 0].set_title(f"{os.path.basename(index.vcd_path)}: {format_time(start * index.timescale)} to "
+                         f"{format_time(end * index.timescale)}", fontweight='bold', pad=15)
+    with span('layout', 'step'):
+        fig.tight_layout()
+    save_figure(fig, output_path, pdf)
+
+
+def load_tsetlin_model(model_path=TSETLIN_MODEL_PATH):
+    """Load tsetlin_model.py from its path as a module (it lives outside Analog/)."""
+    spec = importlib.util.spec_from_file_location('tsetlin_model', model_path)
+    if spec is None:
+        raise ValueError(f"Cannot load the reference model {model_path}")
+    model = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(model)
+    return model
+
+
+def check_tsetlin_model(index, clock='clk', reset='reset', beta='beta', outputs=('b2o', 'b1o', 'b0o', 'betaOut', 'alpha'),
+                        model_path=TSETLIN_MODEL_PATH):
+    """
+    Cross-check a dump of detTotaleSystem against the bit-parallel reference model.
+    Inputs are sampled just before every rising clock edge (a reset anywhere
+    in the following clock period counts, it is asynchronous), and the
+    outputs are compared once they have settled, just before the next edge.
+    Cycles where the dump has x or z outputs are not compared.
+
+    Args:
+        index: VCDIndex with the clock, inputs and outputs indexed
+        clock, reset, beta: Names of the input signals
+        outputs: Names of b2o, b1o, b0o, betaOut and alpha
+        model_path: Path to tsetlin_model.py
+
+    Returns:
+        Tuple of (n_compared, mismatches): number of compared cycles and a
+        list of (edge time, signal, expected, actual)
+    """
+    model = load_tsetlin_model(model_path)
+    TsetlinBank, pack_bits = model.TsetlinBank, model.pack_bits
+
+    edges = index.rising_edges(clock)
+    if len(edges) == 0:
+        return 0, []
+    settled = np.append(edges[1:], index.end_time + 1) - 1
+
+    betas = index.value_at(beta, edges - 1) == 1
+    resets = index.value_at(reset, edges) == 1
+    reset_times, reset_values = index.changes(reset)
+    pulses = reset_times[(reset_values == 1) & (reset_times >= edges[0])]
+    resets[np.searchsorted(edges, pulses, side='right') - 1] = True
+
+    # Start from the registered values before the first edge (x counts as 0)
+    bank = TsetlinBank(1)
+    initial = [index.value_at(name, edges[0] - 1) == 1 for name in outputs[:4]]
+    bank.b2, bank.b1, bank.b0, bank.beta = (pack_bits([bit]) for bit in initial)
+    states, alphas = bank.run(pack_bits(betas[:, None]), pack_bits(resets[:, None]))
+
+    expected = np.column_stack([states[:, 0, 0] & 1, states[:, 1, 0] & 1, states[:, 2, 0] & 1,
+                                betas | resets, alphas[:, 0] & 1]).astype(np.uint8)
+    actual = np.column_stack([index.value_at(name, settled) for name in outputs])
+    known = np.all(actual < VALUE_X, axis=1)
+
+    mismatches = []
+    for cycle, column in zip(*np.nonzero((expected != actual) & known[:, None])):
+        mismatches.append((int(edges[cycle]), outputs[column], int(expected[cycle, column]),
+                           int(actual[cycle, column])))
+    return int(known.sum()), mismatches
+
+
+def main():
+    """Index a VCD dump, and optionally plot a time window or cross-check it against the reference model."""
+    parser = argparse.ArgumentParser(description="Streaming VCD reader with a per-signal change index.")
+    parser.add_argument('vcd', help="VCD file, e.g. a dump of detTotaleSystem")
+    parser.add_argument('-s', '--signals', nargs='+', help="Signals to index (default: the Tsetlin signals found)")
+    parser.add_argument('--all', action='store_true', help="Index every signal in the dump")
+    parser.add_argument('--list', action='store_true', help="List the signals in the dump")
+    parser.add_argument('--start', type=float, default=0.0, help="Start of the plotted window in seconds")
+    parser.add_argument('--end', type=float, help="End of the plotted window in seconds")
+    parser.add_argument('--plot', help="Save the traces of the window to this file")
+    parser.add_argument('--check', action='store_true', help="Cross-check against tsetlin_model.py")
+    parser.add_argument('--model', default=TSETLIN_MODEL_PATH, help="Reference model used by --check")
+    parser.add_argument('--index-dir', help="Index directory (default: next to the VCD file, must be empty or an "
+                                            "earlier index)")
+    args = parser.parse_args()
+
+    with open(args.vcd, 'rb') as f:
+        timescale, variables = parse_vcd_header(f)
+    if args.list:
+        for variable in variables:
+            print(f"{variable['name']:<40} {variable['kind']:<7} {variable['width']:>3} bit  id {variable['code']}")
+        return
+
+    signals = args.signals
+    if signals is None and not args.all:
+        signals = []
+        for name in TSETLIN_SIGNALS:
+            try:
+                find_variable(variables, name)
+                signals.append(name)
+            except ValueError:
+                print(f"Signal {name} not in {args.vcd}, skipped")
+
+    start = time.perf_counter()
+    try:
+        index = VCDIndex(args.vcd, signals, args.index_dir)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    names = signals or index.names
+    n_changes = sum(index.signal(name)['count'] for name in names)
+    print(f"Indexed {len(names)} signals ({n_changes} changes, up to {format_time(index.end_time * timescale)}) "
+          f"in {elapsed:.2f} s: {index.index_dir}")
+
+    if args.plot:
+        setup_plot_style()
+        end = None if args.end is None else round(args.end / timescale)
+        plot_digital_traces(index, names, args.plot, round(args.start / timescale), end)
+        print(f"Saved plot: {args.plot}")
+
+    if args.check:
+        n_compared, mismatches = check_tsetlin_model(index, model_path=args.model)
+        print(f"Compared {n_compared} clock cycles with the reference model: {len(mismatches)} mismatches")
+        for edge, name, expected, actual in mismatches[:10]:
+            print(f"  edge at {format_time(edge * timescale)}: {name} = {actual}, model expects {expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import time
+
+import numpy as np
+
+
+# Automata per packed word: bit k of word w is automaton 64 * w + k
+WORD_BITS = 64
+ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def combinatorics(beta, b2, b1, b0):
+    """
+    Next-state and output logic of combinatorics.v, gate for gate.
+    Works on packed words (NumPy unsigned integer arrays, every bit an
+    independent automaton) and on bool arrays.
+
+    Args:
+        beta: Registered feedback input
+        b2, b1, b0: Registered state bits
+
+    Returns:
+        Tuple of (b2o, b1o, b0o, alpha)
+    """
+    not_b2, not_b1, not_b0, not_beta = ~b2, ~b1, ~b0, ~beta
+
+    t1 = b2 & not_b1 & beta
+    t2 = b2 & not_b1 & b0
+    t3 = not_b2 & b1 & b0 & beta
+    b2o = t1 | t2 | t3
+
+    u1 = not_b2 & b1 & not_beta
+    u2 = not_b2 & b0 & not_beta
+    u3 = b2 & not_b1 & not_b0 & not_beta
+    b1o = u1 | u2 | u3
+
+    v1 = not_b2 & not_b0 & beta
+    v2 = not_b2 & not_b0 & not_beta
+    v3 = b2 & not_b1 & not_b0
+    b0o = v1 | v2 | t1 | v3
+
+    w1 = not_b2 & b1 & not_b0 & not_beta
+    w2 = b2 & not_b1
+    alpha = w1 | t3 | w2
+    return b2o, b1o, b0o, alpha
+
+
+def pack_bits(bits):
+    """
+    Pack a bool array of automata into 64-bit words.
+
+    Args:
+        bits: Bool array of shape (..., n_automata)
+
+    Returns:
+        uint64 array of shape (..., n_words), unused bits of the last word are 0
+    """
+    bits = np.asarray(bits, dtype=bool)
+    n_words = -(-bits.shape[-1] // WORD_BITS)
+    padded = np.zeros(bits.shape[:-1] + (n_words * WORD_BITS,), dtype=bool)
+    padded[..., :bits.shape[-1]] = bits
+    packed = np.packbits(padded, axis=-1, bitorder='little')
+    return packed.reshape(bits.shape[:-1] + (n_words, 8)).view('<u8')[..., 0].astype(np.uint64)
+
+
+def unpack_bits(words, n_automata):
+    """
+    Unpack 64-bit words into a bool array (inverse of pack_bits).
+
+    Args:
+        words: uint64 array of shape (..., n_words)
+        n_automata: Number of automata to keep
+
+    Returns:
+        Bool array of shape (..., n_automata)
+    """
+    words = np.ascontiguousarray(words, dtype='<u8')
+    bits = np.unpackbits(words.view(np.uint8), axis=-1, bitorder='little')
+    return bits[..., :n_automata].astype(bool)
+
+
+class TsetlinBank:
+    """
+    Many independent copies of the system in dettotalesystem.bde, bit-parallel.
+    Each automaton is the registerNY2 register (b2, b1, b0 and the beta input
+    register) feeding combinatorics, whose b2o..b0o go back into the register.
+    A clock edge therefore loads the next state from the registered state and
+    the registered beta, and loads the new beta input.
+
+    Reset follows the flipflop2.v netlist: reset enters the NAND of the slave
+    latch, which forces Q high (not low, as the comment there says), so a
+    reset automaton holds state 111 and beta 1. States 110 and 111 are unused
+    by the state machine and go to 000 on the next edge. This holds for a
+    reset released while the clock is low; released while it is high, the
+    slave latch reloads the value captured at the last edge instead.
+    """
+
+    def __init__(self, n_automata):
+        """
+        Args:
+            n_automata: Number of automata (packed 64 per word)
+        """
+        self.n_automata = n_automata
+        self.n_words = -(-n_automata // WORD_BITS)
+        self.b2 = np.zeros(self.n_words, dtype=np.uint64)
+        self.b1 = np.zeros(self.n_words, dtype=np.uint64)
+        self.b0 = np.zeros(self.n_words, dtype=np.uint64)
+        self.beta = np.zeros(self.n_words, dtype=np.uint64)
+
+    def reset(self, mask=ALL_ONES):
+        """
+        Apply the asynchronous reset to the automata whose bit is set in mask.
+
+        Args:
+            mask: Packed words (or one word for all) of the automata to reset
+        """
+        for register in (self.b2, self.b1, self.b0, self.beta):
+            register |= mask
+
+    @property
+    def alpha(self):
+        """Current output (action) of every automaton, as packed words."""
+        return combinatorics(self.beta, self.b2, self.b1, self.b0)[3]
+
+    @property
+    def state(self):
+        """Current state b2b1b0 of every automaton as integers 0..7."""
+        bits = [unpack_bits(register, self.n_automata) for register in (self.b2, self.b1, self.b0)]
+        return (bits[0].astype(np.uint8) << 2) | (bits[1].astype(np.uint8) << 1) | bits[2]
+
+    def step(self, beta, reset=None):
+        """
+        Advance all automata by one clock edge.
+
+        Args:
+            beta: Packed words of the beta input sampled at this edge
+            reset: Optional packed words of automata held in reset at this edge
+
+        Returns:
+            Packed words of alpha after the edge
+        """
+        self.b2, self.b1, self.b0, _ = combinatorics(self.beta, self.b2, self.b1, self.b0)
+        self.beta = np.array(beta, dtype=np.uint64)
+        if reset is not None:
+            self.reset(reset)
+        return self.alpha
+
+    def run(self, betas, resets=None):
+        """
+        Run many cycles with given inputs.
+
+        Args:
+            betas: Packed beta words per cycle, shape (n_cycles, n_words)
+            resets: Optional packed reset words per cycle, same shape
+
+        Returns:
+            Tuple of (states, alphas): packed b2/b1/b0 words of shape
+            (n_cycles, 3, n_words) and alpha words of shape (n_cycles, n_words),
+            both after each edge
+        """
+        n_cycles = len(betas)
+        states = np.empty((n_cycles, 3, self.n_words), dtype=np.uint64)
+        alphas = np.empty((n_cycles, self.n_words), dtype=np.uint64)
+        for cycle in range(n_cycles):
+            alphas[cycle] = self.step(betas[cycle], None if resets is None else resets[cycle])
+            states[cycle] = (self.b2, self.b1, self.b0)
+        return states, alphas
+
+
+def write_test_vectors(path, n_cycles, seed=0, reset_probability=0.02):
+    """
+    Write golden test vectors of one automaton for a testbench ($readmemb).
+    Each line holds the inputs of a clock edge and the register outputs and
+    alpha after it: reset beta b2o b1o b0o betaOut alpha.
+
+    Args:
+        path: Output file
+        n_cycles: Number of clock edges
+        seed: Seed of the random inputs
+        reset_probability: Chance of a reset at each edge (the first edge always resets)
+    """
+    rng = np.random.default_rng(seed)
+    resets = rng.random(n_cycles) < reset_probability
+    resets[0] = True
+    betas = rng.random(n_cycles) < 0.5
+
+    bank = TsetlinBank(1)
+    with open(path, 'w') as f:
+        f.write("// reset beta b2o b1o b0o betaOut alpha\n")
+        for reset, beta in zip(resets, betas):
+            alpha = bank.step(pack_bits([beta]), pack_bits([reset]) if reset else None)
+            bits = [reset, beta] + [bool(int(r[0]) & 1) for r in (bank.b2, bank.b1, bank.b0, bank.beta, alpha)]
+            f.write(''.join('1' if b else '0' for b in bits) + '\n')
+
+
+def convergence_study(n_automata, n_cycles, reward, seed=0):
+    """
+    Let automata learn in a random environment: each cycle an automaton gets
+    beta = 1 with probability reward[alpha] for its current action alpha.
+    In combinatorics.v beta = 1 reinforces the current action (it moves the
+    state deeper into the half of that action) and beta = 0 pushes the
+    state towards the other action, so the automata should end up choosing
+    the action with the higher reward probability.
+
+    Args:
+        n_automata: Number of independent automata
+        n_cycles: Number of clock edges
+        reward: Tuple of (P(beta=1 | alpha=0), P(beta=1 | alpha=1))
+        seed: Seed of the environment
+
+    Returns:
+        Array of the fraction of automata with alpha = 1 after each cycle
+    """
+    rng = np.random.default_rng(seed)
+    bank = TsetlinBank(n_automata)
+    bank.reset()
+    valid = pack_bits(np.ones(n_automata, dtype=bool))
+
+    fraction = np.empty(n_cycles)
+    for cycle in range(n_cycles):
+        alpha = unpack_bits(bank.alpha, n_automata)
+        beta = pack_bits(rng.random(n_automata) < np.where(alpha, reward[1], reward[0]))
+        fraction[cycle] = np.count_nonzero(unpack_bits(bank.step(beta) & valid, n_automata)) / n_automata
+    return fraction
+
+
+def main():
+    """Measure the simulation speed, and optionally write test vectors or run a convergence study."""
+    parser = argparse.ArgumentParser(description="Bit-parallel model of the Tsetlin automaton.")
+    parser.add_argument('-n', '--automata', type=int, default=65536)
+    parser.add_argument('-c', '--cycles', type=int, default=1000)
+    parser.add_argument('--vectors', help="Write golden test vectors of one automaton to this file")
+    parser.add_argument('--converge', nargs=2, type=float, metavar=('P0', 'P1'),
+                        help="Convergence study: reward probability P(beta=1) for alpha=0 and for alpha=1")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.vectors:
+        write_test_vectors(args.vectors, args.cycles, args.seed)
+        print(f"Wrote {args.cycles} test vectors to {args.vectors}")
+        return
+
+    if args.converge:
+        fraction = convergence_study(args.automata, args.cycles, args.converge, args.seed)
+        for cycle in sorted({0, 9, 99, args.cycles - 1} & set(range(args.cycles))):
+            print(f"cycle {cycle + 1:>7}: {fraction[cycle]:.3f} of automata choose alpha = 1")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    bank = TsetlinBank(args.automata)
+    bank.reset()
+    betas = rng.integers(0, ALL_ONES, size=(args.cycles, bank.n_words), dtype=np.uint64, endpoint=True)
+
+    start = time.perf_counter()
+    for beta in betas:
+        bank.step(beta)
+    elapsed = time.perf_counter() - start
+    print(f"{args.automata} automata x {args.cycles} cycles in {elapsed:.3f} s "
+          f"({args.automata * args.cycles / elapsed / 1e6:.0f} M automaton-cycles/s)")
+
+
+if __name__ == "__main__":
+    main()